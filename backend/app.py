@@ -3,18 +3,41 @@ Flask Backend for Sentiment Analysis Web App
 Provides API endpoints for sentiment analysis
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import sys
 import os
 import pandas as pd
 import random
+import json
+import threading
+import time
 
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from scrape_tweets import scrape_tweets
-from clean_and_analyze import clean_text, analyze_sentiment, download_nltk_data
+from scrape_tweets import scrape_tweets, iter_tweet_batches
+from clean_and_analyze import analyze_dataframe, download_nltk_data
+from sentiment_engines import DEFAULT_ENGINE
+from dedup import duplication_summary
+from stream_monitor import StreamMonitor, StreamLimitReached
+from aggregates import AnalysisAggregator
+from bulk_scoring import BulkInputError, parse_json_array, iter_ndjson, score_records
+from upload_processing import UploadError, MultipartFileReader, detect_format, analyze_upload, load_upload
+from analytics_store import AnalyticsStore, GRANULARITIES
+from topic_compare import TopicComparator, TIMELINE_GRANULARITY as COMPARE_GRANULARITY
+from instrumentation import StageTimer, Profiler, activate, deactivate, stage, timed_iter, log_timing
+from metrics import (REGISTRY as metrics_registry, ANALYSES_IN_FLIGHT, RESULT_STORE_BYTES,
+                     RESULT_STORE_ENTRIES, ANALYTICS_STORE_BYTES, ANALYSES_QUEUED,
+                     ADMISSION_REJECTIONS, observe_request, file_bytes)
+from admission import AdmissionController, AdmissionRejected, CLIENT_KEY_HEADER
+from sampling import analyze_sampled, SAMPLE_BATCH_SIZE
+from search_index import TweetIndex, parse_search_options
+from response_encoding import FORMATS, EncodingUnavailable, negotiate, encode_frame, encode_payload
+from api_common import (parse_analyze_options, parse_compare_options, parse_timeline_options,
+                        parse_engine, BodyTooLarge, LimitedBody, API_ENDPOINTS, SAMPLE_TOPICS,
+                        SCORE_MAX_BYTES, SCORE_MAX_ITEMS, SCORE_BATCH_SIZE, UPLOAD_MAX_BYTES,
+                        UPLOAD_CHUNK_SIZE)
 
 app = Flask(__name__)
 # Enable CORS for all origins (change to specific domain in production)
@@ -23,8 +46,172 @@ CORS(app, resources={r"/api/*": {"origins": "*"}})
 # Download NLTK data on startup
 download_nltk_data()
 
-# Store the last analysis data in memory
+# Store the last analysis data in memory. The snapshot (the scored DataFrame,
+# encoded per /api/data request) is swapped in whole under the lock, never
+# mutated, so threaded workers always serve a complete result.
 last_analysis_data = None
+last_analysis_lock = threading.Lock()
+# Inverted index over the last analysis for /api/search (swapped with it)
+last_search_index = None
+
+# Live topic monitors (one polling loop per topic, shared by all clients)
+stream_monitor = StreamMonitor()
+
+# Persistent store of scored tweets and hourly rollups
+analytics_store = AnalyticsStore()
+
+# Bounded pool and per-topic result cache for /api/compare
+topic_comparator = TopicComparator()
+
+# Concurrency slots, wait queue and per-client budgets for /api/analyze
+analysis_admission = AdmissionController()
+
+# Opt-in sampled request profiling (PROFILE_EVERY / PROFILE_ALLOW_HEADER)
+request_profiler = Profiler()
+
+# Endpoints that scrape or score (counted as in-flight analyses)
+ANALYSIS_ENDPOINTS = {'analyze_topic', 'compare_topics', 'score_texts', 'upload_dataset'}
+
+
+def collect_store_metrics():
+    """Refresh result store gauges before each metrics snapshot"""
+    RESULT_STORE_ENTRIES.set(len(topic_comparator.cache), store='compare_cache')
+    ANALYSES_QUEUED.set(analysis_admission.status()['queued'])
+    ANALYTICS_STORE_BYTES.set(file_bytes(analytics_store.path, analytics_store.path + '-wal'))
+
+
+metrics_registry.add_collector(collect_store_metrics)
+# Workers import the app after forking, so each one gets its own flusher
+metrics_registry.start_flusher()
+
+
+def store_last_analysis(topic, df):
+    """Swap in the snapshot served by /api/data and its /api/search index"""
+    global last_analysis_data, last_search_index
+    snapshot = {
+        'topic': topic,
+        'df': df,
+        'timestamp': pd.Timestamp.now().isoformat()
+    }
+    with stage('index'):
+        index = TweetIndex(df)
+    with last_analysis_lock:
+        last_analysis_data = snapshot
+        last_search_index = (topic, index)
+    RESULT_STORE_BYTES.set(int(df.memory_usage(deep=True).sum()), store='last_analysis')
+    RESULT_STORE_BYTES.set(index.nbytes, store='search_index')
+
+
+@app.before_request
+def start_request_timing():
+    """Time every request by stage and profile the sampled ones"""
+    request.stage_timer = StageTimer(request.path)
+    request.timer_token = activate(request.stage_timer)
+    wanted = request_profiler.wanted(requested=request.headers.get('X-Profile') == '1')
+    request.profile = request_profiler.start() if wanted else None
+    if request.endpoint in ANALYSIS_ENDPOINTS:
+        ANALYSES_IN_FLIGHT.inc(endpoint=request.endpoint)
+
+
+@app.after_request
+def finish_request_timing(response):
+    """Add the Server-Timing header and log the request's stage timings"""
+    timer = getattr(request, 'stage_timer', None)
+    if timer is None:
+        return response
+    
+    profile = getattr(request, 'profile', None)
+    if profile is not None:
+        request.profile = None
+        response.headers['X-Profile-File'] = os.path.basename(
+            request_profiler.stop(profile, f"{request.method} {request.path}")
+        )
+    
+    response.headers['Server-Timing'] = timer.server_timing()
+    log_timing('request_timing', timer, method=request.method, path=request.path,
+               endpoint=request.endpoint, status=response.status_code)
+    request.status_code = response.status_code
+    return response
+
+
+@app.teardown_request
+def end_request_timing(error=None):
+    """
+    Record request metrics and release the timer
+
+    On Flask 3.0 this runs once, after a streamed body finishes. Flask 3.1
+    runs teardown twice for stream_with_context responses (before and after
+    the body), so each piece of request state is popped and only handled by
+    the first call.
+    """
+    profile = request.__dict__.pop('profile', None)
+    if profile is not None:
+        # The request failed before after_request: still release the profiler
+        request_profiler.stop(profile, f"{request.method} {request.path} error")
+    token = request.__dict__.pop('timer_token', None)
+    if token is not None:
+        deactivate(token)
+    
+    timer = request.__dict__.pop('stage_timer', None)
+    if timer is None:
+        return
+    endpoint = request.endpoint or 'unmatched'
+    if endpoint in ANALYSIS_ENDPOINTS:
+        ANALYSES_IN_FLIGHT.dec(endpoint=endpoint)
+    observe_request(timer, request.method, endpoint, getattr(request, 'status_code', 500))
+
+
+def client_key():
+    """Key of the calling client for per-client budgets"""
+    if CLIENT_KEY_HEADER:
+        value = request.headers.get(CLIENT_KEY_HEADER)
+        if value:
+            # X-Forwarded-For lists proxies after the client
+            return value.split(',')[0].strip()
+    return request.remote_addr
+
+
+def busy_response(error):
+    """429 response for a rejected analysis, with Retry-After"""
+    ADMISSION_REJECTIONS.inc(reason=error.reason)
+    response = jsonify({'error': str(error), 'reason': error.reason, 'retry_after': error.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def response_format():
+    """
+    Format negotiated from ?format= and the Accept header
+
+    Returns:
+        (format name, None) or (None, error response)
+    """
+    try:
+        return negotiate(request.headers.get('Accept'), request.args.get('format')), None
+    except EncodingUnavailable as e:
+        return None, (jsonify({'error': str(e)}), 406)
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+
+
+def serialize(payload, fmt, table_key='timeline_data'):
+    """Response for a result dictionary in the negotiated format"""
+    if fmt == 'json':
+        response = jsonify(payload)
+    else:
+        response = Response(encode_payload(fmt, payload, table_key), mimetype=FORMATS[fmt])
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+def persist_run(topic, df, source, engine):
+    """Save a scored DataFrame to the analytics store (never fails the request)"""
+    try:
+        return analytics_store.record_run(topic, df, source=source, engine=engine)
+    except Exception as e:
+        print(f"Warning: Could not persist run for '{topic}': {e}")
+        return None
 
 
 def get_top_comments(df, sentiment, n=5):
@@ -33,9 +220,10 @@ def get_top_comments(df, sentiment, n=5):
     if filtered.empty:
         return []
     
-    # Sort by engagement (like + retweet count)
-    filtered['engagement'] = filtered['like_count'] + filtered['retweet_count']
-    top = filtered.nlargest(n, 'engagement')
+    # Sort by engagement (like + retweet count), without writing to the slice
+    top = filtered.assign(
+        engagement=filtered['like_count'] + filtered['retweet_count']
+    ).nlargest(n, 'engagement')
     
     return [
         {
@@ -94,12 +282,7 @@ def home():
     return jsonify({
         'message': 'Sentiment Analysis API',
         'version': '1.0',
-        'endpoints': {
-            'health': '/api/health',
-            'analyze': '/api/analyze (POST)',
-            'data': '/api/data',
-            'topics': '/api/topics'
-        },
+        'endpoints': API_ENDPOINTS,
         'status': 'running'
     })
 
@@ -110,99 +293,57 @@ def health_check():
     return jsonify({'status': 'healthy', 'message': 'Sentiment Analysis API is running'})
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics of every worker (see METRICS_DIR)"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_topic():
     """
     Main endpoint for sentiment analysis
     Expects JSON: {"topic": "AI", "max_tweets": 500}
+    Optional: "dedupe": true, "near_dup_threshold": 0.8, "engine": "vader",
+    "timeline_granularity": "auto|minute|hour|day|week", "timeline_points": 200,
+    "sample": true or {"margin_of_error": 0.05, "confidence": 0.95, "sample_size": 1000}
+    Responds in columnar JSON, MessagePack or Arrow (the timeline) when asked
+    through the Accept header or ?format=columnar|msgpack|arrow
+    max_tweets is capped at ANALYZE_MAX_TWEETS; when every analysis slot is
+    busy and the wait queue is full (or the client is over its budget) the
+    request gets a 429 with Retry-After
     """
-    global last_analysis_data
-    
     try:
-        data = request.get_json()
-        topic = data.get('topic', '')
-        max_tweets = data.get('max_tweets', 500)
-        
-        if not topic:
-            return jsonify({'error': 'Topic is required'}), 400
+        try:
+            options = parse_analyze_options(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        fmt, error = response_format()
+        if error:
+            return error
+        topic, max_tweets, engine = options['topic'], options['max_tweets'], options['engine']
+        sampling, granularity, max_points = options['sampling'], options['granularity'], options['max_points']
         
         print(f"\n{'='*50}")
         print(f"Analyzing topic: {topic}")
         print(f"Max tweets: {max_tweets}")
         print(f"{'='*50}\n")
         
-        # Step 1: Scrape tweets
-        print("Step 1: Scraping tweets...")
-        df = scrape_tweets(topic, max_tweets=max_tweets)
-        
-        if df.empty:
-            return jsonify({'error': 'No tweets found for this topic'}), 404
-        
-        # Step 2: Clean and analyze
-        print("\nStep 2: Cleaning and analyzing...")
-        df['cleaned_text'] = df['content'].apply(clean_text)
-        df = df[df['cleaned_text'].str.strip() != '']
-        
-        sentiment_results = df['cleaned_text'].apply(analyze_sentiment)
-        df['sentiment_compound'] = sentiment_results.apply(lambda x: x['compound'])
-        df['sentiment_positive'] = sentiment_results.apply(lambda x: x['positive'])
-        df['sentiment_negative'] = sentiment_results.apply(lambda x: x['negative'])
-        df['sentiment_neutral'] = sentiment_results.apply(lambda x: x['neutral'])
-        df['sentiment'] = sentiment_results.apply(lambda x: x['sentiment'])
-        
-        # Step 3: Prepare response
-        print("\nStep 3: Preparing response...")
-        
-        sentiment_counts = df['sentiment'].value_counts().to_dict()
-        total_tweets = len(df)
-        
-        response = {
-            'topic': topic,
-            'total_tweets': total_tweets,
-            'sentiment_summary': {
-                'average_score': float(df['sentiment_compound'].mean()),
-                'median_score': float(df['sentiment_compound'].median()),
-            },
-            'distribution': {
-                'positive': sentiment_counts.get('positive', 0),
-                'negative': sentiment_counts.get('negative', 0),
-                'neutral': sentiment_counts.get('neutral', 0)
-            },
-            'percentages': {
-                'positive': round((sentiment_counts.get('positive', 0) / total_tweets) * 100, 1),
-                'negative': round((sentiment_counts.get('negative', 0) / total_tweets) * 100, 1),
-                'neutral': round((sentiment_counts.get('neutral', 0) / total_tweets) * 100, 1)
-            },
-            'timeline_data': []
-        }
-        
-        # Add timeline data if date column exists
-        if 'date' in df.columns:
-            try:
-                df['date'] = pd.to_datetime(df['date'])
-                daily_sentiment = df.groupby([df['date'].dt.date, 'sentiment']).size().unstack(fill_value=0)
-                timeline_data = []
-                for date, row in daily_sentiment.iterrows():
-                    timeline_data.append({
-                        'date': str(date),
-                        'positive': int(row.get('positive', 0)),
-                        'negative': int(row.get('negative', 0)),
-                        'neutral': int(row.get('neutral', 0))
-                    })
-                response['timeline_data'] = timeline_data
-            except Exception as e:
-                print(f"Warning: Could not generate timeline data: {e}")
-        
-        print("\n✓ Analysis complete!")
+        try:
+            with stage('queue'):
+                analysis_admission.acquire(max_tweets, client_key())
+        except AdmissionRejected as e:
+            print(f"✗ Rejected ({e.reason}), retry after {e.retry_after}s")
+            return busy_response(e)
         
-        # Store the DataFrame for later retrieval
-        last_analysis_data = {
-            'topic': topic,
-            'dataframe': df.to_dict('records'),
-            'timestamp': pd.Timestamp.now().isoformat()
-        }
-        
-        return jsonify(response)
+        started = time.perf_counter()
+        try:
+            if sampling:
+                return analyze_topic_sampled(topic, max_tweets, engine, sampling, granularity, max_points, fmt)
+            return analyze_topic_full(topic, max_tweets, engine, options['dedupe'], options['near_threshold'],
+                                      granularity, max_points, fmt)
+        finally:
+            analysis_admission.release(max_tweets, time.perf_counter() - started)
     
     except Exception as e:
         print(f"\n✗ Error: {e}")
@@ -211,33 +352,328 @@ def analyze_topic():
         return jsonify({'error': str(e)}), 500
 
 
+def analyze_topic_full(topic, max_tweets, engine, dedupe, near_threshold, granularity, max_points, fmt='json'):
+    """
+    Full /api/analyze: scrape, clean and score every tweet, then persist the
+    run and keep it for /api/data and /api/compare
+    """
+    # Step 1: Scrape tweets
+    print("Step 1: Scraping tweets...")
+    with stage('scrape'):
+        df = scrape_tweets(topic, max_tweets=max_tweets)
+    
+    if df.empty:
+        return jsonify({'error': 'No tweets found for this topic'}), 404
+    
+    # Step 2: Clean and analyze (timed as 'clean' and 'score')
+    print("\nStep 2: Cleaning and analyzing...")
+    df = analyze_dataframe(df, dedupe=dedupe, near_threshold=near_threshold, engine=engine)
+    
+    # Step 3: Prepare response
+    print("\nStep 3: Preparing response...")
+    with stage('aggregate'):
+        response = AnalysisAggregator().update(df).response(topic, engine, granularity, max_points)
+        if 'dup_group' in df.columns:
+            response['deduplication'] = duplication_summary(df)
+    
+    with stage('persist'):
+        run_id = persist_run(topic, df, source='analyze', engine=engine)
+    if run_id:
+        response['run_id'] = run_id
+    
+    # Plain analyses can be reused by /api/compare while fresh (if their
+    # timeline is on the comparison's axis)
+    if (not dedupe and near_threshold is None and not response['timeline_downsampled']
+            and response['timeline_granularity'] == COMPARE_GRANULARITY):
+        cache = topic_comparator.cache
+        cache.put(cache.key(topic, max_tweets, engine), response)
+    
+    print("\n✓ Analysis complete!")
+    
+    # Store the DataFrame for later retrieval
+    with stage('snapshot'):
+        store_last_analysis(topic, df)
+    
+    with stage('serialize'):
+        return serialize(response, fmt)
+
+
+def analyze_topic_sampled(topic, max_tweets, engine, sampling, granularity, max_points, fmt='json'):
+    """
+    Sampled /api/analyze: score a reservoir sample of the scraped stream and
+    stop once the requested margin of error is reached. Sampled runs are not
+    written to the analytics store, so history volumes stay complete counts.
+    """
+    print("Sampling tweets...")
+    batches = timed_iter('scrape', iter_tweet_batches(topic, max_tweets=max_tweets, batch_size=SAMPLE_BATCH_SIZE))
+    df, info = analyze_sampled(batches, engine=engine, **sampling)
+    
+    if df.empty:
+        return jsonify({'error': 'No tweets found for this topic'}), 404
+    
+    with stage('aggregate'):
+        response = AnalysisAggregator().update(df).response(topic, engine, granularity, max_points)
+    response['sampling'] = info
+    
+    print(f"\n✓ Sampled analysis complete: {info['sample_size']} of {info['tweets_seen']} tweets, "
+          f"margin ±{info['achieved_margin_of_error']:.3f}")
+    
+    store_last_analysis(topic, df)
+    
+    with stage('serialize'):
+        return serialize(response, fmt)
+
+
+@app.route('/api/compare', methods=['POST'])
+def compare_topics():
+    """
+    Side-by-side sentiment comparison of several topics
+    Expects JSON: {"topics": ["AI", "Climate Change"], "max_tweets": 500}
+    Optional: "engine": "vader"
+    Topics are scraped and scored concurrently; fresh per-topic results are reused
+    """
+    try:
+        topics, max_tweets, engine = parse_compare_options(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    print(f"\nComparing topics: {', '.join(topics)}")
+    response = topic_comparator.compare(
+        topics, max_tweets=max_tweets, engine=engine,
+        on_scored=lambda topic, df: persist_run(topic, df, source='compare', engine=engine)
+    )
+    print(f"✓ Comparison complete in {response['elapsed_seconds']}s")
+    
+    if not response['results']:
+        return jsonify(response), 404
+    return jsonify(response)
+
+
 @app.route('/api/data', methods=['GET'])
 def get_analysis_data():
     """
     Get the full dataset from the last analysis
+    Row JSON by default; one array per column as columnar JSON or
+    MessagePack, or an Arrow IPC stream, through the Accept header or
+    ?format=columnar|msgpack|arrow
     """
-    global last_analysis_data
+    fmt, error = response_format()
+    if error:
+        return error
+    
+    with last_analysis_lock:
+        snapshot = last_analysis_data
     
-    if last_analysis_data is None:
+    if snapshot is None:
         return jsonify({'error': 'No analysis data available. Please run an analysis first.'}), 404
     
-    return jsonify(last_analysis_data)
+    meta = {'topic': snapshot['topic'], 'timestamp': snapshot['timestamp']}
+    with stage('serialize'):
+        if fmt == 'json':
+            response = jsonify({**meta, 'dataframe': snapshot['df'].to_dict('records')})
+        else:
+            response = Response(encode_frame(fmt, snapshot['df'], meta), mimetype=FORMATS[fmt])
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+@app.route('/api/search', methods=['GET'])
+def search_tweets():
+    """
+    Search the last analysis's tweets, most engaging first
+    Query parameters: ?q=carbon "climate change"&sentiment=negative
+    &from=2024-01-01&to=2024-01-31&limit=20&offset=0
+    Every word and quoted phrase must match the cleaned text
+    """
+    with last_analysis_lock:
+        indexed = last_search_index
+    
+    if indexed is None:
+        return jsonify({'error': 'No analysis data available. Please run an analysis first.'}), 404
+    
+    try:
+        options = parse_search_options(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    topic, index = indexed
+    with stage('search'):
+        response = index.search(**options)
+    return jsonify({'topic': topic, 'query': options['query'], **response})
+
+
+@app.route('/api/score', methods=['POST'])
+def score_texts():
+    """
+    Bulk scoring endpoint for raw texts (no scraping)
+    Accepts a JSON array of strings or {"id": ..., "text": ...} objects, or
+    NDJSON (Content-Type: application/x-ndjson) with one item per line.
+    Optional query parameter: ?engine=vader
+    Streams results back as NDJSON (or a JSON array for JSON input)
+    """
+    try:
+        engine = parse_engine(request.args.get('engine', DEFAULT_ENGINE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.content_length is not None and request.content_length > SCORE_MAX_BYTES:
+        return jsonify({'error': f'Request body too large (limit {SCORE_MAX_BYTES} bytes)'}), 413
+    
+    ndjson_input = request.mimetype in ('application/x-ndjson', 'application/jsonl')
+    if ndjson_input:
+        records = iter_ndjson(request.stream, SCORE_MAX_ITEMS, SCORE_MAX_BYTES)
+    else:
+        try:
+            records = parse_json_array(LimitedBody(request.stream, SCORE_MAX_BYTES).read(), SCORE_MAX_ITEMS)
+        except BodyTooLarge:
+            return jsonify({'error': f'Request body too large (limit {SCORE_MAX_BYTES} bytes)'}), 413
+        except BulkInputError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    results = score_records(records, engine=engine, batch_size=SCORE_BATCH_SIZE)
+    
+    if ndjson_input or request.accept_mimetypes.best == 'application/x-ndjson':
+        def generate():
+            for result in results:
+                yield json.dumps(result) + '\n'
+        mimetype = 'application/x-ndjson'
+    else:
+        def generate():
+            yield '['
+            for i, result in enumerate(results):
+                yield (',' if i else '') + json.dumps(result)
+            yield ']'
+        mimetype = 'application/json'
+    
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+@app.route('/api/upload', methods=['POST'])
+def upload_dataset():
+    """
+    Analyze an uploaded CSV or Parquet dataset (must have a 'content' column)
+    Accepts multipart/form-data with a 'file' field, or the raw file as the body.
+    Optional query parameters: ?engine=vader&name=my-dataset&format=csv
+    (plus timeline_granularity and timeline_points as for /api/analyze)
+    Returns the same shape as /api/analyze plus an upload_id
+    """
+    try:
+        engine = parse_engine(request.args.get('engine', DEFAULT_ENGINE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.content_length is not None and request.content_length > UPLOAD_MAX_BYTES:
+        return jsonify({'error': f'Upload too large (limit {UPLOAD_MAX_BYTES} bytes)'}), 413
+    
+    body = LimitedBody(request.stream, UPLOAD_MAX_BYTES)
+    try:
+        if request.mimetype == 'multipart/form-data':
+            boundary = request.mimetype_params.get('boundary')
+            if not boundary:
+                return jsonify({'error': 'Missing multipart boundary'}), 400
+            fileobj = MultipartFileReader(body, boundary)
+            filename = fileobj.filename
+            options = {**fileobj.fields, **request.args}
+        else:
+            fileobj = body
+            filename = None
+            options = request.args
+        
+        fmt = detect_format(filename, options.get('format'))
+        name = options.get('name') or filename or 'upload'
+        try:
+            granularity, max_points = parse_timeline_options(options)
+        except ValueError as e:
+            raise UploadError(str(e))
+        
+        print(f"\nAnalyzing uploaded dataset: {name} ({fmt})")
+        response = analyze_upload(fileobj, fmt=fmt, name=name, engine=engine,
+                                  chunk_size=UPLOAD_CHUNK_SIZE, store=analytics_store,
+                                  timeline_granularity=granularity, timeline_points=max_points)
+        print(f"✓ Upload analyzed: {response['rows_read']} rows (id {response['upload_id']})")
+        return jsonify(response)
+    
+    except BodyTooLarge:
+        return jsonify({'error': f'Upload too large (limit {UPLOAD_MAX_BYTES} bytes)'}), 413
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload_result(upload_id):
+    """Get the stored result of an uploaded dataset analysis"""
+    response = load_upload(upload_id)
+    if response is None:
+        return jsonify({'error': 'Unknown upload id'}), 404
+    return jsonify(response)
+
+
+@app.route('/api/history/<topic>', methods=['GET'])
+def get_topic_history(topic):
+    """
+    Historical sentiment trend for a topic from the analytics store
+    Optional query parameters: ?from=2024-01-01&to=2024-01-31&granularity=day
+    (granularity: hour, day, week or month)
+    """
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"Unknown granularity '{granularity}'. Choose from: {', '.join(GRANULARITIES)}"}), 400
+    
+    try:
+        history = analytics_store.history(topic, start=request.args.get('from'),
+                                          end=request.args.get('to'), granularity=granularity)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'topic': topic,
+        'granularity': granularity,
+        'total_tweets': sum(point['total'] for point in history),
+        'history': history
+    })
+
+
+@app.route('/api/runs', methods=['GET'])
+def get_runs():
+    """
+    Recent analysis runs stored in the analytics store
+    Optional query parameters: ?topic=AI&limit=50
+    """
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(analytics_store.runs(request.args.get('topic'), limit=limit))
+
+
+@app.route('/api/stream/<topic>', methods=['GET'])
+def stream_topic(topic):
+    """
+    Live sentiment monitor for a topic via Server-Sent Events
+    Each event carries rolling-window and exponentially decayed aggregates
+    Answers 429 when this worker already monitors STREAM_MAX_TOPICS topics
+    or serves STREAM_MAX_SUBSCRIBERS streams (each holds a worker thread)
+    """
+    try:
+        stream_monitor.check_capacity(topic)
+    except StreamLimitReached as e:
+        return jsonify({'error': str(e)}), 429
+    return Response(
+        stream_with_context(stream_monitor.events(topic)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @app.route('/api/topics', methods=['GET'])
 def get_sample_topics():
     """Get sample topics for suggestions"""
-    topics = [
-        {"name": "Artificial Intelligence", "icon": "🤖"},
-        {"name": "Climate Change", "icon": "🌍"},
-        {"name": "Cryptocurrency", "icon": "💰"},
-        {"name": "Electric Vehicles", "icon": "🚗"},
-        {"name": "Space Exploration", "icon": "🚀"},
-        {"name": "Mental Health", "icon": "🧠"},
-        {"name": "Remote Work", "icon": "💼"},
-        {"name": "Education", "icon": "📚"}
-    ]
-    return jsonify(topics)
+    return jsonify(SAMPLE_TOPICS)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,666 @@
+"""
+ASGI Backend for Sentiment Analysis Web App
+Same routes and responses as app.py, on an event loop: scrapes are awaited
+(many in flight per worker) and scoring runs in a process pool
+
+    gunicorn asgi_app:app -k uvicorn.workers.UvicornWorker --workers 2
+"""
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.datastructures import MutableHeaders
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from datetime import date, datetime, time as dt_time, timezone
+from email.message import Message
+from email.utils import format_datetime
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clean_and_analyze import download_nltk_data
+from sentiment_engines import DEFAULT_ENGINE
+from stream_monitor import StreamMonitor, StreamLimitReached
+from aggregates import AnalysisAggregator
+from bulk_scoring import BulkInputError, parse_json_array, iter_ndjson, batched_records
+from upload_processing import UploadError, MultipartFileReader, detect_format, analyze_upload, load_upload
+from analytics_store import AnalyticsStore, GRANULARITIES
+from topic_compare import TIMELINE_GRANULARITY as COMPARE_GRANULARITY
+from async_analysis import AsyncAnalyzer
+from instrumentation import StageTimer, activate, deactivate, stage, log_timing
+from metrics import (REGISTRY as metrics_registry, ANALYSES_IN_FLIGHT, RESULT_STORE_BYTES,
+                     RESULT_STORE_ENTRIES, ANALYTICS_STORE_BYTES, ADMISSION_REJECTIONS,
+                     observe_request, file_bytes)
+from admission import AdmissionController, AdmissionRejected, CLIENT_KEY_HEADER
+from search_index import TweetIndex, parse_search_options
+from response_encoding import FORMATS, EncodingUnavailable, negotiate, encode_frame, encode_payload
+from api_common import (parse_analyze_options, parse_compare_options, parse_timeline_options,
+                        parse_engine, API_ENDPOINTS, SAMPLE_TOPICS, SCORE_MAX_BYTES,
+                        SCORE_MAX_ITEMS, SCORE_BATCH_SIZE, UPLOAD_MAX_BYTES, UPLOAD_CHUNK_SIZE)
+
+# Download NLTK data on startup
+download_nltk_data()
+
+# Analyses in flight per worker. Most of them are waiting on scrapes, so this
+# is far above ANALYZE_MAX_CONCURRENT; scoring is bounded by the pool instead.
+ASYNC_MAX_IN_FLIGHT = int(os.environ.get('ASYNC_MAX_IN_FLIGHT', 256))
+# Open /api/stream clients per worker (each holds a thread of Starlette's pool)
+ASYNC_MAX_STREAMS = int(os.environ.get('ASYNC_MAX_STREAMS', 32))
+
+# Request bodies above this size are spooled to a temporary file
+SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
+# Store the last analysis data in memory (swapped in whole, never mutated)
+last_analysis_data = None
+# Inverted index over the last analysis for /api/search (swapped with it)
+last_search_index = None
+
+# Live topic monitors (one polling loop per topic, shared by all clients).
+# Open streams are capped below the 40 threads of Starlette's pool.
+stream_monitor = StreamMonitor(max_subscribers=ASYNC_MAX_STREAMS)
+
+# Persistent store of scored tweets and hourly rollups
+analytics_store = AnalyticsStore()
+
+# Scoring pool and the per-topic result cache shared with /api/compare
+analyzer = AsyncAnalyzer()
+
+# In-flight cap and per-client budgets for /api/analyze. Nothing waits in a
+# queue: blocking for a slot would stall the event loop, so a full worker
+# answers 429 at once.
+analysis_admission = AdmissionController(max_concurrent=ASYNC_MAX_IN_FLIGHT, max_queue=0)
+
+# Paths that scrape or score (counted as in-flight analyses)
+ANALYSIS_PATHS = {
+    '/api/analyze': 'analyze_topic',
+    '/api/compare': 'compare_topics',
+    '/api/score': 'score_texts',
+    '/api/upload': 'upload_dataset',
+}
+
+
+def collect_store_metrics():
+    """Refresh result store gauges before each metrics snapshot"""
+    RESULT_STORE_ENTRIES.set(len(analyzer.cache), store='compare_cache')
+    ANALYTICS_STORE_BYTES.set(file_bytes(analytics_store.path, analytics_store.path + '-wal'))
+
+
+metrics_registry.add_collector(collect_store_metrics)
+# Workers import the app after forking, so each one gets its own flusher
+metrics_registry.start_flusher()
+
+
+def _json_default(value):
+    """Serialize dates the way Flask's jsonify does (HTTP date strings)"""
+    if isinstance(value, date):
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, dt_time())
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def jsonify(payload, status_code=200):
+    """JSON response with the same bytes as Flask's jsonify (sorted keys, compact)"""
+    body = json.dumps(payload, default=_json_default, sort_keys=True, separators=(',', ':')) + '\n'
+    return Response(body, status_code=status_code, media_type='application/json')
+
+
+def media_type(value):
+    """Lower-cased media type of a Content-Type or Accept value, without parameters"""
+    return (value or '').split(',')[0].split(';')[0].strip().lower()
+
+
+class RequestTiming:
+    """
+    Time every request by stage (Server-Timing header, timing log, metrics)
+
+    Plain ASGI middleware rather than BaseHTTPMiddleware, so streamed bodies
+    are counted until they finish and the timer's context reaches the
+    endpoint. Sampled profiling (X-Profile) is not supported here: cProfile
+    can't follow a request across awaits.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timer = StageTimer(scope['path'])
+        token = activate(timer)
+        status = 500
+        in_flight = ANALYSIS_PATHS.get(scope['path']) if scope['method'] == 'POST' else None
+        if in_flight:
+            ANALYSES_IN_FLIGHT.inc(endpoint=in_flight)
+
+        async def send_timed(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                MutableHeaders(scope=message).append('Server-Timing', timer.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            deactivate(token)
+            if in_flight:
+                ANALYSES_IN_FLIGHT.dec(endpoint=in_flight)
+            endpoint = getattr(scope.get('endpoint'), '__name__', None)
+            log_timing('request_timing', timer, method=scope['method'], path=scope['path'],
+                       endpoint=endpoint, status=status)
+            observe_request(timer, scope['method'], endpoint or 'unmatched', status)
+
+
+def client_key(request):
+    """Key of the calling client for per-client budgets"""
+    if CLIENT_KEY_HEADER:
+        value = request.headers.get(CLIENT_KEY_HEADER)
+        if value:
+            # X-Forwarded-For lists proxies after the client
+            return value.split(',')[0].strip()
+    return request.client.host if request.client else None
+
+
+def busy_response(error):
+    """429 response for a rejected analysis, with Retry-After"""
+    ADMISSION_REJECTIONS.inc(reason=error.reason)
+    response = jsonify({'error': str(error), 'reason': error.reason, 'retry_after': error.retry_after}, 429)
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def response_format(request):
+    """
+    Format negotiated from ?format= and the Accept header
+
+    Returns:
+        (format name, None) or (None, error response)
+    """
+    try:
+        return negotiate(request.headers.get('accept'), request.query_params.get('format')), None
+    except EncodingUnavailable as e:
+        return None, jsonify({'error': str(e)}, 406)
+    except ValueError as e:
+        return None, jsonify({'error': str(e)}, 400)
+
+
+def serialize(payload, fmt, table_key='timeline_data'):
+    """Response for a result dictionary in the negotiated format"""
+    if fmt == 'json':
+        response = jsonify(payload)
+    else:
+        response = Response(encode_payload(fmt, payload, table_key), media_type=FORMATS[fmt])
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+async def read_json(request):
+    """Request body as JSON (None if it isn't valid JSON)"""
+    try:
+        return json.loads(await request.body())
+    except ValueError:
+        return None
+
+
+async def spool_body(request, limit):
+    """
+    Copy the request body to a temporary file, in memory while small
+
+    Returns:
+        The file positioned at its start, or None if the body exceeds limit bytes
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            spool.close()
+            return None
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def persist_run(topic, df, source, engine):
+    """Save a scored DataFrame to the analytics store (never fails the request)"""
+    try:
+        return analytics_store.record_run(topic, df, source=source, engine=engine)
+    except Exception as e:
+        print(f"Warning: Could not persist run for '{topic}': {e}")
+        return None
+
+
+def store_last_analysis(topic, df):
+    """Swap in the snapshot served by /api/data and its /api/search index"""
+    global last_analysis_data, last_search_index
+    snapshot = {
+        'topic': topic,
+        'df': df,
+        'timestamp': datetime.now().isoformat()
+    }
+    with stage('index'):
+        index = TweetIndex(df)
+    last_analysis_data, last_search_index = snapshot, (topic, index)
+    RESULT_STORE_BYTES.set(int(df.memory_usage(deep=True).sum()), store='last_analysis')
+    RESULT_STORE_BYTES.set(index.nbytes, store='search_index')
+
+
+async def home(request):
+    """Root endpoint"""
+    return jsonify({
+        'message': 'Sentiment Analysis API',
+        'version': '1.0',
+        'endpoints': API_ENDPOINTS,
+        'status': 'running'
+    })
+
+
+async def health_check(request):
+    """Health check endpoint"""
+    return jsonify({'status': 'healthy', 'message': 'Sentiment Analysis API is running'})
+
+
+async def get_metrics(request):
+    """Prometheus metrics of every worker (see METRICS_DIR)"""
+    body = await asyncio.to_thread(metrics_registry.render)
+    return Response(body, media_type='text/plain; version=0.0.4')
+
+
+async def analyze_topic(request):
+    """
+    Main endpoint for sentiment analysis (same options as app.py)
+    The scrape is awaited, so a worker serves other requests meanwhile;
+    scoring and aggregation run in the process pool
+    """
+    try:
+        try:
+            options = parse_analyze_options(await read_json(request))
+        except ValueError as e:
+            return jsonify({'error': str(e)}, 400)
+        fmt, error = response_format(request)
+        if error:
+            return error
+        topic, max_tweets, engine = options['topic'], options['max_tweets'], options['engine']
+
+        print(f"Analyzing topic: {topic} (max tweets: {max_tweets})")
+
+        try:
+            analysis_admission.acquire(max_tweets, client_key(request))
+        except AdmissionRejected as e:
+            print(f"✗ Rejected ({e.reason}), retry after {e.retry_after}s")
+            return busy_response(e)
+
+        started = time.perf_counter()
+        try:
+            if options['sampling']:
+                return await analyze_topic_sampled(topic, max_tweets, engine, options['sampling'],
+                                                   options['granularity'], options['max_points'], fmt)
+            return await analyze_topic_full(topic, max_tweets, engine, options['dedupe'],
+                                            options['near_threshold'], options['granularity'],
+                                            options['max_points'], fmt)
+        finally:
+            analysis_admission.release(max_tweets, time.perf_counter() - started)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}, 500)
+
+
+async def analyze_topic_full(topic, max_tweets, engine, dedupe, near_threshold, granularity, max_points,
+                             fmt='json'):
+    """Full /api/analyze: awaited scrape, pooled scoring, then persist and snapshot"""
+    response, df = await analyzer.analyze(topic, max_tweets, engine, dedupe, near_threshold,
+                                          granularity, max_points)
+    if response is None:
+        return jsonify({'error': 'No tweets found for this topic'}, 404)
+
+    with stage('persist'):
+        run_id = await asyncio.to_thread(persist_run, topic, df, 'analyze', engine)
+    if run_id:
+        response['run_id'] = run_id
+
+    # Plain analyses can be reused by /api/compare while fresh
+    if (not dedupe and near_threshold is None and not response['timeline_downsampled']
+            and response['timeline_granularity'] == COMPARE_GRANULARITY):
+        cache = analyzer.cache
+        cache.put(cache.key(topic, max_tweets, engine), response)
+
+    with stage('snapshot'):
+        await asyncio.to_thread(store_last_analysis, topic, df)
+
+    with stage('serialize'):
+        return serialize(response, fmt)
+
+
+async def analyze_topic_sampled(topic, max_tweets, engine, sampling, granularity, max_points, fmt='json'):
+    """
+    Sampled /api/analyze (see app.py). Batches are scraped on the loop and
+    each batch's reservoir entrants are scored in the pool, so scraping stops
+    as soon as the margin is reached and the loop never runs scoring itself.
+    """
+    df, info = await analyzer.analyze_sampled(topic, max_tweets, engine, **sampling)
+    if df.empty:
+        return jsonify({'error': 'No tweets found for this topic'}, 404)
+
+    with stage('aggregate'):
+        response = await asyncio.to_thread(
+            lambda: AnalysisAggregator().update(df).response(topic, engine, granularity, max_points))
+    response['sampling'] = info
+
+    with stage('snapshot'):
+        await asyncio.to_thread(store_last_analysis, topic, df)
+
+    with stage('serialize'):
+        return serialize(response, fmt)
+
+
+async def compare_topics(request):
+    """
+    Side-by-side sentiment comparison of several topics (same body as app.py)
+    Every topic is scraped at once; fresh per-topic results are reused
+    """
+    try:
+        topics, max_tweets, engine = parse_compare_options(await read_json(request) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+
+    async def on_scored(topic, df):
+        await asyncio.to_thread(persist_run, topic, df, 'compare', engine)
+
+    response = await analyzer.compare(topics, max_tweets=max_tweets, engine=engine, on_scored=on_scored)
+    if not response['results']:
+        return jsonify(response, 404)
+    return jsonify(response)
+
+
+async def get_analysis_data(request):
+    """
+    Get the full dataset from the last analysis (same formats as app.py)
+    Encoding runs on a thread so large datasets don't stall the loop
+    """
+    fmt, error = response_format(request)
+    if error:
+        return error
+
+    snapshot = last_analysis_data
+    if snapshot is None:
+        return jsonify({'error': 'No analysis data available. Please run an analysis first.'}, 404)
+
+    meta = {'topic': snapshot['topic'], 'timestamp': snapshot['timestamp']}
+    with stage('serialize'):
+        if fmt == 'json':
+            response = await asyncio.to_thread(
+                lambda: jsonify({**meta, 'dataframe': snapshot['df'].to_dict('records')})
+            )
+        else:
+            response = Response(await asyncio.to_thread(encode_frame, fmt, snapshot['df'], meta),
+                                media_type=FORMATS[fmt])
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+async def search_tweets(request):
+    """
+    Search the last analysis's tweets, most engaging first (same parameters as app.py)
+    """
+    indexed = last_search_index
+    if indexed is None:
+        return jsonify({'error': 'No analysis data available. Please run an analysis first.'}, 404)
+
+    try:
+        options = parse_search_options(request.query_params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+
+    topic, index = indexed
+    with stage('search'):
+        response = index.search(**options)
+    return jsonify({'topic': topic, 'query': options['query'], **response})
+
+
+async def score_texts(request):
+    """
+    Bulk scoring endpoint for raw texts (same formats as app.py)
+    The body is spooled first; each batch is scored in the process pool and
+    results stream back as they are scored
+    """
+    try:
+        engine = parse_engine(request.query_params.get('engine', DEFAULT_ENGINE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+
+    body = await spool_body(request, SCORE_MAX_BYTES)
+    if body is None:
+        return jsonify({'error': f'Request body too large (limit {SCORE_MAX_BYTES} bytes)'}, 413)
+
+    ndjson_input = media_type(request.headers.get('content-type')) in ('application/x-ndjson', 'application/jsonl')
+    if ndjson_input:
+        records = iter_ndjson(body, SCORE_MAX_ITEMS, SCORE_MAX_BYTES)
+    else:
+        try:
+            records = await asyncio.to_thread(lambda: parse_json_array(body.read(), SCORE_MAX_ITEMS))
+        except BulkInputError as e:
+            return jsonify({'error': str(e)}, 400)
+        finally:
+            body.close()
+
+    batches = batched_records(records, SCORE_BATCH_SIZE)
+
+    async def results():
+        """Result batches: the body is read on a thread and each batch scored in the pool"""
+        try:
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    return
+                yield await analyzer.score_texts(batch, engine)
+        finally:
+            body.close()
+
+    if ndjson_input or media_type(request.headers.get('accept')) == 'application/x-ndjson':
+        async def generate():
+            async for batch in results():
+                yield ''.join(result + '\n' for result in batch)
+        mimetype = 'application/x-ndjson'
+    else:
+        async def generate():
+            yield '['
+            separator = ''
+            async for batch in results():
+                yield separator + ','.join(batch)
+                separator = ','
+            yield ']'
+        mimetype = 'application/json'
+
+    return StreamingResponse(generate(), media_type=mimetype)
+
+
+async def upload_dataset(request):
+    """
+    Analyze an uploaded CSV or Parquet dataset (same options as app.py)
+    The body is spooled to a temporary file, then read in chunks on a thread;
+    each chunk is cleaned and scored in the process pool, while parsing,
+    aggregation and writing the results stay on the thread
+    """
+    try:
+        engine = parse_engine(request.query_params.get('engine', DEFAULT_ENGINE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+
+    body = await spool_body(request, UPLOAD_MAX_BYTES)
+    if body is None:
+        return jsonify({'error': f'Upload too large (limit {UPLOAD_MAX_BYTES} bytes)'}, 413)
+
+    try:
+        content_type = Message()
+        content_type['Content-Type'] = request.headers.get('content-type', 'application/octet-stream')
+        if content_type.get_content_type() == 'multipart/form-data':
+            boundary = content_type.get_param('boundary')
+            if not boundary:
+                return jsonify({'error': 'Missing multipart boundary'}, 400)
+            fileobj = MultipartFileReader(body, boundary)
+            filename = await asyncio.to_thread(lambda: fileobj.filename)
+            options = {**fileobj.fields, **request.query_params}
+        else:
+            fileobj = body
+            filename = None
+            options = request.query_params
+
+        fmt = detect_format(filename, options.get('format'))
+        name = options.get('name') or filename or 'upload'
+        try:
+            granularity, max_points = parse_timeline_options(options)
+        except ValueError as e:
+            raise UploadError(str(e))
+
+        print(f"\nAnalyzing uploaded dataset: {name} ({fmt})")
+        response = await asyncio.to_thread(
+            analyze_upload, fileobj, fmt=fmt, name=name, engine=engine, chunk_size=UPLOAD_CHUNK_SIZE,
+            store=analytics_store, timeline_granularity=granularity, timeline_points=max_points,
+            score_chunk=partial(analyzer.score_chunk, engine=engine)
+        )
+        print(f"✓ Upload analyzed: {response['rows_read']} rows (id {response['upload_id']})")
+        return jsonify(response)
+
+    except UploadError as e:
+        return jsonify({'error': str(e)}, 400)
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}, 500)
+    finally:
+        body.close()
+
+
+async def get_upload_result(request):
+    """Get the stored result of an uploaded dataset analysis"""
+    response = await asyncio.to_thread(load_upload, request.path_params['upload_id'])
+    if response is None:
+        return jsonify({'error': 'Unknown upload id'}, 404)
+    return jsonify(response)
+
+
+async def get_topic_history(request):
+    """
+    Historical sentiment trend for a topic from the analytics store
+    Optional query parameters: ?from=2024-01-01&to=2024-01-31&granularity=day
+    """
+    topic = request.path_params['topic']
+    granularity = request.query_params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"Unknown granularity '{granularity}'. Choose from: {', '.join(GRANULARITIES)}"}, 400)
+
+    try:
+        history = await asyncio.to_thread(analytics_store.history, topic, start=request.query_params.get('from'),
+                                          end=request.query_params.get('to'), granularity=granularity)
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+
+    return jsonify({
+        'topic': topic,
+        'granularity': granularity,
+        'total_tweets': sum(point['total'] for point in history),
+        'history': history
+    })
+
+
+async def get_runs(request):
+    """
+    Recent analysis runs stored in the analytics store
+    Optional query parameters: ?topic=AI&limit=50
+    """
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}, 400)
+    return jsonify(await asyncio.to_thread(analytics_store.runs, request.query_params.get('topic'), limit=limit))
+
+
+async def stream_topic(request):
+    """
+    Live sentiment monitor for a topic via Server-Sent Events
+    The monitor's generator blocks between events, so each client holds a
+    thread of Starlette's pool (40 by default) while connected; beyond
+    ASYNC_MAX_STREAMS clients (or STREAM_MAX_TOPICS topics) it answers 429
+    """
+    topic = request.path_params['topic']
+    try:
+        stream_monitor.check_capacity(topic)
+    except StreamLimitReached as e:
+        return jsonify({'error': str(e)}, 429)
+    return StreamingResponse(
+        stream_monitor.events(topic),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+async def get_sample_topics(request):
+    """Get sample topics for suggestions"""
+    return jsonify(SAMPLE_TOPICS)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start the scoring pool with the worker and stop it on shutdown"""
+    await analyzer.warm_up()
+    try:
+        yield
+    finally:
+        analyzer.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/', home, methods=['GET']),
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/metrics', get_metrics, methods=['GET']),
+        Route('/api/analyze', analyze_topic, methods=['POST']),
+        Route('/api/compare', compare_topics, methods=['POST']),
+        Route('/api/data', get_analysis_data, methods=['GET']),
+        Route('/api/search', search_tweets, methods=['GET']),
+        Route('/api/score', score_texts, methods=['POST']),
+        Route('/api/upload', upload_dataset, methods=['POST']),
+        Route('/api/uploads/{upload_id}', get_upload_result, methods=['GET']),
+        Route('/api/history/{topic}', get_topic_history, methods=['GET']),
+        Route('/api/runs', get_runs, methods=['GET']),
+        Route('/api/stream/{topic}', stream_topic, methods=['GET']),
+        Route('/api/topics', get_sample_topics, methods=['GET']),
+    ],
+    middleware=[
+        Middleware(RequestTiming),
+        # Enable CORS for all origins (change to specific domain in production)
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("\n" + "="*50)
+    print("🚀 Sentiment Analysis API Server (ASGI)")
+    print("="*50)
+    print("Server running on: http://localhost:5000")
+    print("Health check: http://localhost:5000/api/health")
+    print("="*50 + "\n")
+
+    uvicorn.run(app, port=5000, host='0.0.0.0')
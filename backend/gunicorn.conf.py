@@ -0,0 +1,28 @@
+"""
+Gunicorn settings shared by the Procfile and the load test
+gunicorn reads this file automatically when started from backend/. It points
+all workers at one metrics directory, so /api/metrics reports every worker
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Workers import the app after forking, so they inherit this from the master
+os.environ.setdefault(
+    'METRICS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'metrics')
+)
+
+
+def on_starting(server):
+    """Drop the previous run's snapshots before any worker starts"""
+    from metrics import clear_directory
+    clear_directory(os.environ['METRICS_DIR'])
+
+
+def child_exit(server, worker):
+    """Keep an exited worker's counters, but stop reporting its gauges"""
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid, os.environ['METRICS_DIR'])
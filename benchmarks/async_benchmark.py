@@ -0,0 +1,151 @@
+"""
+Sync vs Async Backend Benchmark
+Runs the same /api/analyze load against the Flask backend (gunicorn gthread)
+and the ASGI backend (uvicorn workers with a scoring pool), with the sample
+scraper sleeping SAMPLE_LATENCY per page of 100 tweets to mimic a slow
+upstream, and prints both results side by side
+
+    python benchmarks/async_benchmark.py --latency 0.05,0.5 --concurrency 32 --duration 20
+
+Each latency is a separate scenario. At low latency both servers are bound by
+scoring and the Flask workers' threads keep up; the ASGI backend pays for its
+scoring pool in memory. At high latency most of each analysis is spent
+waiting on the scrape, which is where the event loop pulls ahead. The default
+runs one of each.
+
+Flask gets as many analysis slots as threads and a wait queue as long as the
+client count, so it queues rather than rejects; both servers are measured on
+completed analyses per second.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import parse_mix, start_server, wait_until_healthy, run_load_test
+
+
+def benchmark_server(server, args, port, latency):
+    """
+    Start one backend, load it and stop it
+
+    Args:
+        latency: Simulated scrape latency per 100 tweets in seconds
+
+    Returns:
+        The run_load_test report
+    """
+    extra_env = {'SAMPLE_LATENCY': str(latency)}
+    if server == 'asgi':
+        extra_env['ASYNC_SCORING_PROCESSES'] = str(args.processes)
+    else:
+        extra_env['ANALYZE_MAX_CONCURRENT'] = str(args.threads)
+        extra_env['ANALYZE_QUEUE_SIZE'] = str(args.concurrency)
+        extra_env['ANALYZE_QUEUE_TIMEOUT'] = str(args.timeout)
+
+    process, scratch = start_server('127.0.0.1', port, args.workers, args.threads, int(args.timeout),
+                                    server=server, extra_env=extra_env)
+    try:
+        wait_until_healthy(f'http://127.0.0.1:{port}', process)
+        print(f"Running {args.concurrency} clients against {server} (scrape latency {latency:g}s) for "
+              f"{args.warmup}s warmup + {args.duration}s...")
+        return run_load_test(f'http://127.0.0.1:{port}', parse_mix(f'analyze:{args.max_tweets}'),
+                             args.concurrency, args.duration, args.warmup, args.timeout,
+                             server_pid=process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def comparison_table(reports):
+    """One row per latency and backend from the overall ('ALL') rows of each report"""
+    rows = []
+    for latency, by_server in reports.items():
+        for server, report in by_server.items():
+            rows.append(_comparison_row(latency, server, report))
+    return pd.DataFrame(rows)
+
+
+def _comparison_row(latency, server, report):
+    overall = report['rows'][-1]
+    completed = 1 - overall['error_rate'] - overall['rejected_rate']
+    return {
+        'latency_s': latency,
+        'backend': server,
+        'requests': overall['count'],
+        'ok_per_sec': round(overall['req_per_sec'] * completed, 2),
+        'p50_ms': overall['p50_ms'],
+        'p95_ms': overall['p95_ms'],
+        'p99_ms': overall['p99_ms'],
+        'error_rate': overall['error_rate'],
+        'rejected_rate': overall['rejected_rate'],
+        'peak_rss_mb': round(sum(report['rss_mb'].values()), 1),
+    }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Compare the Flask and ASGI backends under I/O-bound load')
+    parser.add_argument('--latency', type=str, default='0.05,0.5',
+                        help='Comma-separated simulated scrape latencies per 100 tweets in seconds, '
+                             'one scenario each (default: 0.05,0.5)')
+    parser.add_argument('--max-tweets', type=int, default=500,
+                        help='Tweets per analysis (default: 500)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Worker processes for both servers (default: 2)')
+    parser.add_argument('--threads', type=int, default=4,
+                        help='Threads per Flask worker (default: 4, as in the Procfile)')
+    parser.add_argument('--processes', type=int, default=2,
+                        help='Scoring processes per ASGI worker (default: 2)')
+    parser.add_argument('--concurrency', type=int, default=32,
+                        help='Concurrent clients (default: 32)')
+    parser.add_argument('--duration', type=float, default=20,
+                        help='Measured duration per server in seconds (default: 20)')
+    parser.add_argument('--warmup', type=float, default=5,
+                        help='Unmeasured warmup in seconds (default: 5)')
+    parser.add_argument('--timeout', type=float, default=120,
+                        help='Worker and client timeout in seconds (default: 120)')
+    parser.add_argument('--port', type=int, default=8766,
+                        help='Port for the started servers (default: 8766)')
+    parser.add_argument('--json-out', type=str, default=None,
+                        help='Also write both reports as JSON to this path')
+
+    args = parser.parse_args()
+    latencies = [float(latency) for latency in args.latency.split(',')]
+
+    reports = {}
+    for latency in latencies:
+        reports[latency] = {server: benchmark_server(server, args, args.port, latency)
+                            for server in ('gunicorn', 'asgi')}
+
+    print("\n" + "="*70)
+    print("SYNC VS ASYNC BACKEND")
+    print("="*70)
+    print(f"analyze:{args.max_tweets} | scrape latency per 100 tweets: {args.latency}s | "
+          f"workers {args.workers} | flask threads {args.threads} | asgi processes {args.processes} | "
+          f"concurrency {args.concurrency}")
+    print("-"*70)
+    print(comparison_table(reports).to_string(index=False))
+    for latency, by_server in reports.items():
+        for server, report in by_server.items():
+            if report['errors']:
+                print(f"{server} ({latency:g}s) errors: "
+                      + ", ".join(f"{kind} x{count}" for kind, count in report['errors'].items()))
+    print("="*70)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(args), 'reports': {str(latency): by_server for latency, by_server in reports.items()}},
+                      f, indent=2)
+        print(f"Report saved to: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Response Encoding Benchmark
+Measures encode time, payload size (raw and gzipped) and client decode time
+of the /api/data encodings (row JSON, columnar JSON, MessagePack, Arrow IPC)
+on scored sample datasets of several sizes
+
+    python benchmarks/benchmark_encodings.py --sizes 1000,10000,100000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scrape_tweets import generate_sample_tweets
+from clean_and_analyze import analyze_dataframe
+from response_encoding import available, encode_frame, msgpack, pa
+
+
+def encode_rows(df, meta):
+    """Row JSON as /api/data has always served it (per-row dicts, sorted keys)"""
+    return json.dumps({**meta, 'dataframe': df.to_dict('records')},
+                      default=str, sort_keys=True, separators=(',', ':')) + '\n'
+
+
+def decoder(fmt):
+    """Client-side decode function for a format"""
+    if fmt == 'msgpack':
+        return msgpack.unpackb
+    if fmt == 'arrow':
+        return lambda body: pa.ipc.open_stream(body).read_all()
+    return json.loads
+
+
+def best_time(function, repeat):
+    """Fastest of repeat calls in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(sizes, repeat=3, formats=('json', 'columnar', 'msgpack', 'arrow')):
+    """
+    Encode scored sample datasets in every available format
+
+    Args:
+        sizes: Dataset sizes in tweets
+        repeat: Timed runs per measurement (the fastest counts)
+        formats: Formats to compare
+
+    Returns:
+        DataFrame with one row per size and format
+    """
+    rows = []
+    for size in sizes:
+        df = analyze_dataframe(generate_sample_tweets('Climate Change', size, verbose=False))
+        meta = {'topic': 'Climate Change', 'timestamp': pd.Timestamp.now().isoformat()}
+
+        for fmt in formats:
+            if not available(fmt):
+                print(f"Skipping {fmt} (library not installed)")
+                continue
+            encode = (lambda: encode_rows(df, meta)) if fmt == 'json' else (lambda: encode_frame(fmt, df, meta))
+            body = encode()
+            raw = body.encode('utf-8') if isinstance(body, str) else body
+            decode = decoder(fmt)
+            rows.append({
+                'rows': size,
+                'format': fmt,
+                'encode_ms': round(best_time(encode, repeat) * 1000, 1),
+                'decode_ms': round(best_time(lambda: decode(raw), repeat) * 1000, 1),
+                'size_kb': round(len(raw) / 1024, 1),
+                'gzip_kb': round(len(gzip.compress(raw, 6)) / 1024, 1),
+            })
+
+    results = pd.DataFrame(rows)
+    # Relative to row JSON at the same size
+    baseline = results[results['format'] == 'json'].set_index('rows')
+    if not baseline.empty:
+        results['encode_vs_json'] = (results['encode_ms'] / results['rows'].map(baseline['encode_ms'])).round(2)
+        results['size_vs_json'] = (results['size_kb'] / results['rows'].map(baseline['size_kb'])).round(2)
+    return results
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark /api/data response encodings')
+    parser.add_argument('--sizes', type=str, default='1000,10000,100000',
+                        help='Comma-separated dataset sizes in tweets (default: 1000,10000,100000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timed runs per measurement; the fastest counts (default: 3)')
+    parser.add_argument('--json-out', type=str, default=None,
+                        help='Also write the results as JSON to this path')
+
+    args = parser.parse_args()
+
+    results = run_benchmark([int(size) for size in args.sizes.split(',')], repeat=args.repeat)
+
+    print("\n" + "="*70)
+    print("RESPONSE ENCODING BENCHMARK")
+    print("="*70)
+    print(results.to_string(index=False))
+    print("="*70)
+
+    if args.json_out:
+        results.to_json(args.json_out, orient='records', indent=2)
+        print(f"Results saved to: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
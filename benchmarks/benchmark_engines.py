@@ -0,0 +1,110 @@
+"""
+Sentiment Engine Benchmark
+Measures throughput (rows/sec), accuracy on a labeled fixture and
+label agreement with VADER for every registered sentiment engine
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clean_and_analyze import clean_series
+from sentiment_engines import SENTIMENT_ENGINES, get_engine
+
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'labeled_tweets.csv')
+
+
+def benchmark_engine(engine, texts, repeat):
+    """
+    Time an engine's batch scoring over the texts
+
+    Args:
+        engine: SentimentEngine instance
+        texts: List of cleaned text
+        repeat: Number of passes over the texts
+
+    Returns:
+        Tuple (labels from the first pass, rows per second)
+    """
+    labels = [result['sentiment'] for result in engine.score_batch(texts)]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        engine.score_batch(texts)
+    elapsed = time.perf_counter() - start
+
+    return labels, (len(texts) * repeat) / elapsed
+
+
+def run_benchmark(fixture=DEFAULT_FIXTURE, engines=None, repeat=50):
+    """
+    Benchmark engines against the labeled fixture
+
+    Args:
+        fixture: CSV with content and label columns
+        engines: Engine names to benchmark (default: all registered)
+        repeat: Number of timed passes over the fixture
+
+    Returns:
+        DataFrame with one row per engine
+    """
+    df = pd.read_csv(fixture)
+    texts = clean_series(df['content']).tolist()
+    gold = df['label'].tolist()
+
+    engines = engines or list(SENTIMENT_ENGINES)
+    vader_labels, _ = benchmark_engine(get_engine('vader'), texts, 1)
+
+    rows = []
+    for name in engines:
+        try:
+            engine = get_engine(name)
+        except ImportError as e:
+            print(f"⚠ Skipping {name}: {e}")
+            continue
+
+        labels, rate = benchmark_engine(engine, texts, repeat)
+        rows.append({
+            'engine': name,
+            'rows_per_sec': round(rate),
+            'accuracy': round(sum(l == g for l, g in zip(labels, gold)) / len(gold), 3),
+            'agreement_vs_vader': round(sum(l == v for l, v in zip(labels, vader_labels)) / len(gold), 3)
+        })
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark sentiment engines')
+    parser.add_argument('--fixture', type=str, default=DEFAULT_FIXTURE,
+                        help='Labeled CSV with content and label columns')
+    parser.add_argument('--engines', type=str, default=None,
+                        help=f'Comma-separated engines (default: {",".join(SENTIMENT_ENGINES)})')
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='Timed passes over the fixture (default: 50)')
+
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        fixture=args.fixture,
+        engines=args.engines.split(',') if args.engines else None,
+        repeat=args.repeat
+    )
+
+    print("\n" + "="*50)
+    print("SENTIMENT ENGINE BENCHMARK")
+    print("="*50)
+    print(results.to_string(index=False))
+    print("="*50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+API Load Test
+Drives the Flask backend with a configurable request mix from concurrent
+clients and reports throughput, latency percentiles, error rate and worker RSS
+
+By default the harness starts its own gunicorn server with the offline sample
+scraper, so it needs no network access:
+
+    python benchmarks/load_test.py --workers 2 --threads 4 --concurrency 16 --duration 60
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+# name=weight entries; analyze:<n> posts an analysis of n sample tweets
+DEFAULT_MIX = 'analyze:100=3,analyze:500=2,analyze:2000=1,data=2,topics=4'
+TOPICS = ['Artificial Intelligence', 'Climate Change', 'Cryptocurrency', 'Electric Vehicles',
+          'Space Exploration', 'Mental Health', 'Remote Work', 'Education']
+
+
+def parse_mix(mix):
+    """
+    Parse a request mix like 'analyze:100=3,data=1,topics=2'
+
+    Returns:
+        List of (name, weight) pairs
+    """
+    entries = []
+    for part in mix.split(','):
+        name, _, weight = part.strip().partition('=')
+        kind, _, size = name.partition(':')
+        if kind not in ('analyze', 'data', 'topics', 'health'):
+            raise ValueError(f"Unknown request type in mix: {name}")
+        if kind == 'analyze' and not size.isdigit():
+            raise ValueError(f"analyze needs a tweet count, e.g. analyze:500 (got {name})")
+        entries.append((name, float(weight or 1)))
+    return entries
+
+
+def build_request(name):
+    """
+    HTTP method, path and body for one request of the mix
+
+    Returns:
+        (method, path, body bytes or None)
+    """
+    kind, _, size = name.partition(':')
+    if kind == 'analyze':
+        body = {'topic': random.choice(TOPICS), 'max_tweets': int(size)}
+        return 'POST', '/api/analyze', json.dumps(body).encode('utf-8')
+    return 'GET', f'/api/{kind}', None
+
+
+def rss_bytes(pid):
+    """Resident set size of a process from /proc (None if unavailable)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def child_pids(pid):
+    """Direct children of a process (the gunicorn workers of a master)"""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def descendant_pids(pid):
+    """Workers of a master and their own children (e.g. ASGI scoring pools)"""
+    pids = child_pids(pid)
+    for child in list(pids):
+        pids.extend(descendant_pids(child))
+    return pids
+
+
+class RSSSampler(threading.Thread):
+    """
+    Samples the RSS of a server process and its workers, keeping the peak per pid
+    """
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peaks = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            for pid in [self.pid] + descendant_pids(self.pid):
+                rss = rss_bytes(pid)
+                if rss is not None:
+                    self.peaks[pid] = max(self.peaks.get(pid, 0), rss)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def start_server(host, port, workers, threads, timeout, server='gunicorn', extra_env=None):
+    """
+    Start the backend with the offline sample scraper
+
+    Args:
+        host, port: Bind address
+        workers: gunicorn worker processes
+        threads: Threads per worker (gthread worker class when > 1)
+        timeout: gunicorn worker timeout in seconds
+        server: 'gunicorn', 'werkzeug' (Flask's threaded dev server) or
+            'asgi' (asgi_app on gunicorn with uvicorn workers; threads unused)
+        extra_env: Additional environment variables for the server (optional)
+
+    Returns:
+        (Popen, scratch directory) tuple
+    """
+    scratch = tempfile.mkdtemp(prefix='loadtest-')
+    env = dict(os.environ,
+               SCRAPER_BACKEND='sample',
+               ANALYTICS_DB=os.path.join(scratch, 'analytics.db'),
+               UPLOAD_DIR=os.path.join(scratch, 'uploads'),
+               METRICS_DIR=os.path.join(scratch, 'metrics'),
+               # stderr is only read if the server dies; keep it from filling up
+               TIMING_LOG='0',
+               **(extra_env or {}))
+
+    if server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'{host}:{port}',
+                   '--workers', str(workers), '--threads', str(threads),
+                   '--timeout', str(timeout), '--log-level', 'warning']
+    elif server == 'asgi':
+        command = [sys.executable, '-m', 'gunicorn', 'asgi_app:app', '--bind', f'{host}:{port}',
+                   '--worker-class', 'uvicorn.workers.UvicornWorker', '--workers', str(workers),
+                   '--timeout', str(timeout), '--log-level', 'warning']
+    else:
+        command = [sys.executable, '-c',
+                   f"import app; app.app.run(host='{host}', port={port}, threaded=True)"]
+
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return process, scratch
+
+
+def wait_until_healthy(base_url, process=None, timeout=60):
+    """Poll /api/health until the server answers"""
+    parts = urlsplit(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited early:\n{process.stderr.read().decode('utf-8', 'replace')}")
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout}s")
+
+
+def client_loop(base_url, mix, deadline, request_timeout, results, warmup_until):
+    """One simulated client: keep-alive connection issuing weighted requests until the deadline"""
+    parts = urlsplit(base_url)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    conn = None
+
+    while time.time() < deadline:
+        name = random.choices(names, weights)[0]
+        method, path, body = build_request(name)
+        headers = {'Content-Type': 'application/json'} if body else {}
+
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=request_timeout)
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = None
+        except Exception as e:
+            error = type(e).__name__
+            if conn is not None:
+                conn.close()
+            conn = None
+        latency = time.perf_counter() - started
+
+        if started >= warmup_until:
+            results.append((name, latency, status, error))
+
+    if conn is not None:
+        conn.close()
+
+
+def summarize(results, elapsed):
+    """
+    Aggregate raw samples into per-request-type and overall statistics
+
+    Args:
+        results: List of (name, latency seconds, status, error) tuples
+        elapsed: Measured wall time in seconds
+
+    Returns:
+        List of row dictionaries (overall row last)
+    """
+    def row(name, samples):
+        latencies = np.array([s[1] for s in samples]) * 1000
+        errors = sum(1 for s in samples if s[3] or (s[2] or 500) >= 500)
+        # Turned away by admission control (429 with Retry-After)
+        rejected = sum(1 for s in samples if s[2] == 429)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+        return {
+            'request': name,
+            'count': len(samples),
+            'req_per_sec': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(float(p50), 1),
+            'p95_ms': round(float(p95), 1),
+            'p99_ms': round(float(p99), 1),
+            'max_ms': round(float(latencies.max()), 1) if len(latencies) else 0.0,
+            'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+            'rejected_rate': round(rejected / len(samples), 4) if samples else 0.0,
+        }
+
+    by_name = {}
+    for sample in results:
+        by_name.setdefault(sample[0], []).append(sample)
+
+    rows = [row(name, samples) for name, samples in sorted(by_name.items())]
+    rows.append(row('ALL', results))
+    return rows
+
+
+def run_load_test(base_url, mix, concurrency, duration, warmup=5.0, request_timeout=120.0,
+                  server_pid=None):
+    """
+    Run concurrent clients against a server
+
+    Args:
+        base_url: Server URL (e.g. http://127.0.0.1:8765)
+        mix: List of (name, weight) pairs from parse_mix
+        concurrency: Number of concurrent clients
+        duration: Measured seconds (after warmup)
+        warmup: Seconds of unmeasured load first
+        request_timeout: Client timeout per request (match gunicorn --timeout)
+        server_pid: Server process to sample RSS from (optional)
+
+    Returns:
+        Dictionary with 'rows' (per request type), 'errors' (error kinds) and
+        'rss_mb' (peak RSS per pid)
+    """
+    results = []
+    started = time.time()
+    warmup_until = time.perf_counter() + warmup
+    deadline = started + warmup + duration
+
+    sampler = RSSSampler(server_pid) if server_pid else None
+    if sampler:
+        sampler.start()
+
+    clients = [
+        threading.Thread(target=client_loop,
+                         args=(base_url, mix, deadline, request_timeout, results, warmup_until))
+        for _ in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    if sampler:
+        sampler.stop()
+
+    elapsed = time.time() - started - warmup
+    error_kinds = {}
+    for _, _, status, error in results:
+        if error or (status or 500) >= 400:
+            kind = error or f'HTTP {status}'
+            error_kinds[kind] = error_kinds.get(kind, 0) + 1
+
+    return {
+        'rows': summarize(results, elapsed),
+        'errors': error_kinds,
+        'rss_mb': {pid: round(rss / 1024 / 1024, 1) for pid, rss in (sampler.peaks.items() if sampler else [])},
+        'elapsed_seconds': round(elapsed, 1),
+    }
+
+
+def print_report(report, settings):
+    """Print the load test results as tables"""
+    import pandas as pd
+
+    print("\n" + "="*70)
+    print("API LOAD TEST")
+    print("="*70)
+    print(settings)
+    print(f"Measured for {report['elapsed_seconds']}s")
+    print("-"*70)
+    print(pd.DataFrame(report['rows']).to_string(index=False))
+    if report['errors']:
+        print("-"*70)
+        print("Errors: " + ", ".join(f"{kind} x{count}" for kind, count in report['errors'].items()))
+    if report['rss_mb']:
+        print("-"*70)
+        print("Peak RSS (MB): " + ", ".join(f"pid {pid}: {rss}" for pid, rss in report['rss_mb'].items()))
+    print("="*70)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Load test the sentiment analysis API')
+    parser.add_argument('--url', type=str, default=None,
+                        help='Test an already running server instead of starting one')
+    parser.add_argument('--server', type=str, default='gunicorn', choices=['gunicorn', 'werkzeug', 'asgi'],
+                        help='Server to start when --url is not given (default: gunicorn)')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='Port for the started server (default: 8765)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='gunicorn workers (default: 2, as in the Procfile)')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='Threads per gunicorn worker; > 1 uses gthread (default: 1)')
+    parser.add_argument('--timeout', type=float, default=120,
+                        help='gunicorn worker timeout and client timeout in seconds (default: 120)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Concurrent clients (default: 8)')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='Measured duration in seconds (default: 30)')
+    parser.add_argument('--warmup', type=float, default=5,
+                        help='Unmeasured warmup in seconds (default: 5)')
+    parser.add_argument('--mix', type=str, default=DEFAULT_MIX,
+                        help=f'Weighted request mix (default: {DEFAULT_MIX})')
+    parser.add_argument('--json-out', type=str, default=None,
+                        help='Also write the report as JSON to this path')
+
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    process, scratch = None, None
+    base_url = args.url
+    if base_url is None:
+        base_url = f'http://127.0.0.1:{args.port}'
+        process, scratch = start_server('127.0.0.1', args.port, args.workers, args.threads,
+                                        int(args.timeout), server=args.server)
+    try:
+        wait_until_healthy(base_url, process)
+        print(f"Running {args.concurrency} clients against {base_url} "
+              f"for {args.warmup}s warmup + {args.duration}s...")
+        report = run_load_test(base_url, mix, args.concurrency, args.duration, args.warmup,
+                               args.timeout, server_pid=process.pid if process else None)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.url:
+        settings = f"Target: {args.url} | concurrency {args.concurrency} | mix {args.mix}"
+    else:
+        settings = (f"Server: {args.server} | workers {args.workers} | threads {args.threads} | "
+                    f"timeout {args.timeout:g}s | concurrency {args.concurrency} | mix {args.mix}")
+    print_report(report, settings)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(args), **report}, f, indent=2)
+        print(f"Report saved to: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Nitter Stub Server
+Local stand-in for a Nitter instance that serves paginated fake timelines,
+with configurable latency and failures, for exercising the Nitter client
+without touching public instances
+
+    python benchmarks/nitter_stub_server.py --port 9001 --latency 0.05 --fail-rate 0.2
+    NITTER_INSTANCES=http://127.0.0.1:9001 python src/scrape_tweets_ntscraper.py --query AI
+"""
+
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+TEMPLATES = [
+    "Great news about {q}! This is exactly what we needed",
+    "Disappointed by the lack of progress on {q}. We need change now!",
+    "New {q} report released. Data shows mixed results and trends.",
+]
+
+
+def render_page(query, page, per_page, pages, base_path):
+    """HTML for one timeline page in Nitter's markup"""
+    now = datetime(2026, 1, 1, 12, 0)
+    items = []
+    for i in range(per_page):
+        n = page * per_page + i
+        tweet_id = 1900000000000000000 - n
+        date = (now - timedelta(minutes=10 * n)).strftime('%b %d, %Y · %I:%M %p UTC')
+        text = TEMPLATES[n % len(TEMPLATES)].format(q=escape(query))
+        items.append(f'''
+<div class="timeline-item">
+  <a class="fullname" href="/user{n % 50}">User {n % 50}</a>
+  <a class="username" href="/user{n % 50}">@user{n % 50}</a>
+  <span class="tweet-date"><a href="/user{n % 50}/status/{tweet_id}#m" title="{date}">10m</a></span>
+  <div class="tweet-content media-body">{text}</div>
+  <div class="tweet-stats">
+    <span class="tweet-stat"><div class="icon-container"><span class="icon-comment"></span> {n % 7}</div></span>
+    <span class="tweet-stat"><div class="icon-container"><span class="icon-retweet"></span> {n % 11}</div></span>
+    <span class="tweet-stat"><div class="icon-container"><span class="icon-quote"></span> 0</div></span>
+    <span class="tweet-stat"><div class="icon-container"><span class="icon-heart"></span> {n % 13}</div></span>
+  </div>
+</div>''')
+
+    more = ''
+    if page + 1 < pages:
+        more = f'<div class="show-more"><a href="{base_path}?cursor=page-{page + 1}">Load more</a></div>'
+    return f'<html><body><div class="timeline">{"".join(items)}{more}</div></body></html>'
+
+
+def make_handler(latency=0.0, fail_rate=0.0, fail_status=503, pages=20, per_page=20):
+    """Request handler class with the given behaviour"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        requests_served = 0
+        lock = threading.Lock()
+
+        def do_GET(self):
+            with StubHandler.lock:
+                StubHandler.requests_served += 1
+            if latency:
+                time.sleep(latency)
+
+            if random.random() < fail_rate:
+                body = b'<html><body><div class="error-panel">Instance has been rate limited.</div></body></html>'
+                self._send(fail_status, body)
+                return
+
+            url = urlsplit(self.path)
+            params = parse_qs(url.query)
+            cursor = params.get('cursor', ['page-0'])[0]
+            page = int(cursor.split('-')[-1]) if cursor.split('-')[-1].isdigit() else 0
+            query = params.get('q', [url.path.strip('/')])[0]
+            self._send(200, render_page(query, page, per_page, pages, url.path).encode('utf-8'))
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub(port=0, **behaviour):
+    """
+    Start a stub instance in a background thread
+
+    Returns:
+        (server, base URL) tuple; call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(**behaviour))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Serve fake Nitter timelines locally')
+    parser.add_argument('--port', type=int, default=9001,
+                        help='Port to listen on (default: 9001)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds of delay per request (default: 0)')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with an error (default: 0)')
+    parser.add_argument('--fail-status', type=int, default=503,
+                        help='HTTP status for failed requests (200 serves an error page; default: 503)')
+    parser.add_argument('--pages', type=int, default=20,
+                        help='Pages per timeline (default: 20)')
+    parser.add_argument('--per-page', type=int, default=20,
+                        help='Tweets per page (default: 20)')
+
+    args = parser.parse_args()
+
+    server, url = start_stub(args.port, latency=args.latency, fail_rate=args.fail_rate,
+                             fail_status=args.fail_status, pages=args.pages, per_page=args.per_page)
+    print(f"Nitter stub serving on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
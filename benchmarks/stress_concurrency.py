@@ -0,0 +1,180 @@
+"""
+Concurrency Stress Check
+Runs the scoring pipeline and the API request path from many threads at once
+and verifies the results are identical to a single-threaded run
+
+    python benchmarks/stress_concurrency.py --threads 16 --iterations 20
+
+Exits with status 1 if any threaded result differs from the serial baseline.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Add src and backend directories to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+os.environ.setdefault('SCRAPER_BACKEND', 'sample')
+# Every thread's analysis should run, not be turned away by admission control
+os.environ.setdefault('ANALYZE_QUEUE_SIZE', '1000')
+os.environ.setdefault('ANALYZE_QUEUE_TIMEOUT', '600')
+
+from scrape_tweets import generate_sample_tweets
+from clean_and_analyze import analyze_dataframe
+from sentiment_engines import SENTIMENT_ENGINES, get_engine
+
+
+def sample_frame(topic, rows, seed):
+    """Deterministic sample tweets for a topic"""
+    random.seed(seed)
+    return generate_sample_tweets(topic, rows, verbose=False)
+
+
+def check_pipeline(engines, threads, iterations, rows):
+    """
+    Score shared input DataFrames from many threads and compare each result
+    with the serial baseline
+
+    Returns:
+        List of failure messages
+    """
+    topics = ['Artificial Intelligence', 'Climate Change', 'Cryptocurrency', 'Remote Work']
+    inputs = {topic: sample_frame(topic, rows, seed) for seed, topic in enumerate(topics)}
+    originals = {topic: df.copy() for topic, df in inputs.items()}
+
+    baselines = {
+        (topic, engine): analyze_dataframe(df, engine=engine)
+        for topic, df in inputs.items() for engine in engines
+    }
+    jobs = list(baselines) * iterations
+    random.shuffle(jobs)
+
+    failures = []
+    barrier = threading.Barrier(threads)
+
+    def run(job):
+        topic, engine = job
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        result = analyze_dataframe(inputs[topic], engine=engine)
+        try:
+            pd.testing.assert_frame_equal(result, baselines[job])
+        except AssertionError as e:
+            failures.append(f"pipeline {topic}/{engine}: {str(e).splitlines()[0]}")
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(run, jobs))
+
+    for topic, df in inputs.items():
+        if not df.equals(originals[topic]):
+            failures.append(f"pipeline {topic}: shared input DataFrame was modified")
+
+    print(f"Pipeline: {len(jobs)} concurrent runs over {len(engines)} engine(s)")
+    return failures
+
+
+def check_api(threads, iterations, max_tweets):
+    """
+    Issue concurrent /api/analyze, /api/data and /api/compare requests and
+    check every response is complete and self-consistent
+
+    Returns:
+        List of failure messages
+    """
+    import app as backend
+
+    client_local = threading.local()
+    topics = ['Artificial Intelligence', 'Climate Change', 'Cryptocurrency', 'Remote Work']
+    failures = []
+
+    def client():
+        if not hasattr(client_local, 'client'):
+            client_local.client = backend.app.test_client()
+        return client_local.client
+
+    def analyze(topic):
+        response = client().post('/api/analyze', json={'topic': topic, 'max_tweets': max_tweets})
+        body = response.get_json()
+        if response.status_code != 200:
+            failures.append(f"analyze {topic}: HTTP {response.status_code} {body}")
+        elif body['total_tweets'] != sum(body['distribution'].values()):
+            failures.append(f"analyze {topic}: distribution does not add up to total_tweets")
+
+    def read_data(_):
+        response = client().get('/api/data')
+        if response.status_code == 404:
+            return
+        snapshot = response.get_json()
+        # Sample tweets always mention their topic, so a torn snapshot shows up here
+        if not all(snapshot['topic'] in record['content'] for record in snapshot['dataframe']):
+            failures.append(f"data: snapshot for '{snapshot['topic']}' mixes rows from another topic")
+
+    def compare(_):
+        response = client().post('/api/compare', json={'topics': topics, 'max_tweets': max_tweets})
+        body = response.get_json()
+        if response.status_code != 200 or body['errors']:
+            failures.append(f"compare: HTTP {response.status_code} {body.get('errors')}")
+        elif set(body['timeline']['series']) != set(topics):
+            failures.append("compare: missing topics in the aligned timeline")
+
+    jobs = ([(analyze, topic) for topic in topics] * iterations
+            + [(read_data, None)] * (iterations * 4)
+            + [(compare, None)] * iterations)
+    random.shuffle(jobs)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda job: job[0](job[1]), jobs))
+
+    print(f"API: {len(jobs)} concurrent requests")
+    return failures
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Stress the pipeline and API from many threads')
+    parser.add_argument('--threads', type=int, default=16,
+                        help='Concurrent threads (default: 16)')
+    parser.add_argument('--iterations', type=int, default=10,
+                        help='Repetitions of every job (default: 10)')
+    parser.add_argument('--rows', type=int, default=500,
+                        help='Tweets per topic (default: 500)')
+    parser.add_argument('--engines', type=str, default=None,
+                        help=f'Comma-separated engines (default: {",".join(SENTIMENT_ENGINES)})')
+    parser.add_argument('--skip-api', action='store_true',
+                        help='Only stress the scoring pipeline')
+
+    args = parser.parse_args()
+
+    engines = []
+    for name in (args.engines.split(',') if args.engines else SENTIMENT_ENGINES):
+        try:
+            get_engine(name)
+            engines.append(name)
+        except ImportError as e:
+            print(f"⚠ Skipping {name}: {e}")
+
+    failures = check_pipeline(engines, args.threads, args.iterations, args.rows)
+    if not args.skip_api:
+        failures += check_api(args.threads, args.iterations, args.rows)
+
+    print("\n" + "="*50)
+    if failures:
+        print(f"✗ {len(failures)} inconsistent result(s) under contention:")
+        for failure in failures[:20]:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("✓ All threaded results match the single-threaded baseline")
+    print("="*50)
+
+
+if __name__ == "__main__":
+    main()
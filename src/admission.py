@@ -0,0 +1,243 @@
+"""
+Admission Control
+Bounds the work a process accepts: a cap on tweets per request, a fixed
+number of concurrent analyses with a short wait queue, and optional
+per-client token buckets. Work that doesn't fit is rejected up front with a
+Retry-After estimate instead of timing out halfway through
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# Defaults (overridable through environment variables)
+MAX_TWEETS_PER_REQUEST = int(os.environ.get('ANALYZE_MAX_TWEETS', 5000))
+# Concurrent analyses per process (scoring is CPU-bound, so keep this near the core count)
+MAX_CONCURRENT = int(os.environ.get('ANALYZE_MAX_CONCURRENT', 2))
+# Requests allowed to wait for a slot, and for how long
+MAX_QUEUE = int(os.environ.get('ANALYZE_QUEUE_SIZE', 4))
+QUEUE_TIMEOUT = float(os.environ.get('ANALYZE_QUEUE_TIMEOUT', 10))
+# Per-client budget in tweets per minute (0: no per-client limit)
+CLIENT_TWEETS_PER_MINUTE = float(os.environ.get('CLIENT_TWEETS_PER_MINUTE', 0))
+# Largest burst a client may spend at once (default: one minute of budget)
+CLIENT_BURST = float(os.environ.get('CLIENT_BURST', 0)) or None
+MAX_CLIENTS = 10000
+# Request header identifying a client (e.g. X-API-Key, or X-Forwarded-For
+# behind a proxy); unset: the remote address
+CLIENT_KEY_HEADER = os.environ.get('CLIENT_KEY_HEADER') or None
+
+# Bounds of the Retry-After estimate in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 120
+# Assumed cost per tweet until analyses have been observed
+INITIAL_SECONDS_PER_TWEET = 0.0002
+
+
+def parse_max_tweets(value, default, limit=MAX_TWEETS_PER_REQUEST):
+    """
+    Validate a requested tweet count
+
+    Raises:
+        ValueError: If it isn't a positive integer within the limit
+    """
+    if value is None:
+        value = default
+    if isinstance(value, bool):
+        raise ValueError('max_tweets must be an integer')
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('max_tweets must be an integer')
+    if value < 1:
+        raise ValueError('max_tweets must be positive')
+    if value > limit:
+        raise ValueError(f'max_tweets is limited to {limit} per request')
+    return value
+
+
+class AdmissionRejected(Exception):
+    """
+    A request the process can't take now
+
+    Attributes:
+        reason: 'queue_full', 'queue_timeout' or 'client_rate'
+        retry_after: Suggested wait in whole seconds
+    """
+
+    def __init__(self, reason, retry_after, message):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Budget refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount, now=None):
+        """
+        Spend tokens if available
+
+        Returns:
+            0 when taken, otherwise the seconds until enough tokens accumulate
+        """
+        self._refill(time.monotonic() if now is None else now)
+        # A request larger than the burst can never fit; let it through on a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def refund(self, amount):
+        """Give back tokens taken for a request that was not run"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdmissionController:
+    """
+    Concurrency slots, a bounded wait queue and per-client budgets for one process
+
+    Args:
+        max_concurrent: Analyses running at once
+        max_queue: Requests waiting for a slot (beyond that: rejected at once)
+        queue_timeout: Longest wait for a slot in seconds
+        client_rate: Per-client tweets per minute (0 or None: unlimited)
+        client_burst: Per-client bucket size in tweets (default: one minute of rate)
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT,
+                 client_rate=CLIENT_TWEETS_PER_MINUTE, client_burst=CLIENT_BURST):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_rate = (client_rate or 0) / 60.0
+        self.client_burst = client_burst or (client_rate or 0)
+
+        self.active = 0
+        self.queued = 0
+        # Tweets requested by running and waiting analyses (the work ahead of a newcomer)
+        self.active_tweets = 0
+        self.queued_tweets = 0
+        self.seconds_per_tweet = INITIAL_SECONDS_PER_TWEET
+        self.completed = 0
+
+        self._condition = threading.Condition()
+        self._buckets = OrderedDict()
+
+    def retry_after(self, extra_tweets=0):
+        """
+        Seconds until the work ahead drains at the observed throughput
+
+        The work ahead is every running and queued tweet plus extra_tweets,
+        shared across the concurrency slots.
+        """
+        with self._condition:
+            backlog = self.active_tweets + self.queued_tweets + extra_tweets
+            seconds = backlog * self.seconds_per_tweet / max(self.max_concurrent, 1)
+        return int(min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(seconds))))
+
+    def _check_client(self, client, cost):
+        """Spend a client's budget (returns its bucket, or None if not limited)"""
+        if not self.client_rate or client is None:
+            return None
+        with self._condition:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+                # Forget the least recently seen clients (a fresh bucket is full anyway)
+                while len(self._buckets) > MAX_CLIENTS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            wait = bucket.take(cost)
+        if wait:
+            raise AdmissionRejected(
+                'client_rate', int(min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(wait)))),
+                'Too many tweets requested by this client; slow down'
+            )
+        return bucket
+
+    def acquire(self, cost, client=None):
+        """
+        Take a concurrency slot, waiting in the queue if needed
+
+        Args:
+            cost: Tweets the request may process
+            client: Client key for the per-client budget (None: not limited)
+
+        Raises:
+            AdmissionRejected: When the client is over budget, the queue is
+                full or no slot frees up within queue_timeout (the client's
+                budget is refunded in the last two cases)
+        """
+        bucket = self._check_client(client, cost)
+
+        with self._condition:
+            if self.active < self.max_concurrent and not self.queued:
+                self.active += 1
+                self.active_tweets += cost
+                return
+
+            if self.queued >= self.max_queue:
+                reason = 'queue_full'
+            else:
+                self.queued += 1
+                self.queued_tweets += cost
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                finally:
+                    self.queued -= 1
+                    self.queued_tweets -= cost
+
+                if self.active < self.max_concurrent:
+                    self.active += 1
+                    self.active_tweets += cost
+                    return
+                reason = 'queue_timeout'
+
+            if bucket is not None:
+                bucket.refund(cost)
+
+        raise AdmissionRejected(reason, self.retry_after(cost), 'Server is busy; retry later')
+
+    def release(self, cost, seconds):
+        """Free a slot and fold the analysis time into the throughput estimate"""
+        with self._condition:
+            self.active -= 1
+            self.active_tweets -= cost
+            if cost > 0:
+                # Exponentially weighted, so the estimate follows load changes
+                observed = seconds / cost
+                weight = 0.2 if self.completed else 1.0
+                self.seconds_per_tweet += weight * (observed - self.seconds_per_tweet)
+            self.completed += 1
+            self._condition.notify()
+
+    def status(self):
+        """Current occupancy and throughput estimate"""
+        with self._condition:
+            return {
+                'active': self.active,
+                'queued': self.queued,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'seconds_per_tweet': self.seconds_per_tweet,
+            }
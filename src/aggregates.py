@@ -0,0 +1,99 @@
+"""
+Analysis Aggregation
+Folds scored tweet chunks into the summary returned by /api/analyze, so the
+same response can be built from one DataFrame or from a stream of chunks
+"""
+
+from sketches import ScoreSummary
+from heavy_hitters import EntityTracker
+from timeline import TimelineCounts, DEFAULT_MAX_POINTS
+
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+
+class AnalysisAggregator:
+    """
+    Incremental aggregates for an analysis: score sketch, entity heavy
+    hitters and per-minute sentiment counts (for the timeline)
+    """
+
+    def __init__(self):
+        self.summary = ScoreSummary()
+        self.entities = EntityTracker()
+        self.timeline_counts = TimelineCounts()
+
+    def update(self, df):
+        """
+        Fold a chunk of scored tweets into the aggregates
+
+        Args:
+            df: DataFrame with sentiment_compound and sentiment columns
+                (date, username, hashtags, mentions are used when present)
+        """
+        if df.empty:
+            return self
+
+        self.summary.update(df['sentiment_compound'], df['sentiment'])
+        self.entities.update(df)
+
+        if 'date' in df.columns:
+            try:
+                self.timeline_counts.update(df['date'], df['sentiment'])
+            except Exception as e:
+                print(f"Warning: Could not generate timeline data: {e}")
+
+        return self
+
+    def timeline(self, granularity='auto', max_points=DEFAULT_MAX_POINTS):
+        """
+        Sentiment counts over time
+
+        Args:
+            granularity: 'minute', 'hour', 'day', 'week' or 'auto' (from the data span)
+            max_points: Downsample longer series to this many points (None: never)
+
+        Returns:
+            Dictionary with 'granularity', 'downsampled' and 'points' (list of
+            {'date', 'positive', 'negative', 'neutral'} dictionaries)
+        """
+        return self.timeline_counts.series(granularity, max_points)
+
+    def response(self, topic, engine, granularity='auto', max_points=DEFAULT_MAX_POINTS):
+        """
+        Build the /api/analyze response body
+
+        Args:
+            topic: Topic (or dataset name) analyzed
+            engine: Sentiment engine used
+            granularity, max_points: Timeline options (see timeline())
+
+        Returns:
+            Dictionary in the /api/analyze response shape
+        """
+        score_report = self.summary.report()
+        sentiment_counts = self.summary.counts
+        total_tweets = self.summary.total
+
+        timeline = self.timeline(granularity, max_points)
+
+        def percentage(label):
+            return round((sentiment_counts.get(label, 0) / total_tweets) * 100, 1) if total_tweets else 0.0
+
+        return {
+            'topic': topic,
+            'engine': engine,
+            'total_tweets': total_tweets,
+            'sentiment_summary': {
+                'average_score': score_report['average_score'],
+                'median_score': score_report['median_score'],
+                'std_score': score_report['std_score'],
+                'percentiles': score_report['percentiles'],
+            },
+            'distribution': {label: sentiment_counts.get(label, 0) for label in SENTIMENTS},
+            'percentages': {label: percentage(label) for label in SENTIMENTS},
+            'top_entities': self.entities.report(),
+            'timeline_data': timeline['points'],
+            'timeline_granularity': timeline['granularity'],
+            'timeline_downsampled': timeline['downsampled']
+        }
@@ -0,0 +1,345 @@
+"""
+Analytics Store
+Embedded SQLite store that persists every scored tweet with its topic and run,
+and answers historical trend queries from pre-aggregated hourly rollups
+"""
+
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+
+DEFAULT_DB_PATH = os.environ.get(
+    'ANALYTICS_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'analytics.db')
+)
+
+GRANULARITIES = {
+    'hour': "hour",
+    'day': "substr(hour, 1, 10)",
+    'week': "date(hour, 'weekday 0', '-6 days')",
+    'month': "substr(hour, 1, 7)",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    source TEXT,
+    engine TEXT,
+    created_at TEXT NOT NULL,
+    total_tweets INTEGER DEFAULT 0
+);
+
+-- Keyed by (topic, id): the same tweet can belong to several topics
+CREATE TABLE IF NOT EXISTS tweets (
+    id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    date TEXT,
+    username TEXT,
+    content TEXT,
+    cleaned_text TEXT,
+    like_count INTEGER,
+    retweet_count INTEGER,
+    sentiment_compound REAL,
+    sentiment TEXT,
+    PRIMARY KEY (topic, id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tweets_id ON tweets (id);
+CREATE INDEX IF NOT EXISTS idx_tweets_topic_date ON tweets (topic, date);
+CREATE INDEX IF NOT EXISTS idx_tweets_run ON tweets (run_id);
+
+CREATE TABLE IF NOT EXISTS hourly_rollups (
+    topic TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    tweet_count INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    positive INTEGER NOT NULL DEFAULT 0,
+    negative INTEGER NOT NULL DEFAULT 0,
+    neutral INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (topic, hour)
+);
+
+-- Rollups are maintained by triggers so upserts never double count.
+-- (INSERT OR IGNORE would be overridden by the upsert's conflict handling.)
+CREATE TRIGGER IF NOT EXISTS tweets_rollup_insert AFTER INSERT ON tweets
+WHEN NEW.date IS NOT NULL
+BEGIN
+    INSERT INTO hourly_rollups (topic, hour)
+        SELECT NEW.topic, substr(NEW.date, 1, 13) || ':00:00'
+        WHERE NOT EXISTS (SELECT 1 FROM hourly_rollups
+                          WHERE topic = NEW.topic AND hour = substr(NEW.date, 1, 13) || ':00:00');
+    UPDATE hourly_rollups SET
+        tweet_count = tweet_count + 1,
+        score_sum = score_sum + NEW.sentiment_compound,
+        positive = positive + (NEW.sentiment = 'positive'),
+        negative = negative + (NEW.sentiment = 'negative'),
+        neutral = neutral + (NEW.sentiment = 'neutral')
+    WHERE topic = NEW.topic AND hour = substr(NEW.date, 1, 13) || ':00:00';
+END;
+
+-- The topic is part of the key and never updated, so a tweet only moves
+-- between hours of its own topic's rollups
+CREATE TRIGGER IF NOT EXISTS tweets_rollup_update
+AFTER UPDATE OF date, sentiment_compound, sentiment ON tweets
+BEGIN
+    UPDATE hourly_rollups SET
+        tweet_count = tweet_count - 1,
+        score_sum = score_sum - OLD.sentiment_compound,
+        positive = positive - (OLD.sentiment = 'positive'),
+        negative = negative - (OLD.sentiment = 'negative'),
+        neutral = neutral - (OLD.sentiment = 'neutral')
+    WHERE OLD.date IS NOT NULL AND topic = OLD.topic AND hour = substr(OLD.date, 1, 13) || ':00:00';
+    INSERT INTO hourly_rollups (topic, hour)
+        SELECT NEW.topic, substr(NEW.date, 1, 13) || ':00:00'
+        WHERE NEW.date IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM hourly_rollups
+            WHERE topic = NEW.topic AND hour = substr(NEW.date, 1, 13) || ':00:00');
+    UPDATE hourly_rollups SET
+        tweet_count = tweet_count + 1,
+        score_sum = score_sum + NEW.sentiment_compound,
+        positive = positive + (NEW.sentiment = 'positive'),
+        negative = negative + (NEW.sentiment = 'negative'),
+        neutral = neutral + (NEW.sentiment = 'neutral')
+    WHERE NEW.date IS NOT NULL AND topic = NEW.topic AND hour = substr(NEW.date, 1, 13) || ':00:00';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tweets_rollup_delete AFTER DELETE ON tweets
+WHEN OLD.date IS NOT NULL
+BEGIN
+    UPDATE hourly_rollups SET
+        tweet_count = tweet_count - 1,
+        score_sum = score_sum - OLD.sentiment_compound,
+        positive = positive - (OLD.sentiment = 'positive'),
+        negative = negative - (OLD.sentiment = 'negative'),
+        neutral = neutral - (OLD.sentiment = 'neutral')
+    WHERE topic = OLD.topic AND hour = substr(OLD.date, 1, 13) || ':00:00';
+END;
+"""
+
+UPSERT_TWEET = """
+INSERT INTO tweets (id, run_id, topic, date, username, content, cleaned_text,
+                    like_count, retweet_count, sentiment_compound, sentiment)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(topic, id) DO UPDATE SET
+    run_id = excluded.run_id,
+    date = excluded.date,
+    username = excluded.username,
+    content = excluded.content,
+    cleaned_text = excluded.cleaned_text,
+    like_count = excluded.like_count,
+    retweet_count = excluded.retweet_count,
+    sentiment_compound = excluded.sentiment_compound,
+    sentiment = excluded.sentiment
+"""
+
+
+def normalize_topic(topic):
+    """Topics are stored case- and whitespace-insensitively"""
+    return ' '.join(str(topic).lower().split())
+
+
+def _format_dates(dates):
+    """Convert a date column to 'YYYY-MM-DD HH:MM:SS' strings (aware timestamps in UTC)"""
+    parsed = pd.to_datetime(dates, errors='coerce', utc=True, format='mixed').dt.tz_localize(None)
+    formatted = parsed.dt.strftime('%Y-%m-%d %H:%M:%S')
+    return formatted.where(parsed.notna(), None)
+
+
+class AnalyticsStore:
+    """
+    SQLite-backed store of scored tweets, runs and hourly rollups
+
+    A short-lived connection is opened per operation, so one store object
+    can be shared across threads; WAL mode lets gunicorn workers read while
+    another writes.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction (committed on success)"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start_run(self, topic, source='analyze', engine=None):
+        """
+        Register a new run
+
+        Returns:
+            New run id
+        """
+        run_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, topic, source, engine, created_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, normalize_topic(topic), source, engine, datetime.now().isoformat())
+            )
+        return run_id
+
+    def add_tweets(self, run_id, topic, df):
+        """
+        Upsert a chunk of scored tweets for a run (rollups update via triggers)
+
+        Args:
+            run_id: Run id from start_run
+            topic: Topic the tweets belong to
+            df: Scored DataFrame (id, date, content, sentiment columns)
+
+        Returns:
+            Number of rows written
+        """
+        if df.empty:
+            return 0
+
+        n = len(df)
+        topic = normalize_topic(topic)
+
+        def column(name, default=None):
+            return df[name].tolist() if name in df.columns else [default] * n
+
+        ids = df['id'].astype(str).tolist() if 'id' in df.columns else [uuid.uuid4().hex for _ in range(n)]
+        dates = _format_dates(df['date']).tolist() if 'date' in df.columns else [None] * n
+        likes = pd.to_numeric(df['like_count'], errors='coerce').fillna(0).astype(int).tolist() \
+            if 'like_count' in df.columns else [0] * n
+        retweets = pd.to_numeric(df['retweet_count'], errors='coerce').fillna(0).astype(int).tolist() \
+            if 'retweet_count' in df.columns else [0] * n
+
+        rows = zip(ids, [run_id] * n, [topic] * n, dates, column('username'), column('content'),
+                   column('cleaned_text'), likes, retweets,
+                   df['sentiment_compound'].astype(float).tolist(), column('sentiment'))
+
+        with self._connect() as conn:
+            conn.executemany(UPSERT_TWEET, rows)
+            conn.execute("UPDATE runs SET total_tweets = total_tweets + ? WHERE run_id = ?", (n, run_id))
+        return n
+
+    def record_run(self, topic, df, source='analyze', engine=None):
+        """
+        Persist a complete analysis as one run
+
+        Returns:
+            Run id
+        """
+        run_id = self.start_run(topic, source=source, engine=engine)
+        self.add_tweets(run_id, topic, df)
+        return run_id
+
+    def delete_run(self, run_id):
+        """
+        Remove a run and the tweets it wrote (rollups update via triggers)
+
+        Used to undo a run that failed part way. Tweets an earlier run had
+        stored and this one upserted are removed too.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tweets WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def history(self, topic, start=None, end=None, granularity='day'):
+        """
+        Sentiment trend for a topic, answered from the hourly rollups
+
+        Args:
+            topic: Topic name
+            start: Inclusive start date/time (ISO string, optional)
+            end: Inclusive end date/time (ISO string, optional)
+            granularity: 'hour', 'day', 'week' or 'month'
+
+        Returns:
+            List of {'period', 'total', 'positive', 'negative', 'neutral',
+            'average_score'} dictionaries in time order
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}. "
+                             f"Choose from: {', '.join(GRANULARITIES)}")
+
+        query = f"""
+            SELECT {GRANULARITIES[granularity]} AS period,
+                   SUM(tweet_count) AS total, SUM(score_sum) AS score_sum,
+                   SUM(positive) AS positive, SUM(negative) AS negative, SUM(neutral) AS neutral
+            FROM hourly_rollups
+            WHERE topic = ? AND tweet_count > 0
+        """
+        params = [normalize_topic(topic)]
+        if start:
+            query += " AND hour >= ?"
+            params.append(pd.Timestamp(start).floor('h').strftime('%Y-%m-%d %H:%M:%S'))
+        if end:
+            query += " AND hour <= ?"
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d %H:%M:%S')
+                          if len(str(end)) > 10 else f"{end} 23:59:59")
+        query += " GROUP BY period ORDER BY period"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        return [
+            {
+                'period': row['period'],
+                'total': row['total'],
+                'positive': row['positive'],
+                'negative': row['negative'],
+                'neutral': row['neutral'],
+                'average_score': row['score_sum'] / row['total'] if row['total'] else 0.0,
+            }
+            for row in rows
+        ]
+
+    def runs(self, topic=None, limit=50):
+        """
+        Most recent runs, optionally for one topic
+
+        Returns:
+            List of run dictionaries
+        """
+        query = "SELECT * FROM runs"
+        params = []
+        if topic:
+            query += " WHERE topic = ?"
+            params.append(normalize_topic(topic))
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(int(limit))
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def tweets(self, topic, start=None, end=None, limit=1000):
+        """
+        Stored tweets for a topic in a date range (uses the (topic, date) index)
+
+        Returns:
+            DataFrame of stored tweets, newest first
+        """
+        query = "SELECT * FROM tweets WHERE topic = ?"
+        params = [normalize_topic(topic)]
+        if start:
+            query += " AND date >= ?"
+            params.append(str(start))
+        if end:
+            query += " AND date <= ?"
+            params.append(str(end) if len(str(end)) > 10 else f"{end} 23:59:59")
+        query += " ORDER BY date DESC LIMIT ?"
+        params.append(int(limit))
+
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
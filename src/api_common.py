@@ -0,0 +1,225 @@
+"""
+API Common
+Request validation and static payloads shared by the Flask (app.py) and ASGI
+(asgi_app.py) backends, so both serve the same routes with the same errors
+"""
+
+import io
+import os
+
+from timeline import GRANULARITIES as TIMELINE_GRANULARITIES, DEFAULT_MAX_POINTS as TIMELINE_MAX_POINTS
+from sampling import DEFAULT_CONFIDENCE as SAMPLE_CONFIDENCE, SAMPLE_MAX_TWEETS
+from sentiment_engines import SENTIMENT_ENGINES, DEFAULT_ENGINE
+from admission import parse_max_tweets, MAX_TWEETS_PER_REQUEST
+from topic_compare import MAX_TOPICS as COMPARE_MAX_TOPICS
+
+
+# Limits for the bulk scoring endpoint
+SCORE_MAX_BYTES = int(os.environ.get('SCORE_MAX_BYTES', 32 * 1024 * 1024))
+SCORE_MAX_ITEMS = int(os.environ.get('SCORE_MAX_ITEMS', 500000))
+SCORE_BATCH_SIZE = int(os.environ.get('SCORE_BATCH_SIZE', 2000))
+
+# Limits for dataset uploads
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 1024 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 20000))
+
+API_ENDPOINTS = {
+    'health': '/api/health',
+    'metrics': '/api/metrics (Prometheus text format)',
+    'analyze': '/api/analyze (POST)',
+    'compare': '/api/compare (POST)',
+    'score': '/api/score (POST)',
+    'upload': '/api/upload (POST)',
+    'data': '/api/data',
+    'search': '/api/search?q=<words or "phrase">',
+    'topics': '/api/topics',
+    'history': '/api/history/<topic>',
+    'runs': '/api/runs',
+    'stream': '/api/stream/<topic> (Server-Sent Events)'
+}
+
+SAMPLE_TOPICS = [
+    {"name": "Artificial Intelligence", "icon": "🤖"},
+    {"name": "Climate Change", "icon": "🌍"},
+    {"name": "Cryptocurrency", "icon": "💰"},
+    {"name": "Electric Vehicles", "icon": "🚗"},
+    {"name": "Space Exploration", "icon": "🚀"},
+    {"name": "Mental Health", "icon": "🧠"},
+    {"name": "Remote Work", "icon": "💼"},
+    {"name": "Education", "icon": "📚"}
+]
+
+
+class BodyTooLarge(Exception):
+    """A request body went over its size limit (413)"""
+
+
+class LimitedBody(io.RawIOBase):
+    """
+    File-like view of a request body that fails past a size limit
+
+    Content-Length is checked before reading, but a chunked body has none,
+    so the limit is also enforced on the bytes actually read.
+
+    Raises:
+        BodyTooLarge: From read() once more than limit bytes arrive
+    """
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        # Ask for at most one byte past the limit, so going over is detected
+        # without reading the rest of an oversized body
+        data = self.stream.read(min(len(buffer), self.limit + 1 - self.bytes_read))
+        self.bytes_read += len(data)
+        if self.bytes_read > self.limit:
+            raise BodyTooLarge(f"Request body exceeds {self.limit} bytes")
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def unknown_engine_message(engine):
+    return f"Unknown engine '{engine}'. Choose from: {', '.join(SENTIMENT_ENGINES)}"
+
+
+def parse_engine(engine):
+    """
+    Validate a sentiment engine name from a request
+
+    Raises:
+        ValueError: If it isn't the name of a registered engine (e.g. a JSON list),
+            or the engine's library isn't installed on this server
+    """
+    if not isinstance(engine, str) or engine not in SENTIMENT_ENGINES:
+        raise ValueError(unknown_engine_message(engine))
+    if not SENTIMENT_ENGINES[engine].available():
+        raise ValueError(f"The {engine} engine needs {engine} installed on the server")
+    return engine
+
+
+def parse_timeline_options(options):
+    """
+    Read timeline_granularity / timeline_points from request options
+
+    Returns:
+        (granularity, max_points) tuple
+
+    Raises:
+        ValueError: On an unknown granularity or a point count below 3
+    """
+    granularity = options.get('timeline_granularity') or 'auto'
+    if granularity != 'auto' and granularity not in TIMELINE_GRANULARITIES:
+        raise ValueError(f"Unknown timeline_granularity '{granularity}'. "
+                         f"Choose from: auto, {', '.join(TIMELINE_GRANULARITIES)}")
+    try:
+        max_points = int(options.get('timeline_points') or TIMELINE_MAX_POINTS)
+    except (TypeError, ValueError):
+        raise ValueError('timeline_points must be an integer')
+    if max_points < 3:
+        raise ValueError('timeline_points must be at least 3')
+    return granularity, max_points
+
+
+def parse_sampling_options(options):
+    """
+    Read the "sample" option of /api/analyze: true for defaults, or
+    {"margin_of_error": 0.05, "confidence": 0.95, "sample_size": 1000}
+
+    Returns:
+        Dictionary of analyze_sampled arguments, or None for a full analysis
+
+    Raises:
+        ValueError: On out-of-range values
+    """
+    sample = options.get('sample')
+    if not sample:
+        return None
+    sample = sample if isinstance(sample, dict) else {}
+
+    try:
+        margin = sample.get('margin_of_error')
+        margin = float(margin) if margin is not None else None
+        confidence = float(sample.get('confidence', SAMPLE_CONFIDENCE))
+        sample_size = sample.get('sample_size')
+        sample_size = int(sample_size) if sample_size is not None else None
+    except (TypeError, ValueError):
+        raise ValueError('sample options must be numbers')
+
+    if margin is not None and not 0 < margin <= 0.5:
+        raise ValueError('margin_of_error must be between 0 and 0.5')
+    if not 0 < confidence < 1:
+        raise ValueError('confidence must be between 0 and 1')
+    if sample_size is not None and sample_size < 1:
+        raise ValueError('sample_size must be positive')
+    return {'margin_of_error': margin, 'confidence': confidence, 'sample_size': sample_size}
+
+
+def parse_analyze_options(data):
+    """
+    Validate an /api/analyze request body
+
+    Returns:
+        Dictionary with topic, max_tweets, engine, dedupe, near_threshold,
+        granularity, max_points and sampling (None for a full analysis)
+
+    Raises:
+        ValueError: With the message for a 400 response
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    topic = data.get('topic', '')
+    sampling = parse_sampling_options(data)
+    max_tweets = parse_max_tweets(data.get('max_tweets'),
+                                  min(SAMPLE_MAX_TWEETS, MAX_TWEETS_PER_REQUEST) if sampling else 500)
+    dedupe = bool(data.get('dedupe', False))
+    near_threshold = data.get('near_dup_threshold')
+    if near_threshold is not None:
+        try:
+            near_threshold = float(near_threshold)
+        except (TypeError, ValueError):
+            raise ValueError('near_dup_threshold must be a number')
+        # Jaccard similarity: above 1 nothing would ever match
+        if not 0 < near_threshold <= 1:
+            raise ValueError('near_dup_threshold must be greater than 0 and at most 1')
+
+    if not topic:
+        raise ValueError('Topic is required')
+    engine = parse_engine(data.get('engine', DEFAULT_ENGINE))
+
+    granularity, max_points = parse_timeline_options(data)
+
+    if sampling and (dedupe or near_threshold is not None):
+        raise ValueError('sample cannot be combined with dedupe')
+
+    return {'topic': topic, 'max_tweets': max_tweets, 'engine': engine, 'dedupe': dedupe,
+            'near_threshold': near_threshold, 'granularity': granularity, 'max_points': max_points,
+            'sampling': sampling}
+
+
+def parse_compare_options(data):
+    """
+    Validate an /api/compare request body
+
+    Returns:
+        (topics, max_tweets, engine) tuple
+
+    Raises:
+        ValueError: With the message for a 400 response
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    topics = data.get('topics')
+    max_tweets = parse_max_tweets(data.get('max_tweets'), 500)
+
+    if not isinstance(topics, list) or not topics or not all(isinstance(t, str) and t.strip() for t in topics):
+        raise ValueError('topics must be a non-empty list of topic names')
+    if len(topics) > COMPARE_MAX_TOPICS:
+        raise ValueError(f'Too many topics (limit {COMPARE_MAX_TOPICS})')
+    engine = parse_engine(data.get('engine', DEFAULT_ENGINE))
+    return topics, max_tweets, engine
@@ -0,0 +1,299 @@
+"""
+Async Analysis
+Event-loop side of the ASGI backend: scrapes are awaited concurrently on the
+loop, while cleaning, scoring and aggregation run in a process pool, so
+CPU-bound work never stalls the requests that are waiting on I/O
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+
+from scrape_tweets import scrape_tweets_async, iter_tweet_batches_async
+from clean_and_analyze import analyze_dataframe
+from bulk_scoring import score_record_batch
+from sampling import SampledAnalysis, SAMPLE_BATCH_SIZE
+from aggregates import AnalysisAggregator
+from dedup import duplication_summary
+from sentiment_engines import DEFAULT_ENGINE, get_engine
+from topic_compare import TopicResultCache, TIMELINE_GRANULARITY, compare_response
+from instrumentation import StageTimer, activate, deactivate, current_timer, stage
+from metrics import TWEETS_SCORED, CACHE_REQUESTS
+
+
+# Defaults (overridable through environment variables)
+SCORING_PROCESSES = int(os.environ.get('ASYNC_SCORING_PROCESSES', os.cpu_count() or 1))
+
+
+def _init_scoring_process():
+    """Load the default engine once per pool process, not on its first request"""
+    get_engine(DEFAULT_ENGINE)
+
+
+def score_and_aggregate(df, topic, engine=DEFAULT_ENGINE, dedupe=False, near_threshold=None,
+                        granularity='auto', max_points=None):
+    """
+    Clean, score and aggregate raw tweets (runs in a pool process)
+
+    Returns:
+        ((response dictionary, scored DataFrame), {stage: seconds}) tuple; the
+        stage timings are merged into the request's timer by the caller
+    """
+    timer = StageTimer()
+    token = activate(timer)
+    try:
+        df = analyze_dataframe(df, dedupe=dedupe, near_threshold=near_threshold, engine=engine)
+        with stage('aggregate'):
+            response = AnalysisAggregator().update(df).response(topic, engine, granularity, max_points)
+            if 'dup_group' in df.columns:
+                response['deduplication'] = duplication_summary(df)
+    finally:
+        deactivate(token)
+    return (response, df), timer.stages
+
+
+def score_batch(df, engine=DEFAULT_ENGINE):
+    """
+    Clean and score raw tweets without aggregating (runs in a pool process)
+
+    Returns:
+        (scored DataFrame, {stage: seconds}) tuple
+    """
+    timer = StageTimer()
+    token = activate(timer)
+    try:
+        df = analyze_dataframe(df, engine=engine)
+    finally:
+        deactivate(token)
+    return df, timer.stages
+
+
+def score_text_batch(batch, engine=DEFAULT_ENGINE):
+    """
+    Score one batch of bulk (id, text) pairs (runs in a pool process)
+
+    Results are JSON-encoded here too, so the event loop only joins them.
+
+    Returns:
+        (JSON-encoded result dictionaries, {stage: seconds}) tuple
+    """
+    timer = StageTimer()
+    token = activate(timer)
+    try:
+        with stage('score'):
+            results = [json.dumps(result) for result in score_record_batch(batch, engine)]
+    finally:
+        deactivate(token)
+    return results, timer.stages
+
+
+def _merge_pool_stages(stages, started):
+    """Add a pool call's stage timings and its 'pool_wait' to the current request's timer"""
+    timer = current_timer()
+    if timer is not None:
+        for name, seconds in stages.items():
+            timer.stages[name] = timer.stages.get(name, 0.0) + seconds
+        timer.stages['pool_wait'] = (timer.stages.get('pool_wait', 0.0) + time.perf_counter() - started
+                                     - sum(stages.values()))
+
+
+class AsyncAnalyzer:
+    """
+    Scrape on the event loop, score in a process pool
+
+    Args:
+        processes: Scoring processes (default: ASYNC_SCORING_PROCESSES)
+        cache: TopicResultCache shared by /api/analyze and /api/compare
+    """
+
+    def __init__(self, processes=SCORING_PROCESSES, cache=None):
+        self.processes = processes
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        self.executor = ProcessPoolExecutor(max_workers=processes, mp_context=get_context('spawn'),
+                                            initializer=_init_scoring_process)
+        self.cache = cache or TopicResultCache()
+        self._pending = {}
+
+    async def _in_pool(self, function, *args):
+        """
+        Run a pool function that returns (result, {stage: seconds})
+
+        The pool process's stage timings are added to the current request's
+        timer, plus 'pool_wait' for time spent queued for a process and
+        moving data to and from it.
+
+        Returns:
+            The function's result
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        result, stages = await loop.run_in_executor(self.executor, partial(function, *args))
+        _merge_pool_stages(stages, started)
+        return result
+
+    def _in_pool_blocking(self, function, *args):
+        """_in_pool for code on a worker thread: blocks that thread, not the loop"""
+        started = time.perf_counter()
+        result, stages = self.executor.submit(function, *args).result()
+        _merge_pool_stages(stages, started)
+        return result
+
+    async def score(self, df, topic, engine=DEFAULT_ENGINE, dedupe=False, near_threshold=None,
+                    granularity='auto', max_points=None):
+        """
+        Score and aggregate a DataFrame in the pool
+
+        Returns:
+            (response dictionary, scored DataFrame) tuple
+        """
+        response, scored = await self._in_pool(score_and_aggregate, df, topic, engine, dedupe,
+                                                near_threshold, granularity, max_points)
+        # Pool processes don't report metrics; count the tweets here
+        TWEETS_SCORED.inc(len(scored), engine=engine)
+        return response, scored
+
+    async def score_texts(self, batch, engine=DEFAULT_ENGINE):
+        """
+        Score one batch of bulk (id, text) pairs in the pool
+
+        Returns:
+            List of JSON-encoded result dictionaries in input order
+        """
+        return await self._in_pool(score_text_batch, batch, engine)
+
+    def score_chunk(self, df, engine=DEFAULT_ENGINE):
+        """
+        Clean and score a DataFrame in the pool, from a worker thread
+
+        For pipelines that run on a thread (uploads), so their scoring
+        leaves the event loop's process like every other analysis.
+
+        Returns:
+            Scored DataFrame
+        """
+        scored = self._in_pool_blocking(score_batch, df, engine)
+        TWEETS_SCORED.inc(len(scored), engine=engine)
+        return scored
+
+    async def analyze_sampled(self, topic, max_tweets=500, engine=DEFAULT_ENGINE,
+                              batch_size=SAMPLE_BATCH_SIZE, **sampling):
+        """
+        sampling.analyze_sampled for the event loop
+
+        Batches are scraped on the loop and only the tweets entering the
+        reservoir are cleaned and scored, one pool call per batch; scraping
+        stops as soon as the margin of error is reached.
+
+        Args:
+            sampling: SampledAnalysis arguments (sample_size, margin_of_error, ...)
+
+        Returns:
+            (scored sample DataFrame, sampling info dictionary)
+        """
+        sampler = SampledAnalysis(**sampling)
+        batches = iter_tweet_batches_async(topic, max_tweets=max_tweets, batch_size=batch_size)
+        try:
+            while True:
+                try:
+                    with stage('scrape'):
+                        batch = await batches.__anext__()
+                except StopAsyncIteration:
+                    break
+                if batch.empty:
+                    continue
+                entering, rows = sampler.offer(batch)
+                scored = None
+                if entering:
+                    scored = await self._in_pool(score_batch, rows, engine)
+                    TWEETS_SCORED.inc(len(scored), engine=engine)
+                if sampler.add(batch, entering, scored):
+                    break
+        finally:
+            await batches.aclose()
+        return sampler.result()
+
+    async def analyze(self, topic, max_tweets=500, engine=DEFAULT_ENGINE, dedupe=False, near_threshold=None,
+                      granularity='auto', max_points=None):
+        """
+        Scrape and score one topic
+
+        Returns:
+            (response dictionary, scored DataFrame) tuple, or (None, None) if no tweets were found
+        """
+        with stage('scrape'):
+            df = await scrape_tweets_async(topic, max_tweets=max_tweets)
+        if df.empty:
+            return None, None
+        return await self.score(df, topic, engine, dedupe, near_threshold, granularity, max_points)
+
+    async def topic_result(self, topic, max_tweets=500, engine=DEFAULT_ENGINE, on_scored=None):
+        """
+        One topic's /api/compare result, from the cache when fresh
+
+        Concurrent requests for the same key await one computation, as in
+        TopicResultCache.get_or_compute.
+
+        Args:
+            on_scored: Coroutine function receiving (topic, scored DataFrame) for fresh results
+
+        Returns:
+            (result, cached) tuple
+        """
+        key = self.cache.key(topic, max_tweets, engine)
+        result = self.cache.get(key)
+        if result is not None:
+            return result, True
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            result = await asyncio.shield(pending)
+            if result is not None:
+                return result, True
+            # The first computation failed: compute it here instead
+            return await self._compute(topic, max_tweets, engine, on_scored), False
+
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._compute(topic, max_tweets, engine, on_scored)
+            self.cache.put(key, result)
+            return result, False
+        finally:
+            del self._pending[key]
+            future.set_result(self.cache.get(key))
+
+    async def _compute(self, topic, max_tweets, engine, on_scored):
+        response, df = await self.analyze(topic, max_tweets, engine, granularity=TIMELINE_GRANULARITY)
+        if response is not None and on_scored:
+            await on_scored(topic, df)
+        return response
+
+    async def compare(self, topics, max_tweets=500, engine=DEFAULT_ENGINE, on_scored=None):
+        """
+        Analyze several topics concurrently (same response as TopicComparator.compare)
+
+        Every topic's scrape is in flight at once; scoring shares the pool.
+        """
+        topics = list(dict.fromkeys(topics))
+        started = time.time()
+
+        async def timed(topic):
+            topic_started = time.time()
+            result, cached = await self.topic_result(topic, max_tweets, engine, on_scored)
+            CACHE_REQUESTS.inc(cache='compare', result='hit' if cached else 'miss')
+            return result, cached, time.time() - topic_started
+
+        outcomes = await asyncio.gather(*(timed(topic) for topic in topics), return_exceptions=True)
+        return compare_response(topics, engine, dict(zip(topics, outcomes)), time.time() - started)
+
+    async def warm_up(self):
+        """Start every pool process now rather than on the first requests"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _init_scoring_process)
+                               for _ in range(self.processes)))
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+"""
+Bulk Text Scoring
+Parses large JSON / NDJSON bodies of raw texts and scores them in batches
+through the shared sentiment engine, yielding results as they are ready
+"""
+
+import json
+
+from clean_and_analyze import clean_text
+from sentiment_engines import DEFAULT_ENGINE, get_engine
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class BulkInputError(ValueError):
+    """Raised when a bulk scoring body cannot be parsed or is too large"""
+
+
+def _record(item, position):
+    """Normalize one input item to an (id, text) pair"""
+    if isinstance(item, str):
+        return position, item
+    if isinstance(item, dict) and isinstance(item.get('text'), str):
+        return item.get('id', position), item['text']
+    raise BulkInputError(f"Item {position}: expected a string or an object with a 'text' field")
+
+
+def parse_json_array(body, max_items):
+    """
+    Parse a JSON array of texts (strings or {"id", "text"} objects)
+
+    Args:
+        body: Request body bytes
+        max_items: Maximum number of items accepted
+
+    Returns:
+        List of (id, text) pairs
+    """
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise BulkInputError(f"Invalid JSON: {e}")
+
+    if isinstance(items, dict) and 'texts' in items:
+        items = items['texts']
+    if not isinstance(items, list):
+        raise BulkInputError("Expected a JSON array of texts")
+    if len(items) > max_items:
+        raise BulkInputError(f"Too many texts: {len(items)} (limit {max_items})")
+
+    return [_record(item, i) for i, item in enumerate(items)]
+
+
+def iter_ndjson(stream, max_items, max_bytes):
+    """
+    Parse newline-delimited JSON incrementally from a file-like stream
+
+    Each line is a JSON string or {"id", "text"} object. Blank lines are
+    skipped. Lines that fail to parse yield an error record instead of
+    aborting the whole request.
+
+    Args:
+        stream: Binary file-like object (e.g. request.stream)
+        max_items: Maximum number of items accepted
+        max_bytes: Maximum number of bytes read
+
+    Yields:
+        (id, text) pairs, or (id, BulkInputError) for bad lines
+    """
+    bytes_read = 0
+    count = 0
+    # readline is capped too, so one endless line can't be read into memory
+    lines = iter(lambda: stream.readline(max_bytes + 1 - bytes_read), b'')
+    for line_number, line in enumerate(lines):
+        bytes_read += len(line)
+        if bytes_read > max_bytes:
+            yield line_number, BulkInputError(f"Body exceeds {max_bytes} bytes; stopped reading")
+            return
+
+        line = line.strip()
+        if not line:
+            continue
+
+        count += 1
+        if count > max_items:
+            yield line_number, BulkInputError(f"Too many texts (limit {max_items}); stopped reading")
+            return
+
+        try:
+            yield _record(json.loads(line), line_number)
+        except (ValueError, BulkInputError) as e:
+            yield line_number, BulkInputError(f"Line {line_number}: {e}")
+
+
+def batched_records(records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Group (id, text) pairs into lists of up to batch_size
+
+    Yields:
+        Lists of (id, text) pairs
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def score_record_batch(batch, engine=DEFAULT_ENGINE):
+    """
+    Clean and score one batch of (id, text) pairs
+
+    Identical cleaned texts within the batch are scored once.
+
+    Args:
+        batch: List of (id, text) pairs (text may be a BulkInputError)
+        engine: Sentiment engine name
+
+    Returns:
+        List of result dictionaries in input order
+    """
+    cleaned = [None if isinstance(text, Exception) else clean_text(text) for _, text in batch]
+    unique_texts = list(dict.fromkeys(text for text in cleaned if text is not None))
+    scores = dict(zip(unique_texts, get_engine(engine).score_batch(unique_texts)))
+
+    return [
+        {'id': record_id, 'error': str(text)} if cleaned_text is None else {'id': record_id, **scores[cleaned_text]}
+        for (record_id, text), cleaned_text in zip(batch, cleaned)
+    ]
+
+
+def score_records(records, engine=DEFAULT_ENGINE, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Clean and score (id, text) pairs in batches
+
+    Args:
+        records: Iterable of (id, text) pairs (text may be a BulkInputError)
+        engine: Sentiment engine name
+        batch_size: Texts per scoring batch
+
+    Yields:
+        Result dictionaries in input order
+    """
+    for batch in batched_records(records, batch_size):
+        yield from score_record_batch(batch, engine)
@@ -8,8 +8,17 @@ import re
 import string
 import argparse
 import os
+import threading
+from contextlib import nullcontext
 import nltk
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from sentiment_engines import SENTIMENT_ENGINES, DEFAULT_ENGINE, get_engine
+from dedup import mark_duplicates, representatives, duplication_summary
+from sketches import ScoreSummary
+from heavy_hitters import EntityTracker
+from analytics_store import AnalyticsStore, DEFAULT_DB_PATH
+from instrumentation import stage, timed_iter, instrumented_run, PROFILE_DIR
+from metrics import TWEETS_SCORED
 
 
 # Download required NLTK data
@@ -28,12 +37,26 @@ def download_nltk_data():
         nltk.download('punkt', quiet=True)
 
 
-def clean_text(text):
+# Precompiled cleaning patterns (shared by every call to clean_text)
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+MENTION_PATTERN = re.compile(r'@\w+')
+HASHTAG_PATTERN = re.compile(r'#')
+NON_ALPHA_PATTERN = re.compile(r'[^a-zA-Z\s]')
+HASHTAG_EXTRACT_PATTERN = re.compile(r'#(\w+)')
+MENTION_EXTRACT_PATTERN = re.compile(r'@(\w+)')
+
+# Loaded stopword sets, keyed by (custom file, extra words)
+_stopword_cache = {}
+_stopword_lock = threading.Lock()
+
+
+def clean_text(text, stop_words=None):
     """
     Clean tweet text by removing URLs, mentions, hashtags, special characters
     
     Args:
         text: Raw tweet text
+        stop_words: Optional stopword set to drop in the same pass
     
     Returns:
         Cleaned text string
@@ -41,77 +64,262 @@ def clean_text(text):
     if pd.isna(text):
         return ""
     
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove URLs
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    
+    # Convert to lowercase and remove URLs
+    return _clean_without_urls(URL_PATTERN.sub('', text.lower()), stop_words)
+
+
+def _clean_without_urls(text, stop_words=None):
+    """Finish cleaning lowercased text whose URLs are already removed"""
     # Remove mentions (@username)
-    text = re.sub(r'@\w+', '', text)
+    text = MENTION_PATTERN.sub('', text)
     
     # Remove hashtag symbol but keep the word
-    text = re.sub(r'#', '', text)
+    text = HASHTAG_PATTERN.sub('', text)
     
     # Remove special characters and digits
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = NON_ALPHA_PATTERN.sub('', text)
     
-    # Remove extra whitespace
-    text = ' '.join(text.split())
+    # Remove extra whitespace (and stopwords, if requested)
+    if stop_words:
+        return ' '.join(word for word in text.split() if word not in stop_words)
+    return ' '.join(text.split())
+
+
+def clean_and_extract(text, stop_words=None):
+    """
+    Clean tweet text and extract its hashtags and mentions in one pass
+    
+    Args:
+        text: Raw tweet text
+        stop_words: Optional stopword set to drop while cleaning
     
-    return text
+    Returns:
+        Tuple (cleaned text, list of hashtags, list of mentions), lowercased
+    """
+    if pd.isna(text):
+        return "", [], []
+    
+    text = URL_PATTERN.sub('', text.lower())
+    hashtags = HASHTAG_EXTRACT_PATTERN.findall(text)
+    mentions = MENTION_EXTRACT_PATTERN.findall(text)
+    return _clean_without_urls(text, stop_words), hashtags, mentions
 
 
-def remove_stopwords(text):
+def load_stopwords(stopwords_file=None, extra_stopwords=None):
+    """
+    Load the stopword set once and reuse it for every tweet
+    
+    Args:
+        stopwords_file: Optional file with one custom stopword per line,
+                        used instead of the NLTK English list
+        extra_stopwords: Optional iterable of domain words to add
+    
+    Returns:
+        Frozen set of stopwords
+    """
+    extra = tuple(sorted(set(w.strip().lower() for w in extra_stopwords or [] if w.strip())))
+    key = (stopwords_file, extra)
+    
+    if key in _stopword_cache:
+        return _stopword_cache[key]
+    
+    # NLTK's lazy corpus loader is not thread-safe, so load under a lock
+    with _stopword_lock:
+        if key not in _stopword_cache:
+            if stopwords_file:
+                with open(stopwords_file, encoding='utf-8') as f:
+                    words = {line.strip().lower() for line in f
+                             if line.strip() and not line.startswith('#')}
+            else:
+                from nltk.corpus import stopwords
+                words = set(stopwords.words('english'))
+            
+            _stopword_cache[key] = frozenset(words.union(extra))
+    
+    return _stopword_cache[key]
+
+
+def remove_stopwords(text, stop_words=None):
     """
     Remove common stopwords from text
     
     Args:
         text: Cleaned text string
+        stop_words: Stopword set (default: cached NLTK English list)
     
     Returns:
         Text with stopwords removed
     """
-    from nltk.corpus import stopwords
-    stop_words = set(stopwords.words('english'))
+    if stop_words is None:
+        stop_words = load_stopwords()
+    
+    return ' '.join(word for word in text.split() if word not in stop_words)
+
+
+def clean_series(texts, stop_words=None):
+    """
+    Clean a whole column of raw tweet text, optionally removing stopwords
+    in the same pass
+    
+    Args:
+        texts: Series of raw tweet text
+        stop_words: Optional stopword set
+    
+    Returns:
+        Series of cleaned text
+    """
+    return pd.Series([clean_text(text, stop_words) for text in texts],
+                     index=texts.index, dtype=object)
+
+
+def get_analyzer():
+    """
+    Get the process-wide VADER analyzer
     
-    words = text.split()
-    filtered_words = [word for word in words if word not in stop_words]
+    Uses the memory-mapped lexicon so all worker processes share one copy,
+    falling back to the stock analyzer if the lexicon cannot be compiled
     
-    return ' '.join(filtered_words)
+    Returns:
+        SentimentIntensityAnalyzer instance
+    """
+    return get_engine('vader').analyzer
 
 
-def analyze_sentiment(text):
+def analyze_sentiment(text, engine=DEFAULT_ENGINE):
     """
-    Analyze sentiment using VADER
+    Analyze sentiment using VADER (or another registered engine)
     
     Args:
         text: Text to analyze
+        engine: Sentiment engine name (default: vader)
     
     Returns:
         Dictionary with sentiment scores
     """
-    analyzer = SentimentIntensityAnalyzer()
-    scores = analyzer.polarity_scores(text)
+    return get_engine(engine).score(text)
+
+
+def clean_and_extract_series(texts, stop_words=None):
+    """
+    Clean a whole column of raw tweet text and extract hashtag/mention lists
     
-    # Classify sentiment based on compound score
-    if scores['compound'] >= 0.05:
-        sentiment = 'positive'
-    elif scores['compound'] <= -0.05:
-        sentiment = 'negative'
-    else:
-        sentiment = 'neutral'
+    Args:
+        texts: Series of raw tweet text
+        stop_words: Optional stopword set
     
-    return {
-        'compound': scores['compound'],
-        'positive': scores['pos'],
-        'negative': scores['neg'],
-        'neutral': scores['neu'],
-        'sentiment': sentiment
-    }
+    Returns:
+        DataFrame with cleaned_text, hashtags and mentions columns
+    """
+    return pd.DataFrame([clean_and_extract(text, stop_words) for text in texts],
+                        index=texts.index, columns=['cleaned_text', 'hashtags', 'mentions'])
 
 
-def process_tweets(input_file, output_file=None, remove_stops=False):
+def add_sentiment_columns(df, dedupe=False, near_threshold=None, engine=DEFAULT_ENGINE):
+    """
+    Score the cleaned text of a DataFrame, once per duplicate group
+    
+    Identical cleaned texts are always scored once. With dedupe enabled,
+    dup_group/dup_count columns are kept on the result, and near_threshold
+    additionally collapses near-duplicates (MinHash) onto one score.
+    
+    Args:
+        df: DataFrame with a cleaned_text column
+        dedupe: Whether to keep dup_group/dup_count columns
+        near_threshold: Jaccard threshold for near-duplicates (implies dedupe)
+        engine: Sentiment engine name (default: vader)
+    
+    Returns:
+        DataFrame with sentiment columns added
+    """
+    dedupe = dedupe or near_threshold is not None
+    df = mark_duplicates(df, near_threshold=near_threshold)
+    
+    groups = representatives(df)
+    results = pd.DataFrame(get_engine(engine).score_batch(groups['cleaned_text']),
+                           index=groups['dup_group'],
+                           columns=['compound', 'positive', 'negative', 'neutral', 'sentiment'])
+    
+    df['sentiment_compound'] = df['dup_group'].map(results['compound'])
+    df['sentiment_positive'] = df['dup_group'].map(results['positive'])
+    df['sentiment_negative'] = df['dup_group'].map(results['negative'])
+    df['sentiment_neutral'] = df['dup_group'].map(results['neutral'])
+    df['sentiment'] = df['dup_group'].map(results['sentiment'])
+    
+    if not dedupe:
+        df = df.drop(columns=['dup_group', 'dup_count'])
+    
+    return df
+
+
+def analyze_dataframe(df, stop_words=None, dedupe=False, near_threshold=None, engine=DEFAULT_ENGINE):
+    """
+    Clean, extract entities and score a DataFrame of raw tweets
+    
+    Args:
+        df: DataFrame with a content column
+        stop_words: Optional stopword set to drop while cleaning
+        dedupe, near_threshold, engine: As in add_sentiment_columns
+    
+    Returns:
+        Scored DataFrame without tweets that are empty after cleaning
+        (the input DataFrame is left unchanged)
+    """
+    with stage('clean'):
+        cleaned = clean_and_extract_series(df['content'], stop_words)
+        df = df.assign(**{column: cleaned[column] for column in cleaned.columns})
+        df = df[df['cleaned_text'].str.strip() != '']
+    with stage('score'):
+        df = add_sentiment_columns(df, dedupe=dedupe, near_threshold=near_threshold, engine=engine)
+    TWEETS_SCORED.inc(len(df), engine=engine)
+    return df
+
+
+def print_summary(summary, dup_stats=None, entities=None):
+    """
+    Print summary statistics from a ScoreSummary sketch
+    
+    Args:
+        summary: ScoreSummary of the analyzed tweets
+        dup_stats: Optional duplication_summary() result
+        entities: Optional EntityTracker with heavy hitters
+    """
+    report = summary.report()
+    total = summary.total
+    
+    print("\n" + "="*50)
+    print("SENTIMENT ANALYSIS SUMMARY")
+    print("="*50)
+    print(f"\nSentiment Distribution ({total} tweets):")
+    for label in ('positive', 'neutral', 'negative'):
+        count = summary.counts.get(label, 0)
+        share = (count / total * 100) if total else 0.0
+        print(f"  {label:<9} {count:>8}  ({share:.1f}%)")
+    print(f"\nAverage Compound Score: {report['average_score']:.4f}")
+    print(f"Median Compound Score: {report['median_score']:.4f}")
+    print(f"Std Dev of Compound Score: {report['std_score']:.4f}")
+    print("Percentiles: " + ", ".join(f"{k}={v:.4f}" for k, v in report['percentiles'].items()))
+    if dup_stats:
+        print(f"\nUnique texts: {dup_stats['unique_groups']} "
+              f"({dup_stats['duplicate_rows']} duplicate rows collapsed)")
+        print(f"Average Compound Score (one per group): {dup_stats['unique_average_score']:.4f}")
+    if entities is not None:
+        for kind, report in entities.report(k=5).items():
+            if not report['most_frequent']:
+                continue
+            print(f"\nTop {kind}:")
+            for entry in report['most_frequent']:
+                average = entry['average_sentiment']
+                average = f"{average:+.3f}" if average is not None else "n/a"
+                count = f"{entry['count']}" + (f" (±{entry['error']})" if entry['error'] else "")
+                print(f"  {entry['name']:<24} {count:>12} tweets  "
+                      f"avg sentiment {average}  engagement {entry['engagement']}")
+    print("="*50)
+
+
+def process_tweets(input_file, output_file=None, remove_stops=False,
+                   stopwords_file=None, extra_stopwords=None,
+                   dedupe=False, near_threshold=None, engine=DEFAULT_ENGINE,
+                   store=None, topic=None):
     """
     Process tweets: clean text and perform sentiment analysis
     
@@ -119,6 +327,13 @@ def process_tweets(input_file, output_file=None, remove_stops=False):
         input_file: Path to input CSV file
         output_file: Path to output CSV file (optional)
         remove_stops: Whether to remove stopwords
+        stopwords_file: Custom stopword list used instead of NLTK's (optional)
+        extra_stopwords: Additional domain stopwords (optional)
+        dedupe: Keep dup_group/dup_count columns and report unique-group stats
+        near_threshold: Jaccard threshold for near-duplicate collapsing (optional)
+        engine: Sentiment engine name (default: vader)
+        store: AnalyticsStore to persist the scored tweets into (optional)
+        topic: Topic recorded in the store (default: input file name)
     
     Returns:
         Processed DataFrame
@@ -128,48 +343,42 @@ def process_tweets(input_file, output_file=None, remove_stops=False):
     
     # Read the data
     print(f"Reading tweets from: {input_file}")
-    df = pd.read_csv(input_file)
+    with stage('read'):
+        df = pd.read_csv(input_file)
     print(f"Total tweets loaded: {len(df)}")
     
     if 'content' not in df.columns:
         print("Error: 'content' column not found in the CSV file")
         return None
     
-    # Clean the text
-    print("\nCleaning text...")
-    df['cleaned_text'] = df['content'].apply(clean_text)
-    
-    # Optionally remove stopwords
+    # Optionally remove stopwords (fused into the cleaning pass)
+    stop_words = None
     if remove_stops:
-        print("Removing stopwords...")
-        df['cleaned_text'] = df['cleaned_text'].apply(remove_stopwords)
+        stop_words = load_stopwords(stopwords_file, extra_stopwords)
+        print(f"Removing stopwords ({len(stop_words)} words)...")
     
-    # Remove empty tweets after cleaning
-    df = df[df['cleaned_text'].str.strip() != '']
+    # Clean the text (extracting hashtags and mentions in the same pass)
+    print("\nCleaning text...")
+    with stage('clean'):
+        cleaned = clean_and_extract_series(df['content'], stop_words)
+        for column in cleaned.columns:
+            df[column] = cleaned[column]
+        
+        # Remove empty tweets after cleaning
+        df = df[df['cleaned_text'].str.strip() != '']
     print(f"Tweets after cleaning: {len(df)}")
     
     # Perform sentiment analysis
-    print("\nPerforming sentiment analysis...")
-    sentiment_results = df['cleaned_text'].apply(analyze_sentiment)
-    
-    # Extract sentiment scores into separate columns
-    df['sentiment_compound'] = sentiment_results.apply(lambda x: x['compound'])
-    df['sentiment_positive'] = sentiment_results.apply(lambda x: x['positive'])
-    df['sentiment_negative'] = sentiment_results.apply(lambda x: x['negative'])
-    df['sentiment_neutral'] = sentiment_results.apply(lambda x: x['neutral'])
-    df['sentiment'] = sentiment_results.apply(lambda x: x['sentiment'])
+    print(f"\nPerforming sentiment analysis ({engine})...")
+    with stage('score'):
+        df = add_sentiment_columns(df, dedupe=dedupe, near_threshold=near_threshold, engine=engine)
     
     # Print summary statistics
-    print("\n" + "="*50)
-    print("SENTIMENT ANALYSIS SUMMARY")
-    print("="*50)
-    print(f"\nSentiment Distribution:")
-    print(df['sentiment'].value_counts())
-    print(f"\nPercentages:")
-    print(df['sentiment'].value_counts(normalize=True) * 100)
-    print(f"\nAverage Compound Score: {df['sentiment_compound'].mean():.4f}")
-    print(f"Median Compound Score: {df['sentiment_compound'].median():.4f}")
-    print("="*50)
+    with stage('aggregate'):
+        summary = ScoreSummary().update(df['sentiment_compound'], df['sentiment'])
+        dup_stats = duplication_summary(df) if 'dup_group' in df.columns else None
+        entities = EntityTracker().update(df)
+    print_summary(summary, dup_stats, entities)
     
     # Save processed data
     if output_file:
@@ -177,12 +386,98 @@ def process_tweets(input_file, output_file=None, remove_stops=False):
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        df.to_csv(output_file, index=False, encoding='utf-8')
+        with stage('write'):
+            df.to_csv(output_file, index=False, encoding='utf-8')
         print(f"\nProcessed tweets saved to: {output_file}")
     
+    if store:
+        topic = topic or os.path.splitext(os.path.basename(input_file))[0]
+        with stage('store'):
+            run_id = store.record_run(topic, df, source='cli', engine=engine)
+        print(f"Stored {len(df)} tweets in {store.path} (topic '{topic}', run {run_id})")
+    
     return df
 
 
+def process_tweets_chunked(input_file, output_file=None, chunk_size=50000, remove_stops=False,
+                           stopwords_file=None, extra_stopwords=None,
+                           dedupe=False, near_threshold=None, engine=DEFAULT_ENGINE,
+                           summary=None, store=None, topic=None):
+    """
+    Process a large CSV chunk by chunk without holding it in memory
+    
+    Each chunk is cleaned, scored and appended to the output file, and its
+    scores are folded into a mergeable ScoreSummary sketch. Duplicates are
+    collapsed within each chunk.
+    
+    Args:
+        input_file: Path to input CSV file
+        output_file: Path to output CSV file (optional)
+        chunk_size: Rows per chunk
+        remove_stops, stopwords_file, extra_stopwords, dedupe,
+        near_threshold, engine, store, topic: As in process_tweets
+        summary: Existing ScoreSummary to extend (e.g. from earlier runs)
+    
+    Returns:
+        ScoreSummary covering all processed chunks (None on error)
+    """
+    download_nltk_data()
+    
+    stop_words = load_stopwords(stopwords_file, extra_stopwords) if remove_stops else None
+    summary = summary or ScoreSummary()
+    entities = EntityTracker()
+    
+    if output_file:
+        output_dir = os.path.dirname(output_file)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+    
+    run_id = None
+    if store:
+        topic = topic or os.path.splitext(os.path.basename(input_file))[0]
+        run_id = store.start_run(topic, source='cli', engine=engine)
+    
+    print(f"Reading tweets from: {input_file} (chunks of {chunk_size})")
+    rows_read = 0
+    group_offset = 0
+    for i, chunk in enumerate(timed_iter('read', pd.read_csv(input_file, chunksize=chunk_size))):
+        if 'content' not in chunk.columns:
+            print("Error: 'content' column not found in the CSV file")
+            return None
+        
+        rows_read += len(chunk)
+        chunk = analyze_dataframe(chunk, stop_words, dedupe=dedupe,
+                                  near_threshold=near_threshold, engine=engine)
+        
+        if 'dup_group' in chunk.columns and len(chunk):
+            chunk['dup_group'] += group_offset
+            group_offset = int(chunk['dup_group'].max()) + 1
+        
+        with stage('aggregate'):
+            summary.update(chunk['sentiment_compound'], chunk['sentiment'])
+            entities.update(chunk)
+        
+        if store:
+            with stage('store'):
+                store.add_tweets(run_id, topic, chunk)
+        
+        if output_file:
+            with stage('write'):
+                chunk.to_csv(output_file, mode='w' if i == 0 else 'a', header=(i == 0),
+                             index=False, encoding='utf-8')
+        
+        print(f"Processed {rows_read} tweets...")
+    
+    print_summary(summary, entities=entities)
+    
+    if output_file:
+        print(f"\nProcessed tweets saved to: {output_file}")
+    if store:
+        print(f"Stored tweets in {store.path} (topic '{topic}', run {run_id})")
+    
+    return summary
+
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Clean tweets and perform sentiment analysis')
@@ -192,22 +487,78 @@ def main():
                         help='Output CSV file (default: input_analyzed.csv)')
     parser.add_argument('--remove-stopwords', action='store_true',
                         help='Remove stopwords from text')
+    parser.add_argument('--stopwords-file', type=str, default=None,
+                        help='Custom stopword list, one word per line (replaces NLTK list; implies --remove-stopwords)')
+    parser.add_argument('--extra-stopwords', type=str, default=None,
+                        help='Comma-separated domain stopwords to add (e.g. "rt,amp"; implies --remove-stopwords)')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Collapse duplicate tweets and report per-group statistics')
+    parser.add_argument('--near-dup-threshold', type=float, default=None,
+                        help='Also collapse near-duplicates at this Jaccard similarity (e.g. 0.8)')
+    parser.add_argument('--engine', type=str, default=DEFAULT_ENGINE, choices=list(SENTIMENT_ENGINES),
+                        help=f'Sentiment engine (default: {DEFAULT_ENGINE})')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Stream the input in chunks of this many rows (bounded memory)')
+    parser.add_argument('--summary-out', type=str, default=None,
+                        help='Save the mergeable summary sketch (JSON) to this path')
+    parser.add_argument('--merge-summary', type=str, action='append', default=[],
+                        help='Summary sketch from an earlier run to merge into this one (repeatable)')
+    parser.add_argument('--store', type=str, nargs='?', const=DEFAULT_DB_PATH, default=None,
+                        help=f'Persist scored tweets to the analytics store (default path: {DEFAULT_DB_PATH})')
+    parser.add_argument('--topic', type=str, default=None,
+                        help='Topic recorded in the analytics store (default: input file name)')
+    parser.add_argument('--timings', action='store_true',
+                        help='Print per-stage timings (read, clean, score, aggregate, write, store)')
+    parser.add_argument('--profile', type=str, nargs='?', const=PROFILE_DIR, default=None,
+                        help=f'Write a cProfile profile of the run to this directory (default: {PROFILE_DIR})')
     
     args = parser.parse_args()
+    if args.near_dup_threshold is not None and not 0 < args.near_dup_threshold <= 1:
+        parser.error('--near-dup-threshold must be greater than 0 and at most 1')
     
     # Set default output filename if not provided
     if args.output is None:
         base_name = os.path.splitext(args.input)[0]
         args.output = f"{base_name}_analyzed.csv"
     
-    # Process tweets
-    df = process_tweets(
+    options = dict(
         input_file=args.input,
         output_file=args.output,
-        remove_stops=args.remove_stopwords
+        remove_stops=bool(args.remove_stopwords or args.stopwords_file or args.extra_stopwords),
+        stopwords_file=args.stopwords_file,
+        extra_stopwords=args.extra_stopwords.split(',') if args.extra_stopwords else None,
+        dedupe=args.dedupe,
+        near_threshold=args.near_dup_threshold,
+        engine=args.engine,
+        store=AnalyticsStore(args.store) if args.store else None,
+        topic=args.topic
     )
     
-    if df is not None:
+    # Combine summaries from earlier runs
+    summary = ScoreSummary()
+    for path in args.merge_summary:
+        summary.merge(ScoreSummary.load(path))
+    
+    # Process tweets
+    instrumentation = (instrumented_run('clean_and_analyze', args.profile, print_timings=True)
+                       if args.timings or args.profile else nullcontext())
+    with instrumentation:
+        if args.chunk_size:
+            summary = process_tweets_chunked(chunk_size=args.chunk_size, summary=summary, **options)
+            done = summary is not None
+        else:
+            df = process_tweets(**options)
+            done = df is not None
+            if done and (args.summary_out or args.merge_summary):
+                summary.update(df['sentiment_compound'], df['sentiment'])
+                if args.merge_summary:
+                    print_summary(summary)
+    
+    if done and args.summary_out:
+        summary.save(args.summary_out)
+        print(f"Summary sketch saved to: {args.summary_out}")
+    
+    if done:
         print("\n✓ Processing complete!")
 
 
@@ -0,0 +1,210 @@
+"""
+Duplicate and Near-Duplicate Collapsing
+Groups retweets and copy-paste spam so each distinct text is scored once
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+# Universal hashing modulus for MinHash (fits products in uint64)
+MINHASH_PRIME = (1 << 31) - 1
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 3
+
+
+def exact_groups(texts):
+    """
+    Assign a group id to each text, shared by identical texts
+
+    Args:
+        texts: Series of cleaned text
+
+    Returns:
+        Numpy array of group ids (0..n_unique-1)
+    """
+    codes, _ = pd.factorize(texts)
+    return codes
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """
+    Hash the word n-grams of a text
+
+    Args:
+        text: Cleaned text string
+        size: Words per shingle
+
+    Returns:
+        Numpy array of uint64 shingle hashes
+    """
+    words = text.split()
+    if len(words) <= size:
+        grams = [' '.join(words)]
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    grams = set(grams)
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams),
+                       dtype=np.uint64, count=len(grams))
+
+
+def minhash_signatures(texts, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+    """
+    Compute MinHash signatures for a list of texts
+
+    Args:
+        texts: Sequence of cleaned text
+        num_perm: Number of hash permutations
+        shingle_size: Words per shingle
+        seed: Random seed for the permutations (fixed for reproducible groups)
+
+    Returns:
+        Array of shape (len(texts), num_perm)
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+
+    signatures = np.full((len(texts), num_perm), MINHASH_PRIME, dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = shingles(text, shingle_size)
+        signatures[i] = ((np.outer(hashes, a) + b) % MINHASH_PRIME).min(axis=0)
+    return signatures
+
+
+def lsh_params(threshold, num_perm=DEFAULT_NUM_PERM):
+    """
+    Choose LSH bands and rows so the S-curve midpoint sits near the threshold
+
+    Args:
+        threshold: Target Jaccard similarity
+        num_perm: Signature length
+
+    Returns:
+        Tuple (bands, rows)
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1.0 / bands) ** (1.0 / rows)
+        if best is None or abs(midpoint - threshold) < best[0]:
+            best = (abs(midpoint - threshold), bands, rows)
+    return best[1], best[2]
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def near_duplicate_groups(texts, threshold=0.8, num_perm=DEFAULT_NUM_PERM,
+                          shingle_size=DEFAULT_SHINGLE_SIZE):
+    """
+    Group texts whose estimated Jaccard similarity reaches the threshold
+
+    Args:
+        texts: Sequence of (already exact-deduplicated) cleaned text
+        threshold: Minimum Jaccard similarity to merge two texts
+        num_perm: Number of MinHash permutations
+        shingle_size: Words per shingle
+
+    Returns:
+        Numpy array of group ids, one per text
+    """
+    n = len(texts)
+    signatures = minhash_signatures(texts, num_perm, shingle_size)
+    bands, rows = lsh_params(threshold, num_perm)
+    parent = list(range(n))
+
+    for band in range(bands):
+        buckets = {}
+        band_sigs = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(n):
+            key = band_sigs[i].tobytes()
+            first = buckets.setdefault(key, i)
+            if first == i:
+                continue
+            # Verify the candidate against the bucket representative
+            similarity = np.mean(signatures[i] == signatures[first])
+            if similarity >= threshold:
+                root_i, root_first = _find(parent, i), _find(parent, first)
+                if root_i != root_first:
+                    parent[max(root_i, root_first)] = min(root_i, root_first)
+
+    roots = [_find(parent, i) for i in range(n)]
+    codes, _ = pd.factorize(pd.Series(roots))
+    return codes
+
+
+def mark_duplicates(df, text_column='cleaned_text', near_threshold=None):
+    """
+    Add dup_group and dup_count columns to a DataFrame
+
+    Exact duplicates of the text column always share a group. When
+    near_threshold is given, groups whose MinHash Jaccard estimate reaches
+    it are merged as well.
+
+    Args:
+        df: DataFrame with cleaned text
+        text_column: Column to compare
+        near_threshold: Jaccard threshold for near-duplicates (None = exact only)
+
+    Returns:
+        DataFrame with dup_group and dup_count columns
+    """
+    df = df.copy()
+    groups = exact_groups(df[text_column])
+
+    if near_threshold is not None and len(df):
+        # Run MinHash once per distinct text, then map back to rows
+        unique_texts = df[text_column].iloc[pd.Series(groups).drop_duplicates().index].tolist()
+        near = near_duplicate_groups(unique_texts, threshold=near_threshold)
+        groups = near[groups]
+
+    df['dup_group'] = groups
+    df['dup_count'] = df.groupby('dup_group')['dup_group'].transform('size')
+    return df
+
+
+def representatives(df):
+    """
+    Get one row per duplicate group (the first occurrence)
+
+    Args:
+        df: DataFrame with a dup_group column
+
+    Returns:
+        DataFrame with one row per group
+    """
+    return df.drop_duplicates('dup_group')
+
+
+def duplication_summary(df):
+    """
+    Summarize duplication and the unweighted (one vote per group) sentiment
+
+    Args:
+        df: Scored DataFrame with dup_group and dup_count columns
+
+    Returns:
+        Dictionary with group counts and per-group sentiment aggregates
+    """
+    groups = representatives(df)
+    unique_counts = groups['sentiment'].value_counts().to_dict()
+    return {
+        'unique_groups': int(len(groups)),
+        'duplicate_rows': int(len(df) - len(groups)),
+        'duplication_ratio': round(1 - len(groups) / len(df), 4) if len(df) else 0.0,
+        'unique_average_score': float(groups['sentiment_compound'].mean()) if len(groups) else 0.0,
+        'unique_distribution': {
+            'positive': int(unique_counts.get('positive', 0)),
+            'negative': int(unique_counts.get('negative', 0)),
+            'neutral': int(unique_counts.get('neutral', 0))
+        }
+    }
@@ -0,0 +1,242 @@
+"""
+Heavy-Hitter Tracking
+Bounded-memory top-K users, hashtags and mentions (Space-Saving for
+frequency, Count-Min for engagement) with per-entity sentiment averages
+"""
+
+import heapq
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_TOP_K = 10
+ENTITY_KINDS = ('users', 'hashtags', 'mentions')
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-K counter
+
+    Tracks at most `capacity` items. When full, a new item replaces the
+    item with the smallest count and inherits that count as its error
+    bound, so counts are never underestimated. Sentiment and engagement
+    sums are kept for tracked items from the moment they are tracked.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.sentiment_sums = {}
+        self.sentiment_n = {}
+        self.engagement = {}
+        self._heap = []
+
+    def _push(self, item):
+        heapq.heappush(self._heap, (self.counts[item], item))
+        # Drop stale heap entries once the heap grows well past capacity
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, item) for item, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item, count
+
+    def update(self, item, weight=1, sentiment_sum=0.0, sentiment_n=0, engagement=0):
+        """
+        Count occurrences of an item
+
+        Args:
+            item: Entity name
+            weight: Number of occurrences
+            sentiment_sum: Sum of compound scores over those occurrences
+            sentiment_n: Number of occurrences with a compound score
+            engagement: Engagement (likes + retweets) over those occurrences
+        """
+        if item not in self.counts:
+            if len(self.counts) < self.capacity:
+                self.counts[item] = 0
+                self.errors[item] = 0
+            else:
+                evicted, min_count = self._pop_min()
+                for table in (self.counts, self.errors, self.sentiment_sums,
+                              self.sentiment_n, self.engagement):
+                    table.pop(evicted, None)
+                self.counts[item] = min_count
+                self.errors[item] = min_count
+
+        self.counts[item] += weight
+        if sentiment_n:
+            self.sentiment_sums[item] = self.sentiment_sums.get(item, 0.0) + sentiment_sum
+            self.sentiment_n[item] = self.sentiment_n.get(item, 0) + sentiment_n
+        self.engagement[item] = self.engagement.get(item, 0) + engagement
+        self._push(item)
+
+    def top(self, k=DEFAULT_TOP_K):
+        """
+        Get the k most frequent items
+
+        Returns:
+            List of dictionaries with name, count, error, average_sentiment
+        """
+        items = heapq.nlargest(k, self.counts.items(), key=lambda kv: kv[1])
+        return [
+            {
+                'name': item,
+                'count': int(count),
+                'error': int(self.errors[item]),
+                'average_sentiment': (self.sentiment_sums[item] / self.sentiment_n[item]
+                                      if self.sentiment_n.get(item) else None),
+                'engagement': int(self.engagement.get(item, 0)),
+            }
+            for item, count in items
+        ]
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch for approximate per-item totals in fixed memory
+    """
+
+    def __init__(self, width=2048, depth=4, seed=7):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._seeds = [seed * 1000003 + i for i in range(depth)]
+
+    def _columns(self, item):
+        data = item.encode('utf-8')
+        return [zlib.crc32(data, s) % self.width for s in self._seeds]
+
+    def add(self, item, value=1):
+        """Add value to an item's total, returning the new estimate"""
+        return int(self.add_batch([item], [value])[0])
+
+    def add_batch(self, items, values):
+        """
+        Add values to many items' totals in one vectorized update
+
+        Returns:
+            Array of new estimates, one per item
+        """
+        columns = np.array([self._columns(item) for item in items], dtype=np.int64).T
+        rows = np.arange(self.depth)[:, None]
+        np.add.at(self.table, (np.broadcast_to(rows, columns.shape), columns),
+                  np.broadcast_to(np.asarray(values, dtype=np.int64), columns.shape))
+        return self.table[rows, columns].min(axis=0)
+
+    def estimate(self, item):
+        """Estimate an item's total (never an underestimate)"""
+        return int(self.table[range(self.depth), self._columns(item)].min())
+
+
+class EngagementTopK:
+    """
+    Top-K items by total engagement, using a Count-Min sketch for totals
+    """
+
+    def __init__(self, k=DEFAULT_TOP_K * 5, width=2048, depth=4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.top_items = {}
+        # Lower bound on the smallest tracked total (estimates only grow)
+        self._floor = 0
+
+    def update_batch(self, items, engagements):
+        """Add engagement for many items (one entry per distinct item)"""
+        if len(items):
+            for item, estimate in zip(items, self.sketch.add_batch(items, engagements)):
+                self._offer(item, int(estimate))
+
+    def _offer(self, item, estimate):
+        if item in self.top_items or len(self.top_items) < self.k:
+            self.top_items[item] = estimate
+        elif estimate > self._floor:
+            smallest = min(self.top_items, key=self.top_items.get)
+            if estimate > self.top_items[smallest]:
+                del self.top_items[smallest]
+                self.top_items[item] = estimate
+            self._floor = min(self.top_items.values())
+
+    def top(self, k=DEFAULT_TOP_K):
+        items = heapq.nlargest(k, self.top_items.items(), key=lambda kv: kv[1])
+        return [{'name': item, 'engagement': int(total)} for item, total in items]
+
+
+class EntityTracker:
+    """
+    Heavy hitters for users, hashtags and mentions in a single pass
+    """
+
+    def __init__(self, capacity=1000, engagement_k=DEFAULT_TOP_K * 5):
+        self.frequent = {kind: SpaceSaving(capacity) for kind in ENTITY_KINDS}
+        self.engaged = {kind: EngagementTopK(engagement_k) for kind in ENTITY_KINDS}
+        self.rows = 0
+
+    def _track(self, kind, frame):
+        if frame.empty:
+            return
+        # Pre-aggregate the chunk per entity, then feed weighted updates
+        grouped = frame.groupby('entity', sort=False).agg(
+            count=('entity', 'size'),
+            sentiment_sum=('sentiment', 'sum'),
+            sentiment_n=('sentiment', 'count'),
+            engagement=('engagement', 'sum'),
+        ).sort_values('count', ascending=False)
+
+        frequent = self.frequent[kind]
+        for item, count, sentiment_sum, sentiment_n, engagement in grouped.itertuples():
+            frequent.update(item, int(count), float(sentiment_sum), int(sentiment_n), int(engagement))
+
+        engaged = grouped[grouped['engagement'] > 0]
+        self.engaged[kind].update_batch(engaged.index.tolist(), engaged['engagement'].to_numpy())
+
+    def update(self, df):
+        """
+        Fold a chunk of scored tweets into the trackers
+
+        Args:
+            df: DataFrame with username, hashtags, mentions, like_count,
+                retweet_count and (optionally) sentiment_compound columns
+        """
+        n = len(df)
+        engagement = pd.Series(0, index=df.index, dtype='int64')
+        for column in ('like_count', 'retweet_count'):
+            if column in df.columns:
+                engagement += pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int64')
+        sentiment = (df['sentiment_compound'] if 'sentiment_compound' in df.columns
+                     else pd.Series(np.nan, index=df.index))
+
+        base = pd.DataFrame({'sentiment': sentiment, 'engagement': engagement})
+        sources = {'users': 'username', 'hashtags': 'hashtags', 'mentions': 'mentions'}
+        for kind, column in sources.items():
+            if column not in df.columns:
+                continue
+            frame = base.assign(entity=df[column])
+            if kind != 'users':
+                frame = frame.explode('entity')
+            frame = frame[frame['entity'].map(lambda e: isinstance(e, str) and e != '')]
+            self._track(kind, frame)
+
+        self.rows += n
+        return self
+
+    def report(self, k=DEFAULT_TOP_K):
+        """
+        Summarize the heavy hitters
+
+        Returns:
+            Dictionary per entity kind with most_frequent and most_engaged lists
+        """
+        return {
+            kind: {
+                'most_frequent': self.frequent[kind].top(k),
+                'most_engaged': self.engaged[kind].top(k),
+            }
+            for kind in ENTITY_KINDS
+        }
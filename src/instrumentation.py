@@ -0,0 +1,223 @@
+"""
+Stage Timing and Profiling
+Per-request (or per-run) stage timers, emitted as a Server-Timing header and
+as JSON log lines, plus opt-in sampled cProfile capture to a local directory
+"""
+
+import contextvars
+import cProfile
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Defaults (overridable through environment variables)
+TIMING_LOG = os.environ.get('TIMING_LOG', '1') != '0'
+PROFILE_DIR = os.environ.get(
+    'PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'profiles')
+)
+# Profile every Nth request (0: never)
+PROFILE_EVERY = int(os.environ.get('PROFILE_EVERY', 0))
+# Let clients ask for a profile with an "X-Profile: 1" header
+PROFILE_ALLOW_HEADER = os.environ.get('PROFILE_ALLOW_HEADER', '0') == '1'
+
+_current_timer = contextvars.ContextVar('stage_timer', default=None)
+
+logger = logging.getLogger('sentiment.timing')
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class StageTimer:
+    """
+    Wall-clock durations of named stages
+
+    Repeated stages (e.g. one per chunk) accumulate under the same name;
+    stages are reported in the order they first ran.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Server-Timing header value (durations in milliseconds)"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={self.total * 1000:.1f}")
+        return ', '.join(entries)
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'stages_ms': {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()},
+        }
+
+
+def current_timer():
+    """The StageTimer of the running request or CLI run (None outside one)"""
+    return _current_timer.get()
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block as a stage of the current request or run
+
+    A no-op when nothing is being timed, so library code can be instrumented
+    unconditionally.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def timed_iter(name, iterable):
+    """Yield from an iterable, timing each step as a stage (e.g. chunked reads)"""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            item = next(iterator, StopIteration)
+        if item is StopIteration:
+            return
+        yield item
+
+
+def activate(timer):
+    """Make a timer current; returns a token for deactivate()"""
+    return _current_timer.set(timer)
+
+
+def deactivate(token):
+    _current_timer.reset(token)
+
+
+def log_timing(event, timer, **fields):
+    """Write one JSON log line with a timer's stages"""
+    if TIMING_LOG:
+        logger.info(json.dumps({'event': event, 'time': datetime.now().isoformat(),
+                                **fields, **timer.as_dict()}, default=str))
+
+
+class Profiler:
+    """
+    Opt-in sampled cProfile capture
+
+    Profiles every `every`-th request, or a request that asks for it when
+    header requests are allowed. Only one profile runs at a time (cProfile
+    cannot profile overlapping requests reliably), so a sampled request that
+    finds the profiler busy simply runs unprofiled.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, every=PROFILE_EVERY, allow_header=PROFILE_ALLOW_HEADER):
+        self.directory = directory
+        self.every = every
+        self.allow_header = allow_header
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def wanted(self, requested=False):
+        """Whether the next request should be profiled"""
+        if requested and self.allow_header:
+            return True
+        return self.every > 0 and next(self._counter) % self.every == 0
+
+    def start(self):
+        """Start profiling (returns None if another profile is running)"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is active
+            self._lock.release()
+            return None
+        return profile
+
+    def stop(self, profile, label):
+        """
+        Stop profiling and write the profile
+
+        Returns:
+            Path of the .prof file (open with pstats or snakeviz)
+        """
+        try:
+            profile.disable()
+            os.makedirs(self.directory, exist_ok=True)
+            slug = re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-')[:60] or 'run'
+            path = os.path.join(self.directory,
+                                f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{slug}-{os.getpid()}.prof")
+            profile.dump_stats(path)
+            return path
+        finally:
+            self._lock.release()
+
+
+@contextmanager
+def instrumented_run(name, profile_dir=None, print_timings=False):
+    """
+    Time (and optionally profile) a CLI run with the same hooks as requests
+
+    Args:
+        name: Run name used in the log line and profile file name
+        profile_dir: Write a cProfile profile of the whole run here (optional)
+        print_timings: Print the stage table at the end
+
+    Yields:
+        The run's StageTimer
+    """
+    timer = StageTimer(name)
+    token = activate(timer)
+    profiler = Profiler(profile_dir) if profile_dir else None
+    profile = profiler.start() if profiler else None
+    try:
+        yield timer
+    finally:
+        deactivate(token)
+        profile_path = profiler.stop(profile, name) if profile else None
+        log_timing('run_timing', timer, run=name, profile=profile_path)
+        if print_timings:
+            print_stage_timings(timer)
+        if profile_path:
+            print(f"Profile saved to: {profile_path}")
+
+
+def print_stage_timings(timer):
+    """Print stage durations and their share of the total"""
+    total = timer.total
+    print("\n" + "="*50)
+    print("STAGE TIMINGS")
+    print("="*50)
+    for name, seconds in timer.stages.items():
+        share = seconds / total * 100 if total else 0.0
+        print(f"  {name:<28} {seconds:>9.3f}s  ({share:.1f}%)")
+    print(f"  {'total':<28} {total:>9.3f}s")
+    print("="*50)
@@ -0,0 +1,218 @@
+"""
+Memory-Mapped VADER Lexicon
+Compiles the VADER lexicon into a compact sorted string table and serves
+lookups from a read-only memory map, so every worker process shares one
+physical copy of the lexicon instead of building its own Python dict
+"""
+
+import argparse
+import codecs
+import mmap
+import os
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+import vaderSentiment.vaderSentiment as vader_module
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+
+# File layout (all integers little-endian):
+#   magic (8 bytes) | count (uint32) | blob size (uint32)
+#   offsets (uint32 * (count + 1)) | valences (float32 * count) | words (utf-8 blob)
+MAGIC = b'VADERLX1'
+HEADER_SIZE = 16
+
+VADER_DIR = os.path.dirname(os.path.abspath(vader_module.__file__))
+VADER_LEXICON_FILE = os.path.join(VADER_DIR, 'vader_lexicon.txt')
+VADER_EMOJI_FILE = os.path.join(VADER_DIR, 'emoji_utf8_lexicon.txt')
+
+DEFAULT_LEXICON_PATH = os.environ.get(
+    'VADER_LEXICON_BIN',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'vader_lexicon.bin')
+)
+
+# VADER valences are published with a single decimal place; rounding the
+# float32 value back to this precision reproduces the exact float64 VADER uses.
+VALENCE_DECIMALS = 1
+
+
+def read_vader_lexicon(lexicon_file=VADER_LEXICON_FILE):
+    """
+    Parse the VADER lexicon text file exactly like SentimentIntensityAnalyzer
+
+    Args:
+        lexicon_file: Path to vader_lexicon.txt
+
+    Returns:
+        Dictionary mapping word to valence
+    """
+    with codecs.open(lexicon_file, encoding='utf-8') as f:
+        content = f.read()
+
+    lex_dict = {}
+    for line in content.rstrip('\n').split('\n'):
+        if not line:
+            continue
+        (word, measure) = line.strip().split('\t')[0:2]
+        lex_dict[word] = float(measure)
+    return lex_dict
+
+
+def compile_lexicon(output_path=DEFAULT_LEXICON_PATH, lexicon_file=VADER_LEXICON_FILE):
+    """
+    Compile the VADER lexicon into the on-disk sorted string table
+
+    The file is written to a temporary name and atomically renamed, so
+    workers racing to compile on startup never see a partial file.
+
+    Args:
+        output_path: Path of the compiled lexicon
+        lexicon_file: Path to vader_lexicon.txt
+
+    Returns:
+        Path of the compiled lexicon
+    """
+    lex_dict = read_vader_lexicon(lexicon_file)
+    entries = sorted((word.encode('utf-8'), valence) for word, valence in lex_dict.items())
+
+    offsets = np.zeros(len(entries) + 1, dtype='<u4')
+    valences = np.empty(len(entries), dtype='<f4')
+    blob = bytearray()
+    for i, (word, valence) in enumerate(entries):
+        blob.extend(word)
+        offsets[i + 1] = len(blob)
+        valences[i] = valence
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([len(entries), len(blob)], dtype='<u4').tobytes())
+        f.write(offsets.tobytes())
+        f.write(valences.tobytes())
+        f.write(bytes(blob))
+    os.replace(tmp_path, output_path)
+
+    return output_path
+
+
+def ensure_compiled(path=DEFAULT_LEXICON_PATH, lexicon_file=VADER_LEXICON_FILE):
+    """
+    Compile the lexicon if it is missing or older than the VADER source file
+
+    Args:
+        path: Path of the compiled lexicon
+        lexicon_file: Path to vader_lexicon.txt
+
+    Returns:
+        Path of the compiled lexicon
+    """
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(lexicon_file):
+        print(f"Compiling VADER lexicon to: {path}")
+        compile_lexicon(path, lexicon_file)
+    return path
+
+
+class MappedLexicon(Mapping):
+    """
+    Read-only word -> valence mapping backed by a memory-mapped lexicon file
+    """
+
+    def __init__(self, path=DEFAULT_LEXICON_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f"Not a compiled VADER lexicon: {path}")
+
+        count, blob_size = np.frombuffer(self._mm, dtype='<u4', count=2, offset=8)
+        self._count = int(count)
+        offsets_start = HEADER_SIZE
+        valences_start = offsets_start + 4 * (self._count + 1)
+        self._blob_start = valences_start + 4 * self._count
+
+        # Views into the shared mapping; nothing is copied into the process heap
+        self._offsets = np.frombuffer(self._mm, dtype='<u4', count=self._count + 1, offset=offsets_start)
+        self._valences = np.frombuffer(self._mm, dtype='<f4', count=self._count, offset=valences_start)
+
+        # Cache hot lookups per process (tweets reuse a small vocabulary)
+        self._find = lru_cache(maxsize=8192)(self._search)
+
+    def _word_at(self, i):
+        start = self._blob_start + int(self._offsets[i])
+        end = self._blob_start + int(self._offsets[i + 1])
+        return self._mm[start:end]
+
+    def _search(self, word):
+        """Binary search the sorted string table, returning the index or -1"""
+        try:
+            key = word.encode('utf-8')
+        except (AttributeError, UnicodeEncodeError):
+            return -1
+
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._word_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._word_at(lo) == key:
+            return lo
+        return -1
+
+    def __getitem__(self, word):
+        i = self._find(word)
+        if i < 0:
+            raise KeyError(word)
+        return round(float(self._valences[i]), VALENCE_DECIMALS)
+
+    def __contains__(self, word):
+        return self._find(word) >= 0
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._word_at(i).decode('utf-8')
+
+    def __len__(self):
+        return self._count
+
+
+class MappedSentimentIntensityAnalyzer(SentimentIntensityAnalyzer):
+    """
+    VADER analyzer that reads valences from a shared MappedLexicon
+
+    Scoring logic is inherited unchanged from SentimentIntensityAnalyzer,
+    so results are identical to the stock analyzer.
+    """
+
+    def __init__(self, lexicon_path=DEFAULT_LEXICON_PATH, emoji_lexicon=VADER_EMOJI_FILE):
+        self.lexicon = MappedLexicon(ensure_compiled(lexicon_path))
+
+        with codecs.open(emoji_lexicon, encoding='utf-8') as f:
+            self.emoji_full_filepath = f.read()
+        self.emojis = self.make_emoji_dict()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Compile the VADER lexicon for memory-mapped sharing')
+    parser.add_argument('--output', type=str, default=DEFAULT_LEXICON_PATH,
+                        help=f'Compiled lexicon path (default: {DEFAULT_LEXICON_PATH})')
+
+    args = parser.parse_args()
+
+    path = compile_lexicon(args.output)
+    lexicon = MappedLexicon(path)
+    print(f"✓ Compiled {len(lexicon)} lexicon entries to: {os.path.abspath(path)}")
+    print(f"File size: {os.path.getsize(path) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
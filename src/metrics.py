@@ -0,0 +1,439 @@
+"""
+Prometheus Metrics
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format. With METRICS_DIR set, every process writes a snapshot of its samples
+to that directory and a scrape merges all of them, so one /api/metrics
+request reports every gunicorn worker
+"""
+
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+
+# Shared snapshot directory for multi-process servers (unset: this process only)
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+# Seconds between snapshot writes (scrapes see other workers this far behind)
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+
+# Request/stage latency buckets in seconds (analyses run from ~10ms to minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# How gauges from several processes are combined
+GAUGE_MODES = ('sum', 'max', 'all')
+
+
+class Metric:
+    """
+    A named metric with fixed label names
+
+    Values are kept per label-value tuple; all updates go through the
+    registry lock, so metrics can be updated from any thread.
+    """
+
+    kind = None
+
+    def __init__(self, registry, name, help_text, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def spec(self):
+        return {'kind': self.kind, 'help': self.help, 'labels': list(self.labelnames)}
+
+    def samples(self):
+        return [[list(key), value] for key, value in self.values.items()]
+
+
+class Counter(Metric):
+    """Monotonically increasing count (e.g. tweets scored)"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError('Counters can only increase')
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down (e.g. in-flight analyses)
+
+    mode decides how the values of several processes are combined: 'sum'
+    (e.g. in-flight requests), 'max' (e.g. the size of a shared file) or
+    'all' (one series per process, with a pid label, e.g. RSS). Gauges of
+    processes that exited are dropped.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, registry, name, help_text, labelnames=(), mode='sum'):
+        if mode not in GAUGE_MODES:
+            raise ValueError(f"Unknown gauge mode: {mode}. Choose from: {', '.join(GAUGE_MODES)}")
+        super().__init__(registry, name, help_text, labelnames)
+        self.mode = mode
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def spec(self):
+        return {**super().spec(), 'mode': self.mode}
+
+
+class Histogram(Metric):
+    """
+    Distribution of observations in fixed buckets (e.g. request latency)
+
+    Each label set keeps non-cumulative bucket counts (the last one for
+    +Inf), the sum and the count; buckets are made cumulative when rendered.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        slot = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                slot = i
+                break
+        with self.registry.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            entry['buckets'][slot] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def spec(self):
+        return {**super().spec(), 'buckets': list(self.buckets)}
+
+    def samples(self):
+        return [[list(key), {'buckets': list(entry['buckets']), 'sum': entry['sum'], 'count': entry['count']}]
+                for key, entry in self.values.items()]
+
+
+class MetricsRegistry:
+    """
+    The metrics of one process, plus the snapshot files of its siblings
+
+    Args:
+        directory: Shared snapshot directory (None: report this process only)
+    """
+
+    def __init__(self, directory=METRICS_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self._flusher = None
+
+    def _register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=(), mode='sum'):
+        return self._register(Gauge(self, name, help_text, labelnames, mode))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))
+
+    def add_collector(self, collect):
+        """Register a callable run before every snapshot (to refresh gauges such as RSS)"""
+        self.collectors.append(collect)
+
+    def snapshot(self):
+        """
+        This process's metrics as a JSON-serializable dictionary
+
+        Returns:
+            {'pid': ..., 'metrics': {name: {'kind', 'help', 'labels', ...,
+            'samples': [[label values, value], ...]}}}
+        """
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"Warning: Metrics collector failed: {e}")
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'metrics': {name: {**metric.spec(), 'samples': metric.samples()}
+                            for name, metric in self.metrics.items()},
+            }
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"worker-{pid}.json")
+
+    def flush(self):
+        """Write this process's snapshot for the other workers to read (no-op without a directory)"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        # Serialized so an older snapshot never replaces a newer one
+        with self._flush_lock:
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(f"{path}.tmp", path)
+
+    def start_flusher(self, interval=FLUSH_INTERVAL):
+        """
+        Write snapshots from a background thread every interval seconds (and at exit)
+
+        Keeps file writes off the request path. A no-op without a directory;
+        call it in each worker process, after forking.
+        """
+        if not self.directory or self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"Warning: Could not write metrics snapshot: {e}")
+                time.sleep(interval)
+
+        self._flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def collect(self):
+        """
+        Snapshots of this process (live) and of every other process in the directory
+
+        Returns:
+            List of (snapshot, live) tuples; gauges of processes that are no
+            longer live are ignored when merging
+        """
+        snapshots = [(self.snapshot(), True)]
+        if not self.directory:
+            return snapshots
+        own = self._path(os.getpid())
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            if path == own:
+                continue
+            try:
+                with open(path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                # Removed by a fresh server start; skip it
+                continue
+            snapshots.append((snapshot, os.path.basename(path).startswith('worker-')))
+        return snapshots
+
+    def render(self):
+        """All processes' metrics merged, in the Prometheus text format"""
+        return render_text(merge_snapshots(self.collect()))
+
+
+def merge_snapshots(snapshots):
+    """
+    Combine per-process snapshots into one set of metrics
+
+    Counters and histograms are summed over every process, including ones
+    that exited (their counts happened); gauges are combined over live
+    processes according to their mode.
+
+    Returns:
+        {name: {'kind', 'help', 'labels', 'buckets', 'values': {label values: value}}}
+    """
+    merged = {}
+    for snapshot, live in snapshots:
+        pid = str(snapshot.get('pid', 'unknown'))
+        for name, metric in snapshot['metrics'].items():
+            kind = metric['kind']
+            if kind == 'gauge' and not live:
+                continue
+            target = merged.get(name)
+            if target is None:
+                labels = list(metric['labels'])
+                if kind == 'gauge' and metric.get('mode') == 'all':
+                    labels.append('pid')
+                target = merged[name] = {'kind': kind, 'help': metric['help'], 'labels': labels,
+                                         'buckets': metric.get('buckets'), 'values': {}}
+            values = target['values']
+
+            for key, value in metric['samples']:
+                key = tuple(key)
+                if kind == 'histogram':
+                    entry = values.get(key)
+                    if entry is None:
+                        values[key] = {'buckets': list(value['buckets']), 'sum': value['sum'],
+                                       'count': value['count']}
+                    else:
+                        entry['buckets'] = [a + b for a, b in zip(entry['buckets'], value['buckets'])]
+                        entry['sum'] += value['sum']
+                        entry['count'] += value['count']
+                elif kind == 'gauge' and metric.get('mode') == 'all':
+                    values[key + (pid,)] = value
+                elif kind == 'gauge' and metric.get('mode') == 'max':
+                    values[key] = max(values.get(key, value), value)
+                else:
+                    values[key] = values.get(key, 0) + value
+    return merged
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def render_text(merged):
+    """Render merged metrics in the Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric['labels']
+        for key in sorted(metric['values']):
+            value = metric['values'][key]
+            if metric['kind'] == 'histogram':
+                cumulative = 0
+                bounds = list(metric['buckets']) + [math.inf]
+                for bound, count in zip(bounds, value['buckets']):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(names, key, [('le', _format_value(float(bound)))])} "
+                                 f"{cumulative}")
+                lines.append(f"{name}_sum{_labels(names, key)} {_format_value(float(value['sum']))}")
+                lines.append(f"{name}_count{_labels(names, key)} {value['count']}")
+            else:
+                lines.append(f"{name}{_labels(names, key)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def mark_process_dead(pid, directory=METRICS_DIR):
+    """
+    Keep an exited worker's counters but stop reporting its gauges
+
+    Call from the server's child-exit hook (see backend/gunicorn.conf.py).
+    """
+    if not directory:
+        return
+    path = os.path.join(directory, f"worker-{pid}.json")
+    if os.path.exists(path):
+        # Unique name: the pid may be reused by a later worker
+        os.replace(path, os.path.join(directory, f"dead-{pid}-{time.time_ns()}.json"))
+
+
+def clear_directory(directory=METRICS_DIR):
+    """Remove snapshots of a previous server run (call once, before workers start)"""
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.json')) + glob.glob(os.path.join(directory, '*.tmp')):
+        os.remove(path)
+
+
+def process_rss_bytes():
+    """Resident set size of this process (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# Process-wide registry and the pipeline metrics updated from library code
+REGISTRY = MetricsRegistry()
+
+TWEETS_SCRAPED = REGISTRY.counter('tweets_scraped_total', 'Tweets fetched from a scraper', ['source'])
+TWEETS_SCORED = REGISTRY.counter('tweets_scored_total', 'Tweets cleaned and scored', ['engine'])
+CACHE_REQUESTS = REGISTRY.counter('cache_requests_total', 'Result cache lookups by outcome (hit or miss)',
+                                  ['cache', 'result'])
+PROCESS_RSS = REGISTRY.gauge('process_resident_memory_bytes', 'Resident memory of each worker process',
+                             mode='all')
+
+# Server metrics, recorded the same way by the Flask and ASGI backends
+REQUEST_COUNT = REGISTRY.counter(
+    'http_requests_total', 'HTTP requests by endpoint and status', ['method', 'endpoint', 'status'])
+REQUEST_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Request latency, until the last byte of streamed responses',
+    ['method', 'endpoint'])
+STAGE_DURATION = REGISTRY.histogram(
+    'request_stage_duration_seconds', 'Time spent in each stage of a request', ['endpoint', 'stage'])
+ANALYSES_IN_FLIGHT = REGISTRY.gauge(
+    'analyses_in_flight', 'Analysis requests being processed', ['endpoint'])
+RESULT_STORE_BYTES = REGISTRY.gauge(
+    'result_store_bytes', 'Estimated memory held by in-memory results', ['store'])
+RESULT_STORE_ENTRIES = REGISTRY.gauge(
+    'result_store_entries', 'Entries held by in-memory result stores', ['store'])
+ANALYTICS_STORE_BYTES = REGISTRY.gauge(
+    'analytics_store_bytes', 'Size of the analytics SQLite database on disk', mode='max')
+ANALYSES_QUEUED = REGISTRY.gauge(
+    'analyses_queued', 'Analysis requests waiting for a concurrency slot')
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    'admission_rejections_total', 'Analysis requests rejected with 429', ['reason'])
+
+
+def observe_request(timer, method, endpoint, status):
+    """Record a finished request's count, latency and stage durations from its StageTimer"""
+    REQUEST_COUNT.inc(method=method, endpoint=endpoint, status=status)
+    REQUEST_LATENCY.observe(timer.total, method=method, endpoint=endpoint)
+    for name, seconds in timer.stages.items():
+        STAGE_DURATION.observe(seconds, endpoint=endpoint, stage=name)
+
+
+def file_bytes(*paths):
+    """Combined size of the files that exist among paths"""
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def _collect_rss():
+    rss = process_rss_bytes()
+    if rss is not None:
+        PROCESS_RSS.set(rss)
+
+
+REGISTRY.add_collector(_collect_rss)
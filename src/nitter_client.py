@@ -0,0 +1,343 @@
+"""
+Nitter Client
+Long-lived HTTP client for Nitter instances with a persisted, TTL-based
+instance health cache, latency-ranked instance selection, pooled
+connections, jittered retry backoff and failover across instances
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+
+# Defaults (overridable through environment variables)
+INSTANCE_LIST_URL = 'https://raw.githubusercontent.com/libredirect/instances/main/data.json'
+HEALTH_CACHE_PATH = os.environ.get(
+    'NITTER_HEALTH_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'nitter_instances.json')
+)
+HEALTH_TTL_SECONDS = float(os.environ.get('NITTER_HEALTH_TTL', 3600))
+QUARANTINE_SECONDS = float(os.environ.get('NITTER_QUARANTINE', 60))
+REQUEST_TIMEOUT = float(os.environ.get('NITTER_TIMEOUT', 10))
+MAX_RETRIES = int(os.environ.get('NITTER_MAX_RETRIES', 4))
+BACKOFF_BASE = float(os.environ.get('NITTER_BACKOFF_BASE', 1.0))
+BACKOFF_MAX = float(os.environ.get('NITTER_BACKOFF_MAX', 30.0))
+PAGE_DELAY = float(os.environ.get('NITTER_PAGE_DELAY', 1.0))
+
+PROBE_PATH = '/search?f=tweets&q=news&scroll=false'
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0'
+
+
+class NitterError(RuntimeError):
+    """Raised when no Nitter instance could serve a request"""
+
+
+def default_instances():
+    """
+    Nitter instances to use: NITTER_INSTANCES (comma-separated) if set,
+    otherwise the public clearnet list published by LibRedirect
+
+    Returns:
+        List of base URLs
+    """
+    configured = os.environ.get('NITTER_INSTANCES')
+    if configured:
+        return [url.strip().rstrip('/') for url in configured.split(',') if url.strip()]
+
+    response = requests.get(INSTANCE_LIST_URL, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return [url.rstrip('/') for url in response.json()['nitter']['clearnet']]
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class InstanceHealthCache:
+    """
+    Per-instance health and latency, persisted as JSON between runs
+
+    Healthy entries are trusted for `ttl` seconds. Failing instances are
+    quarantined for QUARANTINE_SECONDS, doubling with each consecutive
+    failure (capped at the TTL). Latency is an exponentially weighted average.
+    """
+
+    def __init__(self, path=HEALTH_CACHE_PATH, ttl=HEALTH_TTL_SECONDS, quarantine=QUARANTINE_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.quarantine = quarantine
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the cache atomically (no-op without a path)"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = json.dumps(self.entries, indent=2)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def record(self, instance, healthy, latency=None):
+        """Record the outcome of a probe or request"""
+        with self._lock:
+            entry = self.entries.get(instance, {})
+            if healthy:
+                previous = entry.get('latency') if entry.get('healthy') else None
+                entry['latency'] = latency if previous is None else 0.7 * previous + 0.3 * latency
+                entry['failures'] = 0
+            else:
+                entry['failures'] = entry.get('failures', 0) + 1
+            entry['healthy'] = healthy
+            entry['checked_at'] = time.time()
+            self.entries[instance] = entry
+
+    def is_fresh(self, instance):
+        """Whether the cached state of an instance can be trusted without probing"""
+        entry = self.entries.get(instance)
+        if not entry:
+            return False
+        age = time.time() - entry['checked_at']
+        if entry['healthy']:
+            return age < self.ttl
+        return age < min(self.ttl, self.quarantine * 2 ** (entry['failures'] - 1))
+
+    def ranked(self, instances):
+        """
+        Usable instances, fastest first
+
+        Returns:
+            Healthy instances ordered by latency, followed by instances whose
+            state is unknown or expired; quarantined instances are left out
+        """
+        healthy, unknown = [], []
+        for instance in instances:
+            entry = self.entries.get(instance)
+            if not self.is_fresh(instance):
+                unknown.append(instance)
+            elif entry['healthy']:
+                healthy.append(instance)
+        healthy.sort(key=lambda instance: self.entries[instance]['latency'])
+        return healthy + unknown
+
+
+def parse_timeline(html):
+    """
+    Extract tweets and the next-page cursor from a Nitter timeline page
+
+    Args:
+        html: Page HTML
+
+    Returns:
+        (list of tweet dictionaries in ntscraper's shape, next cursor or None)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    tweets = []
+
+    for item in soup.find_all('div', class_='timeline-item'):
+        if item.get('class') != ['timeline-item']:
+            continue  # threads, "show more" rows
+
+        date_span = item.find('span', class_='tweet-date')
+        link = date_span.find('a') if date_span else None
+        content = item.find('div', class_='tweet-content')
+        username = item.find('a', class_='username')
+
+        stats = [stat.get_text(strip=True).replace(',', '') for stat in item.find_all('span', class_='tweet-stat')]
+        stats = [int(value) if value.isdigit() else 0 for value in stats] + [0] * 4
+
+        tweets.append({
+            'link': 'https://twitter.com' + link['href'] if link and link.get('href') else '',
+            'text': content.get_text(' ', strip=True) if content else '',
+            'date': link.get('title', '') if link else '',
+            'user': {'username': username.get_text(strip=True) if username else 'unknown'},
+            'stats': {'comments': stats[0], 'retweets': stats[1], 'quotes': stats[2], 'likes': stats[3]},
+        })
+
+    cursor = None
+    show_more = soup.find_all('div', class_='show-more')
+    if show_more and show_more[-1].find('a'):
+        query = urlsplit(show_more[-1].find('a').get('href', '')).query
+        cursor = parse_qs(query).get('cursor', [None])[0]
+
+    return tweets, cursor
+
+
+def is_error_page(html):
+    """Nitter serves rate-limit and instance errors as 200 pages with an error panel"""
+    return 'class="error-panel"' in html or "class='error-panel'" in html
+
+
+class NitterClient:
+    """
+    Shared Nitter client
+
+    One requests.Session keeps connections to every instance alive. Each
+    request goes to the fastest healthy instance; on a connection error,
+    timeout, 429/5xx or error page the instance is quarantined and the next
+    one is tried, with jittered exponential backoff between rounds.
+    """
+
+    def __init__(self, instances=None, cache=None, timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, page_delay=PAGE_DELAY,
+                 probe_workers=8, sleep=time.sleep):
+        self._instances = [url.rstrip('/') for url in instances] if instances else None
+        self.cache = cache if cache is not None else InstanceHealthCache()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.page_delay = page_delay
+        self.probe_workers = probe_workers
+        self.sleep = sleep
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=probe_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT})
+
+    @property
+    def instances(self):
+        if self._instances is None:
+            self._instances = default_instances()
+        return self._instances
+
+    def probe(self, instance):
+        """
+        Check one instance with a small search request
+
+        Returns:
+            True if the instance served a timeline
+        """
+        started = time.perf_counter()
+        try:
+            response = self.session.get(instance + PROBE_PATH, timeout=self.timeout)
+            healthy = response.status_code == 200 and not is_error_page(response.text)
+        except requests.RequestException:
+            healthy = False
+        self.cache.record(instance, healthy, time.perf_counter() - started)
+        return healthy
+
+    def refresh(self, force=False):
+        """
+        Probe instances whose cached health is missing or expired (concurrently)
+
+        Args:
+            force: Probe every instance regardless of the cache
+        """
+        stale = [instance for instance in self.instances if force or not self.cache.is_fresh(instance)]
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.probe_workers, len(stale))) as pool:
+                list(pool.map(self.probe, stale))
+            self.cache.save()
+
+    def ranked_instances(self):
+        """Usable instances, fastest first (probing only stale ones)"""
+        self.refresh()
+        return [instance for instance in self.cache.ranked(self.instances)
+                if self.cache.entries.get(instance, {}).get('healthy')]
+
+    def get_page(self, path, params=None):
+        """
+        Fetch a page from the best available instance, failing over and
+        backing off as needed
+
+        Returns:
+            (html, instance) tuple
+        """
+        last_error = None
+        for attempt in range(self.max_retries):
+            candidates = self.ranked_instances()
+            if not candidates:
+                # Everything is quarantined: re-probe rather than give up
+                self.refresh(force=True)
+                candidates = self.ranked_instances()
+            if not candidates:
+                last_error = 'no healthy instances'
+
+            for instance in candidates:
+                started = time.perf_counter()
+                try:
+                    response = self.session.get(instance + path, params=params, timeout=self.timeout)
+                except requests.RequestException as e:
+                    last_error = f"{instance}: {e}"
+                    self.cache.record(instance, False)
+                    continue
+
+                if response.status_code == 200 and not is_error_page(response.text):
+                    self.cache.record(instance, True, time.perf_counter() - started)
+                    return response.text, instance
+
+                last_error = f"{instance}: HTTP {response.status_code}"
+                if response.status_code == 404:
+                    raise NitterError(f"Not found: {path}")
+                self.cache.record(instance, False)
+
+            self.cache.save()
+            if attempt < self.max_retries - 1:
+                self.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+        self.cache.save()
+        raise NitterError(f"All Nitter instances failed after {self.max_retries} rounds ({last_error})")
+
+    def iter_pages(self, query, mode='term', cursor=None, language=None):
+        """
+        Page through a search or user timeline, newest first
+
+        Args:
+            query: Search term, or username for mode='user'
+            mode: 'term' or 'user'
+            cursor: Cursor to continue from (from an earlier page)
+            language: Optional language filter for searches (e.g. 'en')
+
+        Yields:
+            (tweets, next cursor) per page; next cursor is None on the last page
+        """
+        if mode == 'term':
+            path = '/search'
+            params = {'f': 'tweets', 'q': f"{query} lang:{language}" if language else query}
+        elif mode == 'user':
+            path = f"/{query.lstrip('@')}"
+            params = {}
+        else:
+            raise ValueError(f"Invalid mode: {mode}. Use 'term' or 'user'")
+
+        first = True
+        while True:
+            if not first:
+                self.sleep(self.page_delay * random.uniform(0.5, 1.5))
+            first = False
+
+            page_params = dict(params, cursor=cursor) if cursor else params
+            html, _ = self.get_page(path, page_params)
+            tweets, cursor = parse_timeline(html)
+            yield tweets, cursor
+            if not tweets or not cursor:
+                return
+
+    def close(self):
+        self.session.close()
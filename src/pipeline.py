@@ -0,0 +1,397 @@
+"""
+End-to-End Pipeline
+Runs scrape -> clean/score -> aggregate -> render in one process, with the
+stages connected by bounded queues so scoring starts on the first batch
+while scraping continues
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+import pandas as pd
+
+from scrape_tweets import iter_tweet_batches
+from clean_and_analyze import analyze_dataframe, download_nltk_data, load_stopwords, print_summary
+from sentiment_engines import SENTIMENT_ENGINES, DEFAULT_ENGINE
+from aggregates import AnalysisAggregator
+from analytics_store import AnalyticsStore, DEFAULT_DB_PATH
+from timeline import GRANULARITIES
+
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_QUEUE_SIZE = 4
+
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage has failed"""
+
+
+class StageStats:
+    """Work done by one stage: batches, rows and time spent busy"""
+
+    def __init__(self, name):
+        self.name = name
+        self.batches = 0
+        self.rows = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    def report(self):
+        elapsed = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'busy_seconds': round(self.busy, 3),
+            'rows_per_second': round(self.rows / self.busy, 1) if self.busy else None,
+            'utilization': round(self.busy / elapsed, 3) if elapsed > 0 else None,
+            'error': str(self.error) if self.error else None,
+        }
+
+
+class MonitoredQueue:
+    """
+    Bounded queue between two stages
+
+    Records how full it is at every put/get and how long the producer spent
+    blocked on a full queue (downstream is the bottleneck) or the consumer
+    waited on an empty one (upstream is the bottleneck).
+    """
+
+    def __init__(self, name, maxsize, stop):
+        self.name = name
+        self.maxsize = maxsize
+        self.stop = stop
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._occupancy_sum = 0
+        self._samples = 0
+        self.max_occupancy = 0
+        self.producer_blocked = 0.0
+        self.consumer_waited = 0.0
+
+    def _sample(self):
+        size = self._queue.qsize()
+        self._occupancy_sum += size
+        self._samples += 1
+        self.max_occupancy = max(self.max_occupancy, size)
+
+    def put(self, item):
+        started = time.perf_counter()
+        while True:
+            if self.stop.is_set():
+                raise PipelineAborted()
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.producer_blocked += time.perf_counter() - started
+        self._sample()
+
+    def get(self):
+        started = time.perf_counter()
+        while True:
+            if self.stop.is_set():
+                raise PipelineAborted()
+            try:
+                item = self._queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        self.consumer_waited += time.perf_counter() - started
+        self._sample()
+        return item
+
+    def report(self):
+        return {
+            'capacity': self.maxsize,
+            'mean_occupancy': round(self._occupancy_sum / self._samples, 2) if self._samples else 0.0,
+            'max_occupancy': self.max_occupancy,
+            'producer_blocked_seconds': round(self.producer_blocked, 3),
+            'consumer_waited_seconds': round(self.consumer_waited, 3),
+        }
+
+
+def _run_stage(stats, stop, work, inbox=None, outbox=None, source=None):
+    """
+    Stage loop: take batches from a source iterator or the inbox queue, process
+    them and pass results on; always forwards the end marker downstream
+
+    Args:
+        stats: StageStats to fill in
+        stop: Event set when any stage fails
+        work: Function batch -> result (None to pass nothing on)
+        inbox: MonitoredQueue to read from (consumer stages)
+        outbox: MonitoredQueue to write to (optional)
+        source: Iterator of batches (the first stage; time spent in it counts as busy)
+    """
+    stats.started = time.perf_counter()
+    try:
+        while True:
+            if source is not None:
+                started = time.perf_counter()
+                batch = next(source, _DONE)
+                stats.busy += time.perf_counter() - started
+            else:
+                batch = inbox.get()
+            if batch is _DONE:
+                break
+
+            started = time.perf_counter()
+            result = work(batch)
+            stats.busy += time.perf_counter() - started
+            stats.batches += 1
+            stats.rows += len(batch)
+
+            if outbox is not None and result is not None:
+                outbox.put(result)
+
+        if outbox is not None:
+            outbox.put(_DONE)
+    except PipelineAborted:
+        pass
+    except Exception as e:
+        stats.error = e
+        stop.set()
+    finally:
+        stats.finished = time.perf_counter()
+
+
+def run_pipeline(query, max_tweets=1000, batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE,
+                 source='snscrape', language='en', since_date=None, until_date=None,
+                 engine=DEFAULT_ENGINE, stop_words=None, raw_output=None, output_file=None,
+                 plots_dir=None, granularity='auto', store=None):
+    """
+    Scrape, clean, score, aggregate and render in one process
+
+    Each stage runs on its own thread; bounded queues between them keep at
+    most queue_size batches in flight, so memory stays flat and a slow stage
+    holds back the ones before it instead of piling up work. Charts are
+    rendered from the scored CSV once every batch has been aggregated.
+
+    Args:
+        query: Search query
+        max_tweets: Maximum number of tweets to scrape
+        batch_size: Tweets per batch
+        queue_size: Batches each queue can hold
+        source: 'snscrape' (falls back to sample data) or 'nitter'
+        language: Language filter for Nitter searches
+        since_date, until_date: Date range (snscrape)
+        engine: Sentiment engine name
+        stop_words: Stopword set to drop while cleaning (optional)
+        raw_output: CSV path for the raw scraped tweets (optional)
+        output_file: CSV path for the scored tweets (required to render)
+        plots_dir: Directory for charts (optional)
+        granularity: Timeline granularity for the charts and summary
+        store: AnalyticsStore to persist scored tweets into (optional)
+
+    Returns:
+        Dictionary with the /api/analyze-shaped 'summary', the 'aggregator',
+        per-stage 'stages' stats, per-queue 'queues' stats, stage 'errors'
+        and 'elapsed_seconds'
+    """
+    if source == 'nitter':
+        from scrape_tweets_ntscraper import get_client, iter_tweet_batches as iter_nitter_batches
+
+        def scraped():
+            remaining = max_tweets
+            for tweets, _ in iter_nitter_batches(get_client(), query, 'term', batch_size, language=language):
+                yield pd.DataFrame(tweets[:remaining])
+                remaining -= min(len(tweets), remaining)
+                if remaining <= 0:
+                    return
+        batches = scraped()
+    else:
+        batches = iter_tweet_batches(query, max_tweets, batch_size, since_date, until_date)
+
+    for path in (raw_output, output_file):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    stop = threading.Event()
+    scraped_queue = MonitoredQueue('scrape -> score', queue_size, stop)
+    scored_queue = MonitoredQueue('score -> aggregate', queue_size, stop)
+    stages = {name: StageStats(name) for name in ('scrape', 'clean+score', 'aggregate', 'render')}
+
+    aggregator = AnalysisAggregator()
+    run_id = store.start_run(query, source='pipeline', engine=engine) if store else None
+    written = {'raw': False, 'scored': False}
+
+    def save_raw(df):
+        if raw_output:
+            df.to_csv(raw_output, mode='a' if written['raw'] else 'w', header=not written['raw'],
+                      index=False, encoding='utf-8')
+            written['raw'] = True
+        return df
+
+    def score(df):
+        if 'content' not in df.columns or df.empty:
+            return None
+        return analyze_dataframe(df, stop_words, engine=engine)
+
+    def aggregate(df):
+        aggregator.update(df)
+        if store:
+            store.add_tweets(run_id, query, df)
+        if output_file:
+            df.to_csv(output_file, mode='a' if written['scored'] else 'w', header=not written['scored'],
+                      index=False, encoding='utf-8')
+            written['scored'] = True
+        print(f"Processed {aggregator.summary.total} tweets...")
+
+    threads = [
+        threading.Thread(target=_run_stage, name='pipeline-scrape',
+                         args=(stages['scrape'], stop, save_raw),
+                         kwargs={'source': iter(batches), 'outbox': scraped_queue}),
+        threading.Thread(target=_run_stage, name='pipeline-score',
+                         args=(stages['clean+score'], stop, score),
+                         kwargs={'inbox': scraped_queue, 'outbox': scored_queue}),
+        threading.Thread(target=_run_stage, name='pipeline-aggregate',
+                         args=(stages['aggregate'], stop, aggregate),
+                         kwargs={'inbox': scored_queue}),
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    errors = {name: stats.error for name, stats in stages.items() if stats.error}
+    if not errors and plots_dir and written['scored']:
+        from visualize import visualize_batch
+
+        render = stages['render']
+        render.started = time.perf_counter()
+        try:
+            visualize_batch([output_file], plots_dir, granularity)
+            render.batches, render.rows = 1, aggregator.summary.total
+        except Exception as e:
+            render.error = errors['render'] = e
+        render.finished = time.perf_counter()
+        render.busy = render.finished - render.started
+
+    return {
+        'summary': aggregator.response(query, engine, granularity),
+        'aggregator': aggregator,
+        'run_id': run_id,
+        'errors': {name: str(error) for name, error in errors.items()},
+        'stages': {name: stats.report() for name, stats in stages.items() if stats.started},
+        'queues': {q.name: q.report() for q in (scraped_queue, scored_queue)},
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def print_pipeline_report(result):
+    """Print per-stage throughput and queue occupancy"""
+    print("\n" + "="*70)
+    print("PIPELINE REPORT")
+    print("="*70)
+    print(f"{'Stage':<14}{'Batches':>9}{'Rows':>10}{'Busy s':>10}{'Rows/s':>12}{'Utilization':>14}")
+    for name, stats in result['stages'].items():
+        rate = f"{stats['rows_per_second']:.1f}" if stats['rows_per_second'] else '-'
+        utilization = f"{stats['utilization'] * 100:.0f}%" if stats['utilization'] is not None else '-'
+        print(f"{name:<14}{stats['batches']:>9}{stats['rows']:>10}{stats['busy_seconds']:>10.2f}"
+              f"{rate:>12}{utilization:>14}")
+
+    print(f"\n{'Queue':<22}{'Capacity':>9}{'Mean':>8}{'Max':>6}{'Producer blocked s':>20}{'Consumer waited s':>19}")
+    for name, stats in result['queues'].items():
+        print(f"{name:<22}{stats['capacity']:>9}{stats['mean_occupancy']:>8.2f}{stats['max_occupancy']:>6}"
+              f"{stats['producer_blocked_seconds']:>20.2f}{stats['consumer_waited_seconds']:>19.2f}")
+
+    serial = sum(stats['busy_seconds'] for stats in result['stages'].values())
+    print(f"\nWall time: {result['elapsed_seconds']:.2f}s "
+          f"(sum of stage busy time: {serial:.2f}s)")
+    print("="*70)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Scrape, analyze and visualize tweets in one overlapped pipeline')
+    parser.add_argument('--query', type=str, required=True,
+                        help='Search query (e.g., "climate change", "#AI")')
+    parser.add_argument('--max-tweets', type=int, default=1000,
+                        help='Maximum number of tweets to scrape (default: 1000)')
+    parser.add_argument('--source', type=str, default='snscrape', choices=['snscrape', 'nitter'],
+                        help='Scraper to use (default: snscrape, falling back to sample data)')
+    parser.add_argument('--language', type=str, default='en',
+                        help='Language filter for Nitter searches (default: en)')
+    parser.add_argument('--since', type=str, default=None,
+                        help='Start date in YYYY-MM-DD format')
+    parser.add_argument('--until', type=str, default=None,
+                        help='End date in YYYY-MM-DD format')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Tweets per batch (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'Batches buffered between stages (default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--engine', type=str, default=DEFAULT_ENGINE, choices=list(SENTIMENT_ENGINES),
+                        help=f'Sentiment engine (default: {DEFAULT_ENGINE})')
+    parser.add_argument('--remove-stopwords', action='store_true',
+                        help='Remove stopwords from text')
+    parser.add_argument('--raw-output', type=str, default=None,
+                        help='Also save the raw scraped tweets to this CSV')
+    parser.add_argument('--output', type=str, default='data/tweets_analyzed.csv',
+                        help='Output CSV with analyzed tweets (default: data/tweets_analyzed.csv)')
+    parser.add_argument('--plots-dir', type=str, default='plots',
+                        help='Output directory for plots (default: plots)')
+    parser.add_argument('--no-render', action='store_true',
+                        help='Skip the charts')
+    parser.add_argument('--granularity', type=str, default='auto', choices=['auto', *GRANULARITIES],
+                        help='Timeline bucket size (default: auto, chosen from the data span)')
+    parser.add_argument('--store', type=str, nargs='?', const=DEFAULT_DB_PATH, default=None,
+                        help=f'Persist scored tweets to the analytics store (default path: {DEFAULT_DB_PATH})')
+    parser.add_argument('--stats-json', type=str, default=None,
+                        help='Write the stage and queue statistics as JSON to this path')
+
+    args = parser.parse_args()
+
+    download_nltk_data()
+    stop_words = load_stopwords() if args.remove_stopwords else None
+
+    result = run_pipeline(
+        query=args.query,
+        max_tweets=args.max_tweets,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        source=args.source,
+        language=args.language,
+        since_date=args.since,
+        until_date=args.until,
+        engine=args.engine,
+        stop_words=stop_words,
+        raw_output=args.raw_output,
+        output_file=args.output,
+        plots_dir=None if args.no_render else args.plots_dir,
+        granularity=args.granularity,
+        store=AnalyticsStore(args.store) if args.store else None
+    )
+
+    total = result['summary']['total_tweets']
+    if total:
+        print_summary(result['aggregator'].summary, entities=result['aggregator'].entities)
+        print(f"\nScored tweets saved to: {args.output}")
+    print_pipeline_report(result)
+
+    if args.stats_json:
+        with open(args.stats_json, 'w', encoding='utf-8') as f:
+            json.dump({key: result[key] for key in ('stages', 'queues', 'elapsed_seconds', 'errors')}, f, indent=2)
+        print(f"Statistics saved to: {args.stats_json}")
+
+    if result['errors']:
+        for stage, error in result['errors'].items():
+            print(f"❌ {stage} failed: {error}")
+    elif not total:
+        print("❌ No tweets found or error occurred during scraping.")
+    else:
+        print("\n✓ Pipeline complete!")
+
+
+if __name__ == "__main__":
+    main()
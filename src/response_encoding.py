@@ -0,0 +1,213 @@
+"""
+Response Encodings
+Content negotiation between row JSON (the default), columnar JSON,
+MessagePack and Arrow IPC streams. Tabular results are encoded straight from
+their DataFrame, one array per column, instead of through per-row dicts
+"""
+
+import json
+
+import pandas as pd
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+JSON_MEDIA_TYPE = 'application/json'
+COLUMNAR_MEDIA_TYPE = 'application/vnd.sentiment.columnar+json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Format name -> response media type
+FORMATS = {
+    'json': JSON_MEDIA_TYPE,
+    'columnar': COLUMNAR_MEDIA_TYPE,
+    'msgpack': MSGPACK_MEDIA_TYPE,
+    'arrow': ARROW_MEDIA_TYPE,
+}
+# Accept header media type -> format name
+MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: 'json',
+    COLUMNAR_MEDIA_TYPE: 'columnar',
+    MSGPACK_MEDIA_TYPE: 'msgpack',
+    'application/x-msgpack': 'msgpack',
+    ARROW_MEDIA_TYPE: 'arrow',
+}
+
+
+class EncodingUnavailable(Exception):
+    """A format was requested whose library isn't installed (406)"""
+
+
+def available(fmt):
+    """Whether a format's library is installed"""
+    if fmt == 'msgpack':
+        return msgpack is not None
+    if fmt == 'arrow':
+        return pa is not None
+    return fmt in FORMATS
+
+
+def parse_accept(accept):
+    """
+    Media types of an Accept header, most preferred first
+
+    Returns:
+        List of lower-cased media types (q=0 entries dropped)
+    """
+    entries = []
+    for position, part in enumerate((accept or '').split(',')):
+        media_type, *params = [p.strip() for p in part.split(';')]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            entries.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(entries)]
+
+
+def negotiate(accept=None, requested=None):
+    """
+    Pick the response format
+
+    A ?format= parameter wins over the Accept header. Accept types that
+    aren't supported (or whose library is missing) are skipped, and anything
+    else falls back to row JSON, as before.
+
+    Args:
+        accept: Accept header value
+        requested: Explicit format name ('json', 'columnar', 'msgpack' or 'arrow')
+
+    Returns:
+        Format name
+
+    Raises:
+        ValueError: On an unknown requested format
+        EncodingUnavailable: If the requested format's library isn't installed
+    """
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown format '{requested}'. Choose from: {', '.join(FORMATS)}")
+        if not available(requested):
+            raise EncodingUnavailable(f"The {requested} format needs {'pyarrow' if requested == 'arrow' else requested} "
+                                      f"installed on the server")
+        return requested
+    for media_type in parse_accept(accept):
+        fmt = MEDIA_TYPES.get(media_type)
+        if fmt and available(fmt):
+            return fmt
+    return 'json'
+
+
+def _column_values(series):
+    """A column as a list for MessagePack (dates as ISO 8601 strings, missing values as nil)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+    if series.dtype != object and not series.hasnans:
+        return series.tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _frame_columns_json(df):
+    """JSON object of one array per column, serialized by pandas"""
+    return '{' + ','.join(
+        json.dumps(str(name)) + ':' + df[name].to_json(orient='values', date_format='iso', date_unit='us')
+        for name in df.columns
+    ) + '}'
+
+
+def encode_frame(fmt, df, meta, key='dataframe'):
+    """
+    Encode a DataFrame with a few scalar fields in a non-row format
+
+    Columnar JSON and MessagePack give {**meta, 'columns': [names],
+    key: {name: [values]}}. Arrow gives a record batch stream of the frame
+    with meta as JSON under the schema metadata key 'meta'.
+
+    Args:
+        fmt: 'columnar', 'msgpack' or 'arrow'
+        df: DataFrame to encode
+        meta: Dictionary of scalar fields (e.g. topic, timestamp)
+        key: Name of the column object in the JSON and MessagePack forms
+
+    Returns:
+        Body (str or bytes)
+    """
+    if fmt == 'columnar':
+        head = json.dumps({**meta, 'columns': [str(name) for name in df.columns]}, sort_keys=True)
+        return f"{head[:-1]},{json.dumps(key)}:{_frame_columns_json(df)}}}\n"
+    if fmt == 'msgpack':
+        return msgpack.packb({**meta, 'columns': [str(name) for name in df.columns],
+                              key: {str(name): _column_values(df[name]) for name in df.columns}})
+    if fmt == 'arrow':
+        return _arrow_stream(pa.Table.from_pandas(df, preserve_index=False), meta)
+    raise ValueError(f"encode_frame does not handle format '{fmt}'")
+
+
+def rows_to_columns(value):
+    """
+    Turn every list of same-keyed dicts in a payload into {key: [values]}
+
+    Other values are left as they are, so the payload keeps its shape.
+    """
+    if isinstance(value, dict):
+        return {k: rows_to_columns(v) for k, v in value.items()}
+    if isinstance(value, list) and value and all(isinstance(row, dict) for row in value):
+        keys = list(value[0])
+        if all(list(row) == keys for row in value):
+            return {k: [rows_to_columns(row[k]) for row in value] for k in keys}
+    if isinstance(value, list):
+        return [rows_to_columns(v) for v in value]
+    return value
+
+
+def encode_payload(fmt, payload, table_key=None):
+    """
+    Encode a response dictionary in a non-row format
+
+    Columnar JSON and MessagePack transpose its row lists (rows_to_columns).
+    Arrow streams payload[table_key] as the table, with the rest of the
+    payload as JSON under the schema metadata key 'meta'.
+
+    Args:
+        fmt: 'columnar', 'msgpack' or 'arrow'
+        payload: Response dictionary
+        table_key: Key of the list of rows to stream as Arrow
+
+    Returns:
+        Body (str or bytes)
+    """
+    if fmt == 'columnar':
+        return json.dumps(rows_to_columns(payload), sort_keys=True, separators=(',', ':')) + '\n'
+    if fmt == 'msgpack':
+        return msgpack.packb(rows_to_columns(payload))
+    if fmt == 'arrow':
+        rows = payload.get(table_key) or []
+        meta = {k: v for k, v in payload.items() if k != table_key}
+        return _arrow_stream(pa.Table.from_pylist(rows), meta)
+    raise ValueError(f"encode_payload does not handle format '{fmt}'")
+
+
+def _arrow_stream(table, meta):
+    """Serialize a table as an Arrow IPC stream with JSON metadata"""
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'meta'] = json.dumps(meta, default=str).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
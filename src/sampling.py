@@ -0,0 +1,286 @@
+"""
+Sampled Analysis
+Reservoir sampling over the scraped stream, with confidence intervals for
+sentiment proportions and the mean score, stopping scraping and scoring as
+soon as a requested margin of error is reached
+"""
+
+import math
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from clean_and_analyze import analyze_dataframe
+from sentiment_engines import DEFAULT_ENGINE
+
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+# Defaults (overridable through environment variables)
+DEFAULT_SAMPLE_SIZE = int(os.environ.get('SAMPLE_SIZE', 1000))
+DEFAULT_CONFIDENCE = float(os.environ.get('SAMPLE_CONFIDENCE', 0.95))
+# Don't stop on fewer tweets than this, however narrow the interval looks
+MIN_SAMPLE = int(os.environ.get('SAMPLE_MIN', 100))
+# Scrape in small batches so the stopping rule is checked often
+SAMPLE_BATCH_SIZE = int(os.environ.get('SAMPLE_BATCH_SIZE', 100))
+# Upper bound on tweets fetched in sampled mode when max_tweets isn't given
+SAMPLE_MAX_TWEETS = int(os.environ.get('SAMPLE_MAX_TWEETS', 5000))
+
+
+def z_value(confidence):
+    """Two-sided normal critical value, e.g. 1.96 for 0.95"""
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def required_sample_size(margin_of_error, confidence=DEFAULT_CONFIDENCE):
+    """Sample size that bounds the margin of any proportion (worst case p = 0.5)"""
+    z = z_value(confidence)
+    return math.ceil(z * z * 0.25 / (margin_of_error * margin_of_error))
+
+
+def wilson_interval(successes, n, z):
+    """
+    Wilson score interval for a proportion
+
+    Returns:
+        (estimate, low, high)
+    """
+    if n == 0:
+        return 0.0, 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return p, max(0.0, center - half), min(1.0, center + half)
+
+
+def estimate(compound, labels, confidence=DEFAULT_CONFIDENCE):
+    """
+    Sentiment proportions and mean score with confidence intervals
+
+    Args:
+        compound: Array of compound scores of the sampled tweets
+        labels: Array of their sentiment labels
+        confidence: Confidence level (e.g. 0.95)
+
+    Returns:
+        Dictionary with 'proportions' ({label: estimate/low/high/margin}),
+        'mean_score' (estimate/low/high/margin) and 'margin_of_error' (the
+        widest proportion margin)
+    """
+    z = z_value(confidence)
+    n = len(compound)
+    labels = np.asarray(labels)
+
+    proportions = {}
+    for label in SENTIMENTS:
+        p, low, high = wilson_interval(int((labels == label).sum()), n, z)
+        proportions[label] = {'estimate': round(p, 4), 'low': round(low, 4), 'high': round(high, 4),
+                              'margin': round((high - low) / 2, 4)}
+
+    mean = float(np.mean(compound)) if n else 0.0
+    half = z * float(np.std(compound, ddof=1)) / math.sqrt(n) if n > 1 else 1.0
+    return {
+        'proportions': proportions,
+        'mean_score': {'estimate': round(mean, 4), 'low': round(mean - half, 4),
+                       'high': round(mean + half, 4), 'margin': round(half, 4)},
+        'margin_of_error': max(entry['margin'] for entry in proportions.values()),
+    }
+
+
+class ReservoirSampler:
+    """
+    Uniform fixed-size sample of a stream (Algorithm R), filled batch by batch
+
+    The i-th item seen (0-based) replaces a random slot with probability
+    capacity / (i + 1), so at any point every item seen so far is in the
+    reservoir with equal probability.
+    """
+
+    def __init__(self, capacity, seed=None):
+        self.capacity = capacity
+        self.seen = 0
+        self.items = []
+        self._rng = np.random.default_rng(seed)
+
+    def offer(self, count):
+        """
+        Decide which of the next `count` stream items enter the reservoir
+
+        Returns:
+            Dictionary of slot -> position in the batch; when several items of
+            the batch land in the same slot only the last one is kept, so
+            items that would be evicted straight away are never processed
+        """
+        positions = np.arange(self.seen, self.seen + count)
+        slots = positions.copy()
+        full = positions >= self.capacity
+        if full.any():
+            drawn = self._rng.integers(0, positions[full] + 1)
+            slots[full] = np.where(drawn < self.capacity, drawn, -1)
+        self.seen += count
+        return {int(slot): i for i, slot in enumerate(slots) if slot >= 0}
+
+    def place(self, slot, item):
+        """Put an item in a slot returned by offer()"""
+        if slot == len(self.items):
+            self.items.append(item)
+        else:
+            self.items[slot] = item
+
+
+class SampledAnalysis:
+    """
+    Reservoir and stopping rule of a sampled analysis, batch by batch
+
+    The caller scores the rows offer() picks from each raw batch (in process
+    for analyze_sampled, in a process pool for the ASGI backend) and hands
+    them to add(), which says when the estimate is precise enough to stop.
+    Reservoir slots hold (scored batch, row) references, and the scores and
+    labels the estimate needs are kept in arrays, so a batch costs a few
+    array updates rather than a pass over the whole sample.
+
+    Args:
+        sample_size, margin_of_error, confidence, min_sample, seed: As in analyze_sampled
+    """
+
+    def __init__(self, sample_size=None, margin_of_error=None, confidence=DEFAULT_CONFIDENCE,
+                 min_sample=MIN_SAMPLE, seed=None):
+        self.capacity = sample_size or DEFAULT_SAMPLE_SIZE
+        if margin_of_error and not sample_size:
+            self.capacity = max(self.capacity, required_sample_size(margin_of_error, confidence))
+        self.margin_of_error = margin_of_error
+        self.confidence = confidence
+        self.min_sample = min_sample
+        self.reservoir = ReservoirSampler(self.capacity, seed)
+        self.stopped_early = False
+        self.current = None
+
+        # Per slot; NaN marks an empty slot or a tweet that was empty after cleaning
+        self.compound = np.full(self.capacity, np.nan)
+        self.labels = np.full(self.capacity, '', dtype=object)
+        # Scored batches still referenced by a slot, and how many slots use each
+        self.frames = {}
+        self.references = {}
+        self.batches = 0
+
+    def offer(self, batch):
+        """
+        Pick the tweets of a raw batch that enter the reservoir
+
+        Returns:
+            (slot -> batch position dictionary, DataFrame of the rows to score)
+        """
+        entering = self.reservoir.offer(len(batch))
+        return entering, batch.iloc[list(entering.values())]
+
+    def add(self, batch, entering, scored):
+        """
+        Place the scored rows picked by offer() and update the estimate
+
+        Returns:
+            True once the margin of error is reached (stop scraping)
+        """
+        if entering:
+            frame = self.batches
+            self.batches += 1
+            slots = np.fromiter(entering.keys(), dtype=np.int64, count=len(entering))
+            # Row of each entrant in the scored frame (-1: empty after cleaning)
+            rows = scored.index.get_indexer(batch.index[list(entering.values())])
+            kept = rows >= 0
+            self.compound[slots] = np.where(kept, scored['sentiment_compound'].to_numpy(dtype=float)[rows], np.nan)
+            self.labels[slots] = np.where(kept, scored['sentiment'].to_numpy(dtype=object)[rows], '')
+
+            if kept.any():
+                self.frames[frame] = scored
+                self.references[frame] = int(kept.sum())
+            for slot, row in zip(slots.tolist(), rows.tolist()):
+                if slot < len(self.reservoir.items) and self.reservoir.items[slot] is not None:
+                    self._release(self.reservoir.items[slot][0])
+                # Tweets that are empty after cleaning keep their slot but
+                # are left out of the estimates, as in a full analysis
+                self.reservoir.place(slot, (frame, row) if row >= 0 else None)
+
+        valid = ~np.isnan(self.compound)
+        self.current = estimate(self.compound[valid], self.labels[valid], self.confidence)
+        if (self.margin_of_error and int(valid.sum()) >= self.min_sample
+                and self.current['margin_of_error'] <= self.margin_of_error):
+            self.stopped_early = True
+        return self.stopped_early
+
+    def _release(self, frame):
+        """Drop one slot's reference to a scored batch (and the batch once unused)"""
+        self.references[frame] -= 1
+        if not self.references[frame]:
+            del self.frames[frame], self.references[frame]
+
+    def result(self):
+        """
+        Returns:
+            (scored sample DataFrame in slot order, sampling info dictionary)
+        """
+        placed = [(slot, item) for slot, item in enumerate(self.reservoir.items) if item is not None]
+        if placed:
+            by_frame = {}
+            for slot, (frame, row) in placed:
+                by_frame.setdefault(frame, ([], []))
+                by_frame[frame][0].append(slot)
+                by_frame[frame][1].append(row)
+            df = pd.concat([self.frames[frame].iloc[rows] for frame, (_, rows) in by_frame.items()],
+                           ignore_index=True)
+            order = np.argsort(np.concatenate([slots for slots, _ in by_frame.values()]), kind='stable')
+            df = df.iloc[order].reset_index(drop=True)
+        else:
+            df = pd.DataFrame()
+
+        current = self.current or estimate([], [], self.confidence)
+        return df, {
+            'sample_size': len(df),
+            'reservoir_capacity': self.capacity,
+            'tweets_seen': self.reservoir.seen,
+            'stopped_early': self.stopped_early,
+            'confidence': self.confidence,
+            'target_margin_of_error': self.margin_of_error,
+            'achieved_margin_of_error': current['margin_of_error'],
+            'proportions': current['proportions'],
+            'mean_score': current['mean_score'],
+        }
+
+
+def analyze_sampled(batches, engine=DEFAULT_ENGINE, sample_size=None, margin_of_error=None,
+                    confidence=DEFAULT_CONFIDENCE, min_sample=MIN_SAMPLE, stop_words=None, seed=None):
+    """
+    Score a reservoir sample of a tweet stream, stopping early once precise enough
+
+    Only tweets that enter the reservoir are cleaned and scored. After each
+    batch the proportions are estimated from the sample; once at least
+    min_sample tweets are scored and every proportion's margin is within
+    margin_of_error, scraping stops.
+
+    Args:
+        batches: Iterator of raw tweet DataFrames (e.g. scrape_tweets.iter_tweet_batches)
+        engine: Sentiment engine name
+        sample_size: Reservoir capacity (default: SAMPLE_SIZE, raised to what
+            margin_of_error needs)
+        margin_of_error: Target margin for the proportions, e.g. 0.03 (None: no early stop)
+        confidence: Confidence level of the intervals
+        min_sample: Minimum scored tweets before stopping early
+        stop_words: Optional stopword set to drop while cleaning
+        seed: Random seed (for reproducible samples)
+
+    Returns:
+        (scored sample DataFrame, sampling info dictionary)
+    """
+    sampling = SampledAnalysis(sample_size, margin_of_error, confidence, min_sample, seed)
+
+    for batch in batches:
+        if batch.empty:
+            continue
+        entering, rows = sampling.offer(batch)
+        scored = analyze_dataframe(rows, stop_words, engine=engine) if entering else None
+        if sampling.add(batch, entering, scored):
+            break
+
+    return sampling.result()
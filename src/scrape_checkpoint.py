@@ -0,0 +1,196 @@
+"""
+Scrape Checkpoints
+Append-only chunk files plus a manifest (row counts and a resume cursor), so
+long scrapes keep memory flat and can continue after a crash
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+
+DEFAULT_CHECKPOINT_DIR = os.environ.get(
+    'SCRAPE_CHECKPOINT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'checkpoints')
+)
+DEFAULT_CHECKPOINT_EVERY = 500
+MANIFEST = 'manifest.json'
+
+TWEET_COLUMNS = ['date', 'id', 'content', 'username', 'like_count', 'retweet_count',
+                 'reply_count', 'language', 'source', 'url']
+
+
+class CheckpointError(RuntimeError):
+    """Raised when a checkpoint cannot be created or resumed"""
+
+
+def checkpoint_path(base_dir, query, params):
+    """
+    Directory for one scrape job: a readable slug of the query plus a hash of
+    the query and its parameters, so different scrapes never share files
+
+    Args:
+        base_dir: Parent checkpoint directory
+        query: Search query
+        params: Dictionary of scrape parameters (max_tweets, dates, mode...)
+
+    Returns:
+        Checkpoint directory path
+    """
+    slug = re.sub(r'[^a-z0-9]+', '-', query.lower()).strip('-')[:40] or 'query'
+    key = json.dumps({'query': query, **params}, sort_keys=True, default=str)
+    return os.path.join(base_dir, f"{slug}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]}")
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ScrapeCheckpoint:
+    """
+    On-disk progress of one scrape
+
+    Tweets are buffered up to `every` rows, then written as a new chunk file.
+    The manifest is replaced atomically after each chunk, so a crash at any
+    point leaves the last committed chunk list and cursor intact; chunk files
+    not listed in the manifest are discarded on resume.
+    """
+
+    def __init__(self, directory, query, params, every=DEFAULT_CHECKPOINT_EVERY, resume=False):
+        self.directory = directory
+        self.every = every
+        self.buffer = []
+        self._pending_cursor = None
+        manifest_file = os.path.join(directory, MANIFEST)
+
+        if os.path.exists(manifest_file):
+            if not resume:
+                raise CheckpointError(
+                    f"A checkpoint for this scrape already exists in {directory}. "
+                    f"Use --resume to continue it, or delete the directory to start over."
+                )
+            with open(manifest_file, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            self._discard_uncommitted()
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.manifest = {
+                'query': query,
+                'params': params,
+                'created_at': datetime.now().isoformat(),
+                'updated_at': None,
+                'chunks': [],
+                'total': 0,
+                'cursor': None,
+                'complete': False,
+            }
+            _write_json_atomic(manifest_file, self.manifest)
+
+    @property
+    def total(self):
+        """Tweets committed to chunk files plus those still buffered"""
+        return self.manifest['total'] + len(self.buffer)
+
+    @property
+    def cursor(self):
+        """Resume position saved with the last committed chunk (scraper specific)"""
+        return self.manifest['cursor']
+
+    @property
+    def complete(self):
+        return self.manifest['complete']
+
+    def _discard_uncommitted(self):
+        committed = {chunk['file'] for chunk in self.manifest['chunks']}
+        for path in glob.glob(os.path.join(self.directory, 'chunk-*.csv')):
+            if os.path.basename(path) not in committed:
+                os.remove(path)
+
+    def add(self, tweet, cursor=None):
+        """
+        Buffer one tweet, flushing a chunk when the buffer is full
+
+        Args:
+            tweet: Tweet dictionary (TWEET_COLUMNS keys)
+            cursor: Resume position valid once this tweet is committed
+        """
+        self.buffer.append(tweet)
+        self._pending_cursor = cursor
+        if len(self.buffer) >= self.every:
+            self.flush()
+
+    def flush(self, cursor=None):
+        """
+        Write buffered tweets as a new chunk and commit it in the manifest
+
+        Args:
+            cursor: Resume position to record (default: the last add() cursor)
+        """
+        cursor = cursor if cursor is not None else self._pending_cursor
+        if self.buffer:
+            name = f"chunk-{len(self.manifest['chunks']):05d}.csv"
+            tmp_path = os.path.join(self.directory, f"{name}.tmp")
+            pd.DataFrame(self.buffer).reindex(columns=TWEET_COLUMNS).to_csv(
+                tmp_path, index=False, encoding='utf-8'
+            )
+            os.replace(tmp_path, os.path.join(self.directory, name))
+            self.manifest['chunks'].append({'file': name, 'rows': len(self.buffer)})
+            self.manifest['total'] += len(self.buffer)
+            self.buffer = []
+
+        if cursor is not None:
+            self.manifest['cursor'] = cursor
+        self.manifest['updated_at'] = datetime.now().isoformat()
+        _write_json_atomic(os.path.join(self.directory, MANIFEST), self.manifest)
+
+    def finish(self, cursor=None):
+        """Flush remaining tweets and mark the scrape complete"""
+        self.manifest['complete'] = True
+        self.flush(cursor)
+
+    def iter_chunks(self):
+        """Committed chunks as DataFrames, in scrape order"""
+        for chunk in self.manifest['chunks']:
+            yield pd.read_csv(os.path.join(self.directory, chunk['file']))
+
+    def load(self):
+        """All committed tweets as one DataFrame"""
+        chunks = list(self.iter_chunks())
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=TWEET_COLUMNS)
+
+    def export(self, output_path):
+        """
+        Concatenate the chunk files into one CSV without loading them
+
+        Returns:
+            Number of rows exported
+        """
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        with open(output_path, 'w', encoding='utf-8', newline='') as out:
+            if not self.manifest['chunks']:
+                out.write(','.join(TWEET_COLUMNS) + '\n')
+            for i, chunk in enumerate(self.manifest['chunks']):
+                with open(os.path.join(self.directory, chunk['file']), encoding='utf-8', newline='') as f:
+                    header = f.readline()
+                    if i == 0:
+                        out.write(header)
+                    shutil.copyfileobj(f, out)
+        return self.manifest['total']
+
+    def remove(self):
+        """Delete the checkpoint directory"""
+        shutil.rmtree(self.directory, ignore_errors=True)
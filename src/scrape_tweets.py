@@ -8,42 +8,67 @@ For demo purposes, this script can generate sample data
 import pandas as pd
 from datetime import datetime, timedelta
 import argparse
+import asyncio
+import math
 import os
 import random
+import time
+
+from scrape_checkpoint import (ScrapeCheckpoint, CheckpointError, checkpoint_path,
+                               DEFAULT_CHECKPOINT_DIR, DEFAULT_CHECKPOINT_EVERY)
+from metrics import TWEETS_SCRAPED
 
 # Try to import scraping libraries
 SCRAPER_TYPE = None
 
-# Prioritize snscrape for real-time data
-try:
-    import snscrape.modules.twitter as sntwitter
-    SCRAPER_TYPE = 'snscrape'
-    print("✓ Using snscrape for real-time Twitter data")
-except (ImportError, AttributeError) as e:
+# SCRAPER_BACKEND=sample forces offline sample data (e.g. for load tests)
+if os.environ.get('SCRAPER_BACKEND') == 'sample':
+    SCRAPER_TYPE = 'sample'
+    print("✓ Using sample data generation (SCRAPER_BACKEND=sample)")
+else:
+    # Prioritize snscrape for real-time data
     try:
-        from twikit import Client
-        SCRAPER_TYPE = 'twikit'
-        print("✓ Twikit library loaded (requires authentication)")
-    except ImportError:
-        SCRAPER_TYPE = 'sample'
-        print(f"⚠ Warning: No Twitter scraping library available")
-        print("Using sample data generation mode instead.")
+        import snscrape.modules.twitter as sntwitter
+        SCRAPER_TYPE = 'snscrape'
+        print("✓ Using snscrape for real-time Twitter data")
+    except (ImportError, AttributeError) as e:
+        try:
+            from twikit import Client
+            SCRAPER_TYPE = 'twikit'
+            print("✓ Twikit library loaded (requires authentication)")
+        except ImportError:
+            SCRAPER_TYPE = 'sample'
+            print(f"⚠ Warning: No Twitter scraping library available")
+            print("Using sample data generation mode instead.")
+
+
+# Simulated round trip per page of sample tweets in seconds (0: instant), so
+# benchmarks can exercise I/O-bound scraping offline
+SAMPLE_LATENCY = float(os.environ.get('SAMPLE_LATENCY', 0))
+SAMPLE_PAGE_SIZE = 100
+
+
+def sample_latency(max_tweets):
+    """Simulated time to page through max_tweets sample tweets"""
+    return SAMPLE_LATENCY * math.ceil(max_tweets / SAMPLE_PAGE_SIZE)
 
 
-def generate_sample_tweets(query, max_tweets=1000):
+def generate_sample_tweets(query, max_tweets=1000, verbose=True):
     """
     Generate sample tweets for demo purposes
     
     Args:
         query: Search query string
         max_tweets: Number of sample tweets to generate
+        verbose: Print progress messages
     
     Returns:
         DataFrame with sample tweets
     """
-    print("⚠ Generating sample tweets (snscrape not available)")
-    print(f"Query: {query}")
-    print(f"Generating {max_tweets} sample tweets...\n")
+    if verbose:
+        print("⚠ Generating sample tweets (snscrape not available)")
+        print(f"Query: {query}")
+        print(f"Generating {max_tweets} sample tweets...\n")
     
     # Generate topic-specific tweets
     positive_templates = [
@@ -110,14 +135,33 @@ def generate_sample_tweets(query, max_tweets=1000):
         })
         
         # Progress indicator
-        if (i + 1) % 100 == 0:
+        if verbose and (i + 1) % 100 == 0:
             print(f"Generated {i + 1} sample tweets...")
     
-    print(f"\nTotal sample tweets generated: {len(tweets_list)}")
+    if verbose:
+        print(f"\nTotal sample tweets generated: {len(tweets_list)}")
+    TWEETS_SCRAPED.inc(len(tweets_list), source='sample')
     df = pd.DataFrame(tweets_list)
     return df
 
 
+def tweet_record(tweet):
+    """Convert an snscrape tweet into a row dictionary (every scrape path counts tweets here)"""
+    TWEETS_SCRAPED.inc(source='snscrape')
+    return {
+        'date': tweet.date,
+        'id': tweet.id,
+        'content': tweet.rawContent,
+        'username': tweet.user.username,
+        'like_count': tweet.likeCount,
+        'retweet_count': tweet.retweetCount,
+        'reply_count': tweet.replyCount,
+        'language': tweet.lang,
+        'source': tweet.sourceLabel,
+        'url': tweet.url
+    }
+
+
 async def scrape_with_twikit(query, max_tweets=1000):
     """
     Scrape tweets using Twikit (requires authentication)
@@ -148,6 +192,7 @@ def scrape_tweets(query, max_tweets=1000, since_date=None, until_date=None):
         DataFrame with scraped tweets
     """
     if SCRAPER_TYPE == 'sample':
+        time.sleep(sample_latency(max_tweets))
         return generate_sample_tweets(query, max_tweets)
     
     if SCRAPER_TYPE == 'twikit':
@@ -173,18 +218,7 @@ def scrape_tweets(query, max_tweets=1000, since_date=None, until_date=None):
             if i >= max_tweets:
                 break
             
-            tweets_list.append({
-                'date': tweet.date,
-                'id': tweet.id,
-                'content': tweet.rawContent,
-                'username': tweet.user.username,
-                'like_count': tweet.likeCount,
-                'retweet_count': tweet.retweetCount,
-                'reply_count': tweet.replyCount,
-                'language': tweet.lang,
-                'source': tweet.sourceLabel,
-                'url': tweet.url
-            })
+            tweets_list.append(tweet_record(tweet))
             
             # Progress indicator
             if (i + 1) % 100 == 0:
@@ -203,6 +237,168 @@ def scrape_tweets(query, max_tweets=1000, since_date=None, until_date=None):
             return pd.DataFrame(tweets_list)
         return pd.DataFrame()
 
+async def scrape_tweets_async(query, max_tweets=1000, since_date=None, until_date=None):
+    """
+    scrape_tweets for event loops: waits without blocking the loop
+    
+    Sample data waits out its simulated latency with asyncio.sleep, so one
+    loop can hold any number of scrapes in flight. snscrape has no async API
+    and runs on a thread instead.
+    
+    Returns:
+        DataFrame with scraped tweets
+    """
+    if SCRAPER_TYPE == 'snscrape':
+        return await asyncio.to_thread(scrape_tweets, query, max_tweets, since_date, until_date)
+    await asyncio.sleep(sample_latency(max_tweets))
+    return generate_sample_tweets(query, max_tweets, verbose=False)
+
+
+def sample_batch(query, start, size):
+    """Sample tweets numbered from start, as one batch of a sample stream"""
+    df = generate_sample_tweets(query, size, verbose=False)
+    df['id'] += start
+    df['url'] = 'https://twitter.com/user/status/' + df['id'].astype(str)
+    return df
+
+
+def iter_tweet_batches(query, max_tweets=1000, batch_size=DEFAULT_CHECKPOINT_EVERY,
+                       since_date=None, until_date=None):
+    """
+    Scrape tweets as a stream of batches, so downstream work can start on
+    the first batch while scraping continues
+    
+    Args:
+        query, max_tweets, since_date, until_date: As in scrape_tweets
+        batch_size: Tweets per batch
+    
+    Yields:
+        DataFrames of up to batch_size tweets
+    """
+    if SCRAPER_TYPE != 'snscrape':
+        for start in range(0, max_tweets, batch_size):
+            time.sleep(sample_latency(min(batch_size, max_tweets - start)))
+            yield sample_batch(query, start, min(batch_size, max_tweets - start))
+        return
+    
+    search_query = query
+    if since_date:
+        search_query += f" since:{since_date}"
+    if until_date:
+        search_query += f" until:{until_date}"
+    
+    batch = []
+    for i, tweet in enumerate(sntwitter.TwitterSearchScraper(search_query).get_items()):
+        if i >= max_tweets:
+            break
+        batch.append(tweet_record(tweet))
+        if len(batch) >= batch_size:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
+async def iter_tweet_batches_async(query, max_tweets=1000, batch_size=DEFAULT_CHECKPOINT_EVERY,
+                                   since_date=None, until_date=None):
+    """
+    iter_tweet_batches for event loops (see scrape_tweets_async)
+    
+    Sample batches wait out their latency with asyncio.sleep; snscrape
+    batches are pulled from iter_tweet_batches on a thread.
+    
+    Yields:
+        DataFrames of up to batch_size tweets
+    """
+    if SCRAPER_TYPE != 'snscrape':
+        for start in range(0, max_tweets, batch_size):
+            await asyncio.sleep(sample_latency(min(batch_size, max_tweets - start)))
+            yield sample_batch(query, start, min(batch_size, max_tweets - start))
+        return
+    
+    batches = iter_tweet_batches(query, max_tweets, batch_size, since_date, until_date)
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            return
+        yield batch
+
+
+def scrape_tweets_checkpointed(query, max_tweets=1000, since_date=None, until_date=None,
+                               checkpoint_dir=DEFAULT_CHECKPOINT_DIR, resume=False,
+                               checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+    """
+    Scrape tweets into an on-disk checkpoint instead of memory
+    
+    Every checkpoint_every tweets are written as a chunk file and the
+    manifest records the id of the last committed tweet. snscrape returns
+    tweets newest first, so a resumed scrape continues with max_id below
+    that id and nothing is fetched twice.
+    
+    Args:
+        query, max_tweets, since_date, until_date: As in scrape_tweets
+        checkpoint_dir: Parent directory for checkpoints
+        resume: Continue an existing checkpoint for the same scrape
+        checkpoint_every: Tweets per chunk file
+    
+    Returns:
+        ScrapeCheckpoint holding the scraped tweets
+    """
+    params = {'max_tweets': max_tweets, 'since': since_date, 'until': until_date,
+              'scraper': SCRAPER_TYPE}
+    checkpoint = ScrapeCheckpoint(checkpoint_path(checkpoint_dir, query, params), query, params,
+                                  every=checkpoint_every, resume=resume)
+    
+    if checkpoint.complete:
+        print(f"✓ Checkpoint already complete ({checkpoint.total} tweets)")
+        return checkpoint
+    if checkpoint.total:
+        print(f"Resuming from checkpoint: {checkpoint.total} tweets already scraped")
+    
+    remaining = max_tweets - checkpoint.total
+    cursor = checkpoint.cursor or {}
+    
+    if SCRAPER_TYPE != 'snscrape':
+        # Sample data: continue the id sequence where the checkpoint stopped
+        df = generate_sample_tweets(query, remaining)
+        offset = cursor.get('generated', 0)
+        for i, tweet in enumerate(df.to_dict('records')):
+            tweet['id'] = 1000000000000000000 + offset + i
+            tweet['url'] = f"https://twitter.com/user/status/{tweet['id']}"
+            checkpoint.add(tweet, cursor={'generated': offset + i + 1})
+        checkpoint.finish()
+        return checkpoint
+    
+    search_query = query
+    if since_date:
+        search_query += f" since:{since_date}"
+    if until_date:
+        search_query += f" until:{until_date}"
+    if cursor.get('last_id'):
+        search_query += f" max_id:{int(cursor['last_id']) - 1}"
+    
+    print(f"Scraping tweets for query: {search_query}")
+    print(f"Maximum tweets: {max_tweets} (checkpoint every {checkpoint_every})")
+    
+    try:
+        for i, tweet in enumerate(sntwitter.TwitterSearchScraper(search_query).get_items()):
+            if i >= remaining:
+                break
+            checkpoint.add(tweet_record(tweet), cursor={'last_id': tweet.id})
+            
+            if (i + 1) % 100 == 0:
+                print(f"Scraped {checkpoint.total} tweets...")
+    except Exception as e:
+        # Keep what was fetched; --resume continues from here
+        checkpoint.flush()
+        print(f"Error occurred while scraping: {e}")
+        print(f"{checkpoint.total} tweets are checkpointed in {checkpoint.directory}; "
+              f"rerun with --resume to continue")
+        return checkpoint
+    
+    checkpoint.finish()
+    print(f"\nTotal tweets scraped: {checkpoint.total}")
+    return checkpoint
 
 
 def save_tweets(df, filename='tweets.csv', output_dir='data'):
@@ -242,9 +438,42 @@ def main():
                         help='Output filename (default: tweets.csv)')
     parser.add_argument('--output-dir', type=str, default='data',
                         help='Output directory (default: data)')
+    parser.add_argument('--checkpoint-every', type=int, default=None,
+                        help=f'Checkpoint to disk every N tweets (e.g. {DEFAULT_CHECKPOINT_EVERY}) '
+                             f'so a crashed scrape can be resumed')
+    parser.add_argument('--checkpoint-dir', type=str, default=DEFAULT_CHECKPOINT_DIR,
+                        help='Directory for scrape checkpoints (default: data/checkpoints)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the checkpoint of an interrupted scrape with the same arguments')
+    parser.add_argument('--keep-checkpoint', action='store_true',
+                        help='Keep the checkpoint files after a complete scrape')
     
     args = parser.parse_args()
     
+    if args.checkpoint_every or args.resume:
+        try:
+            checkpoint = scrape_tweets_checkpointed(
+                query=args.query,
+                max_tweets=args.max_tweets,
+                since_date=args.since,
+                until_date=args.until,
+                checkpoint_dir=args.checkpoint_dir,
+                resume=args.resume,
+                checkpoint_every=args.checkpoint_every or DEFAULT_CHECKPOINT_EVERY
+            )
+        except CheckpointError as e:
+            print(f"Error: {e}")
+            return
+        
+        if checkpoint.complete:
+            filepath = os.path.join(args.output_dir, args.output)
+            rows = checkpoint.export(filepath)
+            print(f"\nTweets saved to: {filepath}")
+            print(f"Total records: {rows}")
+            if not args.keep_checkpoint:
+                checkpoint.remove()
+        return
+    
     # Scrape tweets
     df = scrape_tweets(
         query=args.query,
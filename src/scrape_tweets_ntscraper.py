@@ -1,73 +1,111 @@
 """
-Twitter Scraper using ntscraper
-Scrapes real-time tweets from Twitter without authentication
+Twitter Scraper using Nitter instances (ntscraper-compatible)
+Scrapes real-time tweets from Twitter without authentication through a
+long-lived Nitter client with instance health caching and failover
 """
 
 import pandas as pd
 from datetime import datetime
 import argparse
 import os
-from ntscraper import Nitter
+import re
+import threading
 
-def scrape_tweets_realtime(query, max_tweets=1000, mode='term', language='en'):
+from nitter_client import NitterClient
+from metrics import TWEETS_SCRAPED
+from scrape_checkpoint import (ScrapeCheckpoint, CheckpointError, checkpoint_path,
+                               DEFAULT_CHECKPOINT_DIR, DEFAULT_CHECKPOINT_EVERY)
+
+STATUS_ID_PATTERN = re.compile(r'/status/(\d+)')
+
+# One client per process: keeps connections and instance health between scrapes
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Get the shared Nitter client
+    
+    Returns:
+        NitterClient instance
     """
-    Scrape real-time tweets using ntscraper
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = NitterClient()
+        return _client
+
+
+def tweet_record(tweet, position):
+    """
+    Convert a Nitter tweet (ntscraper's dictionary shape) into a row dictionary
+    
+    The tweet id is taken from the status link so it stays stable across
+    runs (falls back to the position in the result). Every scrape path
+    counts tweets here.
+    """
+    TWEETS_SCRAPED.inc(source='nitter')
+    link = tweet.get('link', '')
+    match = STATUS_ID_PATTERN.search(link)
+    return {
+        'date': tweet.get('date', datetime.now()),
+        'id': int(match.group(1)) if match else position,
+        'content': tweet.get('text', ''),
+        'username': tweet.get('user', {}).get('username', 'unknown'),
+        'like_count': tweet.get('stats', {}).get('likes', 0),
+        'retweet_count': tweet.get('stats', {}).get('retweets', 0),
+        'reply_count': tweet.get('stats', {}).get('comments', 0),
+        'language': tweet.get('language', 'en'),
+        'source': 'ntscraper',
+        'url': link
+    }
+
+
+def scrape_tweets_realtime(query, max_tweets=1000, mode='term', language='en', client=None):
+    """
+    Scrape real-time tweets from Nitter
     
     Args:
         query: Search query string or username
         max_tweets: Maximum number of tweets to scrape
         mode: 'term' for keyword search, 'user' for user timeline
-        language: Language filter (default: 'en')
+        language: Language filter for searches (default: 'en')
+        client: NitterClient to use (default: the shared client)
     
     Returns:
         DataFrame with scraped tweets
     """
-    print(f"🐦 Scraping tweets using ntscraper")
+    print(f"🐦 Scraping tweets from Nitter")
     print(f"Query: {query}")
     print(f"Mode: {mode}")
     print(f"Maximum tweets: {max_tweets}\n")
     
+    if mode not in ('term', 'user'):
+        print(f"Invalid mode: {mode}. Use 'term' or 'user'")
+        return pd.DataFrame()
+    
+    tweets_list = []
+    
     try:
-        # Initialize scraper
-        scraper = Nitter(log_level=1, skip_instance_check=False)
-        
-        tweets_list = []
+        client = client or get_client()
         
         if mode == 'term':
-            # Search for tweets by term/keyword
             print(f"Searching for tweets containing: '{query}'")
-            tweets = scraper.get_tweets(query, mode=mode, number=max_tweets)
-        elif mode == 'user':
-            # Get tweets from specific user
-            print(f"Getting tweets from user: {query}")
-            tweets = scraper.get_tweets(query, mode=mode, number=max_tweets)
         else:
-            print(f"Invalid mode: {mode}. Use 'term' or 'user'")
-            return pd.DataFrame()
+            print(f"Getting tweets from user: {query}")
+        
+        for tweets, _ in client.iter_pages(query, mode=mode, language=language if mode == 'term' else None):
+            for tweet in tweets[:max_tweets - len(tweets_list)]:
+                tweets_list.append(tweet_record(tweet, len(tweets_list) + 1))
+            print(f"Scraped {len(tweets_list)} tweets...")
+            if len(tweets_list) >= max_tweets:
+                break
         
-        if not tweets or 'tweets' not in tweets:
+        if not tweets_list:
             print("No tweets found or error occurred")
             return pd.DataFrame()
         
-        # Process tweets
-        for i, tweet in enumerate(tweets['tweets'], 1):
-            tweets_list.append({
-                'date': tweet.get('date', datetime.now()),
-                'id': i,
-                'content': tweet.get('text', ''),
-                'username': tweet.get('user', {}).get('username', 'unknown'),
-                'like_count': tweet.get('stats', {}).get('likes', 0),
-                'retweet_count': tweet.get('stats', {}).get('retweets', 0),
-                'reply_count': tweet.get('stats', {}).get('comments', 0),
-                'language': tweet.get('language', 'en'),
-                'source': 'ntscraper',
-                'url': tweet.get('link', '')
-            })
-            
-            # Progress indicator
-            if i % 50 == 0:
-                print(f"Scraped {i} tweets...")
-        
         print(f"\n✓ Successfully scraped {len(tweets_list)} tweets")
         
         # Create DataFrame
@@ -88,6 +126,92 @@ def scrape_tweets_realtime(query, max_tweets=1000, mode='term', language='en'):
         return pd.DataFrame()
 
 
+def iter_tweet_batches(client, query, mode='term', batch_size=DEFAULT_CHECKPOINT_EVERY,
+                       cursor=None, language=None):
+    """
+    Fetch tweets in batches of about batch_size, newest first, each with a resume cursor
+    
+    Batches end on Nitter page boundaries, so the cursor of a batch is the
+    Nitter cursor of the next page and a resumed scrape continues exactly
+    where the last committed batch stopped.
+    
+    Args:
+        client: NitterClient
+        query: Search term or username
+        mode: 'term' or 'user'
+        batch_size: Minimum tweets per batch (the last batch may be smaller)
+        cursor: Cursor from a previous batch (to resume)
+        language: Optional language filter for searches
+    
+    Yields:
+        (list of tweet dictionaries, cursor dictionary)
+    """
+    cursor = cursor or {}
+    if cursor.get('done'):
+        return
+    
+    batch = []
+    for tweets, next_cursor in client.iter_pages(query, mode=mode, cursor=cursor.get('page'),
+                                                 language=language):
+        batch.extend(tweet_record(tweet, i) for i, tweet in enumerate(tweets, len(batch) + 1))
+        if len(batch) >= batch_size or not next_cursor:
+            yield batch, {'page': next_cursor, 'done': not next_cursor}
+            batch = []
+    
+    if batch:
+        yield batch, {'page': None, 'done': True}
+
+
+def scrape_tweets_realtime_checkpointed(query, max_tweets=1000, mode='term', language='en',
+                                        checkpoint_dir=DEFAULT_CHECKPOINT_DIR, resume=False,
+                                        checkpoint_every=DEFAULT_CHECKPOINT_EVERY, client=None):
+    """
+    Scrape tweets from Nitter into an on-disk checkpoint
+    
+    Each batch is committed as a chunk file with the Nitter page cursor, so
+    an interrupted scrape resumed with the same arguments continues after the
+    last committed batch.
+    
+    Args:
+        query, max_tweets, mode, language, client: As in scrape_tweets_realtime
+        checkpoint_dir: Parent directory for checkpoints
+        resume: Continue an existing checkpoint for the same scrape
+        checkpoint_every: Tweets per batch / chunk file
+    
+    Returns:
+        ScrapeCheckpoint holding the scraped tweets
+    """
+    params = {'max_tweets': max_tweets, 'mode': mode, 'language': language, 'scraper': 'nitter'}
+    checkpoint = ScrapeCheckpoint(checkpoint_path(checkpoint_dir, query, params), query, params,
+                                  every=checkpoint_every, resume=resume)
+    
+    if checkpoint.complete:
+        print(f"✓ Checkpoint already complete ({checkpoint.total} tweets)")
+        return checkpoint
+    if checkpoint.total:
+        print(f"Resuming from checkpoint: {checkpoint.total} tweets already scraped")
+    
+    try:
+        client = client or get_client()
+        batches = iter_tweet_batches(client, query, mode, checkpoint_every, checkpoint.cursor,
+                                     language=language if mode == 'term' else None)
+        for tweets, cursor in batches:
+            checkpoint.buffer.extend(tweets[:max_tweets - checkpoint.total])
+            checkpoint.flush(cursor)
+            print(f"Scraped {checkpoint.total} tweets...")
+            if checkpoint.total >= max_tweets:
+                break
+    except Exception as e:
+        print(f"❌ Error occurred while scraping: {e}")
+        print(f"{checkpoint.total} tweets are checkpointed in {checkpoint.directory}; "
+              f"rerun with --resume to continue")
+        return checkpoint
+    
+    checkpoint.finish()
+    print(f"\n✓ Successfully scraped {checkpoint.total} tweets")
+    return checkpoint
+
+
 def save_tweets(df, filename='tweets.csv', output_dir='data'):
     """
     Save tweets DataFrame to CSV
@@ -112,7 +236,7 @@ def save_tweets(df, filename='tweets.csv', output_dir='data'):
 
 def main():
     """Main function to run the scraper"""
-    parser = argparse.ArgumentParser(description='Scrape real-time tweets using ntscraper')
+    parser = argparse.ArgumentParser(description='Scrape real-time tweets from Nitter instances')
     parser.add_argument('--query', type=str, required=True, 
                         help='Search query or username')
     parser.add_argument('--max-tweets', type=int, default=100,
@@ -125,9 +249,42 @@ def main():
                         help='Output filename (default: tweets.csv)')
     parser.add_argument('--output-dir', type=str, default='data',
                         help='Output directory (default: data)')
+    parser.add_argument('--checkpoint-every', type=int, default=None,
+                        help=f'Fetch in batches of N tweets, checkpointing each to disk '
+                             f'(e.g. {DEFAULT_CHECKPOINT_EVERY}) so a crashed scrape can be resumed')
+    parser.add_argument('--checkpoint-dir', type=str, default=DEFAULT_CHECKPOINT_DIR,
+                        help='Directory for scrape checkpoints (default: data/checkpoints)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the checkpoint of an interrupted scrape with the same arguments')
+    parser.add_argument('--keep-checkpoint', action='store_true',
+                        help='Keep the checkpoint files after a complete scrape')
     
     args = parser.parse_args()
     
+    if args.checkpoint_every or args.resume:
+        try:
+            checkpoint = scrape_tweets_realtime_checkpointed(
+                query=args.query,
+                max_tweets=args.max_tweets,
+                mode=args.mode,
+                language=args.language,
+                checkpoint_dir=args.checkpoint_dir,
+                resume=args.resume,
+                checkpoint_every=args.checkpoint_every or DEFAULT_CHECKPOINT_EVERY
+            )
+        except CheckpointError as e:
+            print(f"❌ {e}")
+            return
+        
+        if checkpoint.complete:
+            filepath = os.path.join(args.output_dir, args.output)
+            rows = checkpoint.export(filepath)
+            print(f"\n💾 Tweets saved to: {filepath}")
+            print(f"Total records: {rows}")
+            if not args.keep_checkpoint:
+                checkpoint.remove()
+        return
+    
     # Scrape tweets
     df = scrape_tweets_realtime(
         query=args.query,
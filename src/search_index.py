@@ -0,0 +1,246 @@
+"""
+Tweet Search Index
+In-memory inverted index over the cleaned text of one analysis, for
+drill-down queries (terms, quoted phrases, sentiment and date filters)
+ranked by engagement without shipping the whole dataset to the client
+"""
+
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from clean_and_analyze import clean_text
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+SENTIMENTS = ('positive', 'neutral', 'negative')
+# Columns returned per matching tweet (when present)
+RESULT_COLUMNS = ['id', 'date', 'username', 'content', 'sentiment', 'sentiment_compound',
+                  'like_count', 'retweet_count', 'url']
+
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+
+def parse_query(query):
+    """
+    Split a query into terms and phrases, cleaned like cleaned_text
+
+    'climate "carbon tax"' gives terms ['climate', 'carbon', 'tax'] (every
+    word must match) and phrases ['carbon tax'] (checked on the candidates).
+
+    Returns:
+        (terms, phrases) tuple of lists
+    """
+    quoted = [clean_text(phrase) for phrase in PHRASE_PATTERN.findall(query or '')]
+    terms = clean_text(PHRASE_PATTERN.sub(' ', query or '')).split()
+    for phrase in quoted:
+        terms.extend(phrase.split())
+    # A quoted single word is just a term
+    phrases = [phrase for phrase in quoted if ' ' in phrase]
+    return list(dict.fromkeys(terms)), phrases
+
+
+def parse_date_bound(value, name, end_of_day=False):
+    """
+    Parse a from/to filter to a naive UTC datetime64 (None if not given)
+
+    Args:
+        end_of_day: Extend a bare date to its last instant (for inclusive 'to')
+
+    Raises:
+        ValueError: If the value isn't a date
+    """
+    if not value:
+        return None
+    try:
+        parsed = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        parsed = pd.NaT
+    if parsed is pd.NaT:
+        raise ValueError(f"{name} must be a date, e.g. 2024-01-31 or 2024-01-31T12:00")
+    if parsed.tzinfo is not None:
+        parsed = parsed.tz_convert('UTC').tz_localize(None)
+    if end_of_day and len(str(value)) <= 10:
+        parsed += pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+    return parsed.to_datetime64().astype('datetime64[ns]')
+
+
+class TweetIndex:
+    """
+    Inverted index over one scored DataFrame
+
+    Postings are stored CSR-style: one int32 array of row numbers, sorted by
+    term and then row, and an offsets array giving each term's slice. Filter
+    and ranking columns are kept as plain numpy arrays, so a query is a few
+    array intersections and masks; only the returned page touches the
+    DataFrame.
+
+    Args:
+        df: Scored DataFrame with a cleaned_text column
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        n = len(self.df)
+
+        # One posting per (term, tweet), however often the term repeats
+        words = [set(text.split()) for text in self.df['cleaned_text'].fillna('').tolist()]
+        counts = np.fromiter(map(len, words), dtype=np.int64, count=n)
+        codes, terms = pd.factorize(np.fromiter(chain.from_iterable(words), dtype=object, count=int(counts.sum())))
+        # Rows are generated in order, so a stable sort by term leaves each term's rows sorted
+        order = np.argsort(codes, kind='stable')
+
+        self.postings = np.repeat(np.arange(n, dtype=np.int32), counts)[order]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(terms))))).astype(np.int64)
+        self.terms = {term: i for i, term in enumerate(terms)}
+
+        sentiment = self.df['sentiment'] if 'sentiment' in self.df.columns else pd.Series('', index=self.df.index)
+        self.sentiment_codes = np.full(n, -1, dtype=np.int8)
+        for code, label in enumerate(SENTIMENTS):
+            self.sentiment_codes[(sentiment == label).to_numpy()] = code
+
+        if 'date' in self.df.columns:
+            dates = pd.to_datetime(self.df['date'], errors='coerce', utc=True, format='mixed').dt.tz_localize(None)
+            self.dates = dates.to_numpy(dtype='datetime64[ns]')
+        else:
+            self.dates = np.full(n, np.datetime64('NaT'), dtype='datetime64[ns]')
+
+        engagement = np.zeros(n, dtype=np.int64)
+        for column in ('like_count', 'retweet_count'):
+            if column in self.df.columns:
+                engagement += self.df[column].fillna(0).to_numpy(dtype=np.int64)
+        self.engagement = engagement
+        # Rows by engagement (ties in row order): large match sets are ranked
+        # by filtering this order instead of sorting
+        self.by_engagement = np.argsort(-engagement, kind='stable').astype(np.int32)
+        self.rank = np.empty(n, dtype=np.int32)
+        self.rank[self.by_engagement] = np.arange(n, dtype=np.int32)
+
+        # Padded texts for phrase checks on candidates (' carbon tax ' in ' ... ')
+        self.padded_texts = (' ' + self.df['cleaned_text'].fillna('') + ' ').to_numpy(dtype=object)
+
+    def __len__(self):
+        return len(self.df)
+
+    def term_rows(self, term):
+        """Sorted rows of the tweets containing a term (empty if unknown)"""
+        slot = self.terms.get(term)
+        if slot is None:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.offsets[slot]:self.offsets[slot + 1]]
+
+    @property
+    def nbytes(self):
+        """Memory held by the postings and filter arrays"""
+        return (self.postings.nbytes + self.offsets.nbytes + self.sentiment_codes.nbytes
+                + self.dates.nbytes + self.engagement.nbytes + self.by_engagement.nbytes + self.rank.nbytes)
+
+    def match(self, query=None, sentiment=None, start=None, end=None):
+        """
+        Rows matching a query and filters, best engagement first
+
+        Args:
+            query: Words and quoted phrases, all required (empty: every tweet)
+            sentiment: 'positive', 'neutral' or 'negative' (optional)
+            start, end: Inclusive datetime64 bounds on the tweet date (optional)
+
+        Returns:
+            Numpy array of row numbers
+        """
+        terms, phrases = parse_query(query)
+        if terms:
+            # Intersect from the rarest term so intermediate sets stay small
+            postings = sorted((self.term_rows(term) for term in terms), key=len)
+            rows = postings[0]
+            for other in postings[1:]:
+                if not len(rows):
+                    break
+                rows = np.intersect1d(rows, other, assume_unique=True)
+        else:
+            rows = np.arange(len(self.df), dtype=np.int32)
+
+        mask = np.ones(len(rows), dtype=bool)
+        if sentiment is not None:
+            mask &= self.sentiment_codes[rows] == SENTIMENTS.index(sentiment)
+        if start is not None:
+            mask &= self.dates[rows] >= start
+        if end is not None:
+            mask &= self.dates[rows] <= end
+        rows = rows[mask]
+
+        # Phrases last: checking text is the slowest filter
+        if phrases and len(rows):
+            texts = self.padded_texts
+            for phrase in phrases:
+                needle = f' {phrase} '
+                rows = rows[np.fromiter((needle in texts[row] for row in rows.tolist()),
+                                        dtype=bool, count=len(rows))]
+
+        # Highest engagement first; ties keep row order
+        if len(rows) * 16 < len(self.df):
+            return rows[np.argsort(self.rank[rows])]
+        selected = np.zeros(len(self.df), dtype=bool)
+        selected[rows] = True
+        return self.by_engagement[selected[self.by_engagement]]
+
+    def search(self, query=None, sentiment=None, start=None, end=None, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """
+        One page of matching tweets
+
+        Returns:
+            Dictionary with total_matches, offset, limit and the page's tweets
+        """
+        rows = self.match(query, sentiment, start, end)
+        page = rows[offset:offset + limit]
+        columns = [c for c in RESULT_COLUMNS if c in self.df.columns]
+        records = self.df.iloc[page][columns].to_dict('records')
+        for record, row in zip(records, page):
+            record['engagement'] = int(self.engagement[row])
+            if 'date' in record:
+                # Dates were parsed to UTC when the index was built; unparseable
+                # ones are returned as given (or null)
+                if not np.isnat(self.dates[row]):
+                    record['date'] = pd.Timestamp(self.dates[row]).strftime('%Y-%m-%dT%H:%M:%S')
+                elif not isinstance(record['date'], str):
+                    record['date'] = None
+        return {
+            'total_matches': int(len(rows)),
+            'offset': offset,
+            'limit': limit,
+            'results': records,
+        }
+
+
+def parse_search_options(options):
+    """
+    Validate /api/search query parameters
+
+    Returns:
+        Dictionary of TweetIndex.search arguments
+
+    Raises:
+        ValueError: With the message for a 400 response
+    """
+    sentiment = options.get('sentiment') or None
+    if sentiment is not None and sentiment not in SENTIMENTS:
+        raise ValueError(f"Unknown sentiment '{sentiment}'. Choose from: {', '.join(SENTIMENTS)}")
+    try:
+        limit = int(options.get('limit') or DEFAULT_PAGE_SIZE)
+        offset = int(options.get('offset') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('limit and offset must be integers')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    if offset < 0:
+        raise ValueError('offset must not be negative')
+    return {
+        'query': options.get('q', ''),
+        'sentiment': sentiment,
+        'start': parse_date_bound(options.get('from'), 'from'),
+        'end': parse_date_bound(options.get('to'), 'to', end_of_day=True),
+        'offset': offset,
+        'limit': limit,
+    }
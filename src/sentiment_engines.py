@@ -0,0 +1,212 @@
+"""
+Sentiment Engines
+Registry of interchangeable sentiment scorers sharing one batch interface
+"""
+
+import threading
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer, negated, normalize
+
+from lexicon_store import MappedSentimentIntensityAnalyzer, MappedLexicon, ensure_compiled
+
+try:
+    from textblob import TextBlob
+except ImportError:
+    TextBlob = None
+
+
+# Compound score cut-offs shared by every engine
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+
+def classify(compound):
+    """
+    Map a compound score to a sentiment label
+
+    Args:
+        compound: Score between -1 and +1
+
+    Returns:
+        'positive', 'negative' or 'neutral'
+    """
+    if compound >= POSITIVE_THRESHOLD:
+        return 'positive'
+    elif compound <= NEGATIVE_THRESHOLD:
+        return 'negative'
+    return 'neutral'
+
+
+class SentimentEngine:
+    """
+    Base class for sentiment engines
+
+    Subclasses implement score(); score_batch() scores a list of texts.
+    Every result is a dictionary with compound, positive, negative,
+    neutral and sentiment keys.
+    """
+
+    name = None
+
+    @classmethod
+    def available(cls):
+        """Whether the engine's library is installed"""
+        return True
+
+    def score(self, text):
+        raise NotImplementedError
+
+    def score_batch(self, texts):
+        """
+        Score a batch of texts
+
+        Args:
+            texts: Iterable of cleaned text
+
+        Returns:
+            List of score dictionaries, in input order
+        """
+        score = self.score
+        return [score(text) for text in texts]
+
+
+class VaderEngine(SentimentEngine):
+    """
+    Full VADER scoring (rules for negation, intensifiers, punctuation, emoji)
+    """
+
+    name = 'vader'
+
+    def __init__(self):
+        try:
+            self.analyzer = MappedSentimentIntensityAnalyzer()
+        except (OSError, ValueError) as e:
+            print(f"⚠ Warning: Memory-mapped lexicon unavailable ({e}), using in-memory VADER lexicon")
+            self.analyzer = SentimentIntensityAnalyzer()
+
+    def score(self, text):
+        scores = self.analyzer.polarity_scores(text)
+        return {
+            'compound': scores['compound'],
+            'positive': scores['pos'],
+            'negative': scores['neg'],
+            'neutral': scores['neu'],
+            'sentiment': classify(scores['compound'])
+        }
+
+
+class TextBlobEngine(SentimentEngine):
+    """
+    TextBlob pattern-based polarity
+
+    Polarity is used as the compound score; positive/negative are its
+    positive and negative parts and neutral is the remainder.
+    """
+
+    name = 'textblob'
+
+    @classmethod
+    def available(cls):
+        return TextBlob is not None
+
+    def __init__(self):
+        if TextBlob is None:
+            raise ImportError("textblob is not installed (pip install textblob)")
+
+    def score(self, text):
+        polarity = TextBlob(text).sentiment.polarity
+        return {
+            'compound': round(polarity, 4),
+            'positive': round(max(polarity, 0.0), 3),
+            'negative': round(max(-polarity, 0.0), 3),
+            'neutral': round(1.0 - abs(polarity), 3),
+            'sentiment': classify(polarity)
+        }
+
+
+class LexiconEngine(SentimentEngine):
+    """
+    Cheap lexicon-only fast path
+
+    Sums VADER lexicon valences word by word, flipping a word after a
+    negation, and normalizes like VADER. Skips VADER's emoji, casing,
+    punctuation and "but" rules, so it is much faster but less precise.
+    """
+
+    name = 'lexicon'
+
+    def __init__(self):
+        self.lexicon = MappedLexicon(ensure_compiled())
+
+    def score(self, text):
+        lexicon = self.lexicon
+        words = text.lower().split()
+        total = pos_sum = neg_sum = 0.0
+        neu_count = 0
+
+        for i, word in enumerate(words):
+            if word not in lexicon:
+                neu_count += 1
+                continue
+            valence = lexicon[word]
+            if i > 0 and negated([words[i - 1]]):
+                valence *= -0.74
+            total += valence
+            if valence > 0:
+                pos_sum += valence + 1
+            elif valence < 0:
+                neg_sum += valence - 1
+            else:
+                neu_count += 1
+
+        if not words or (pos_sum == 0 and neg_sum == 0):
+            return {'compound': 0.0, 'positive': 0.0, 'negative': 0.0,
+                    'neutral': 1.0 if words else 0.0, 'sentiment': 'neutral'}
+
+        compound = round(normalize(total), 4)
+        denominator = pos_sum + abs(neg_sum) + neu_count
+        return {
+            'compound': compound,
+            'positive': round(abs(pos_sum / denominator), 3),
+            'negative': round(abs(neg_sum / denominator), 3),
+            'neutral': round(abs(neu_count / denominator), 3),
+            'sentiment': classify(compound)
+        }
+
+
+SENTIMENT_ENGINES = {
+    VaderEngine.name: VaderEngine,
+    TextBlobEngine.name: TextBlobEngine,
+    LexiconEngine.name: LexiconEngine,
+}
+
+DEFAULT_ENGINE = VaderEngine.name
+
+# Engine instances, created once per process and shared by all threads.
+# Engines keep no per-call state (VADER builds a fresh SentiText per text and
+# the mapped lexicon is read-only), so one instance serves concurrent requests.
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name=DEFAULT_ENGINE):
+    """
+    Get the shared instance of a sentiment engine
+
+    Args:
+        name: Engine name (see SENTIMENT_ENGINES)
+
+    Returns:
+        SentimentEngine instance
+    """
+    if name not in SENTIMENT_ENGINES:
+        raise ValueError(f"Unknown sentiment engine: {name}. "
+                         f"Choose from: {', '.join(SENTIMENT_ENGINES)}")
+
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = SENTIMENT_ENGINES[name]()
+    return engine
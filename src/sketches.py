@@ -0,0 +1,289 @@
+"""
+Mergeable Summary Sketches
+Streaming quantiles (t-digest) and online mean/variance for sentiment scores,
+combinable across chunks, processes and incremental runs
+"""
+
+import json
+import math
+
+import numpy as np
+
+
+DEFAULT_COMPRESSION = 100
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+
+class TDigest:
+    """
+    Merging t-digest for approximate quantiles in bounded memory
+
+    Points are buffered and periodically merged into at most about
+    compression/2 centroids, with small centroids kept near the tails so
+    extreme percentiles stay accurate.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or 10 * compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    @property
+    def count(self):
+        self._flush()
+        return float(self.weights.sum())
+
+    def add(self, value, weight=1.0):
+        """Add a single value"""
+        self._buffer.append((float(value), float(weight)))
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+
+    def add_batch(self, values, weights=None):
+        """
+        Add an array of values in one vectorized merge
+
+        Args:
+            values: Array-like of numbers (NaNs are ignored)
+            weights: Optional array-like of weights
+        """
+        values = np.asarray(values, dtype=float)
+        weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float)
+        mask = ~np.isnan(values)
+        if mask.any():
+            self._flush()
+            self._merge(values[mask], weights[mask])
+
+    def merge(self, other):
+        """
+        Merge another digest into this one
+
+        Returns:
+            self
+        """
+        other._flush()
+        self._flush()
+        if len(other.means):
+            self._merge(other.means, other.weights, other.min, other.max)
+        return self
+
+    def _flush(self):
+        if self._buffer:
+            buffered = np.array(self._buffer)
+            self._buffer = []
+            self._merge(buffered[:, 0], buffered[:, 1])
+
+    def _merge(self, values, weights, new_min=None, new_max=None):
+        self.min = min(self.min, float(values.min()) if new_min is None else new_min)
+        self.max = max(self.max, float(values.max()) if new_max is None else new_max)
+
+        means = np.concatenate([self.means, values])
+        all_weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='mergesort')
+        means, all_weights = means[order], all_weights[order]
+
+        # Bucket by the k1 scale function: each centroid spans at most one unit of k
+        cumulative = np.cumsum(all_weights)
+        total = cumulative[-1]
+        q_mid = (cumulative - all_weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q_mid - 1)
+        buckets = np.floor(k - k[0]).astype(np.int64)
+
+        merged_weights = np.bincount(buckets, weights=all_weights)
+        merged_sums = np.bincount(buckets, weights=all_weights * means)
+        keep = merged_weights > 0
+        self.weights = merged_weights[keep]
+        self.means = merged_sums[keep] / self.weights
+
+    def quantile(self, q):
+        """
+        Estimate a quantile
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value (nan if the digest is empty)
+        """
+        self._flush()
+        if not len(self.means):
+            return math.nan
+
+        cumulative = np.cumsum(self.weights) - self.weights / 2
+        total = float(self.weights.sum())
+        xs = np.concatenate([[0.0], cumulative, [total]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * total, xs, ys))
+
+    def to_dict(self):
+        self._flush()
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min if len(self.means) else None,
+            'max': self.max if len(self.means) else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(compression=data['compression'])
+        digest.means = np.asarray(data['means'], dtype=float)
+        digest.weights = np.asarray(data['weights'], dtype=float)
+        if data['min'] is not None:
+            digest.min, digest.max = data['min'], data['max']
+        return digest
+
+
+class RunningStats:
+    """
+    Online count/mean/variance/min/max (Welford, merged with Chan's formula)
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _combine(self, n, mean, m2, lo, hi):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    def add(self, value):
+        """Add a single value"""
+        self._combine(1, float(value), 0.0, float(value), float(value))
+
+    def add_batch(self, values):
+        """Add an array of values (NaNs are ignored)"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = float(values.mean())
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        """Merge another RunningStats into this one"""
+        self._combine(other.n, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.n else None, 'max': self.max if self.n else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        if data['n']:
+            stats._combine(data['n'], data['mean'], data['m2'], data['min'], data['max'])
+        return stats
+
+
+class ScoreSummary:
+    """
+    Mergeable summary of compound scores and sentiment labels
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.digest = TDigest(compression)
+        self.stats = RunningStats()
+        self.counts = dict.fromkeys(SENTIMENTS, 0)
+
+    def update(self, compound, sentiment=None):
+        """
+        Add a chunk of scores
+
+        Args:
+            compound: Array-like of compound scores
+            sentiment: Optional array-like of sentiment labels
+        """
+        compound = np.asarray(compound, dtype=float)
+        self.digest.add_batch(compound)
+        self.stats.add_batch(compound)
+        if sentiment is not None:
+            labels, label_counts = np.unique(np.asarray(sentiment, dtype=str), return_counts=True)
+            for label, count in zip(labels, label_counts):
+                self.counts[label] = self.counts.get(label, 0) + int(count)
+        return self
+
+    def merge(self, other):
+        """Merge another ScoreSummary into this one"""
+        self.digest.merge(other.digest)
+        self.stats.merge(other.stats)
+        for label, count in other.counts.items():
+            self.counts[label] = self.counts.get(label, 0) + count
+        return self
+
+    @property
+    def total(self):
+        return self.stats.n
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        Estimate score percentiles
+
+        Returns:
+            Dictionary like {'p10': ..., 'p50': ..., 'p90': ...}
+        """
+        return {f'p{p}': self.digest.quantile(p / 100) for p in percentiles}
+
+    def report(self):
+        """
+        Summarize for API responses and CLI output
+
+        Returns:
+            Dictionary with mean, median, std, min, max and percentiles
+        """
+        return {
+            'average_score': self.stats.mean,
+            'median_score': self.digest.quantile(0.5),
+            'std_score': self.stats.std,
+            'min_score': self.stats.min if self.total else None,
+            'max_score': self.stats.max if self.total else None,
+            'percentiles': self.percentiles(),
+        }
+
+    def to_dict(self):
+        return {'digest': self.digest.to_dict(), 'stats': self.stats.to_dict(),
+                'counts': dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        summary.digest = TDigest.from_dict(data['digest'])
+        summary.stats = RunningStats.from_dict(data['stats'])
+        summary.counts = dict(data['counts'])
+        return summary
+
+    def save(self, path):
+        """Save the summary as JSON (to merge into later runs)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Load a summary saved with save()"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,396 @@
+"""
+Real-Time Sentiment Stream
+Polls a scraper for new tweets per topic, scores them incrementally and keeps
+rolling-window and exponentially decayed aggregates in bounded memory
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from scrape_tweets import SCRAPER_TYPE, scrape_tweets, generate_sample_tweets
+from clean_and_analyze import clean_series
+from sentiment_engines import DEFAULT_ENGINE, get_engine
+from metrics import TWEETS_SCORED
+
+
+# Defaults (overridable through environment variables)
+POLL_INTERVAL = float(os.environ.get('STREAM_POLL_INTERVAL', 10))
+POLL_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 50))
+WINDOW_SECONDS = float(os.environ.get('STREAM_WINDOW_SECONDS', 300))
+HALF_LIFE_SECONDS = float(os.environ.get('STREAM_HALF_LIFE_SECONDS', 120))
+MAX_WINDOW_EVENTS = int(os.environ.get('STREAM_MAX_WINDOW_EVENTS', 10000))
+MAX_SEEN_IDS = int(os.environ.get('STREAM_MAX_SEEN_IDS', 50000))
+IDLE_TIMEOUT = float(os.environ.get('STREAM_IDLE_TIMEOUT', 60))
+# Per process: each topic runs a polling thread, and under threaded gunicorn
+# each subscriber holds a worker thread for as long as it's connected
+MAX_TOPICS = int(os.environ.get('STREAM_MAX_TOPICS', 8))
+MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 2))
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+
+class StreamLimitReached(Exception):
+    """Too many monitored topics or open streams in this process (429)"""
+
+
+class SampleStreamSource:
+    """
+    Offline tweet source: sample tweets stamped with fresh ids and the current time
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(2000000000000000000)
+        self._lock = threading.Lock()
+
+    def __call__(self, topic, max_tweets):
+        df = generate_sample_tweets(topic, max_tweets, verbose=False)
+        with self._lock:
+            df['id'] = [next(self._ids) for _ in range(len(df))]
+        df['date'] = datetime.now()
+        return df
+
+
+def default_source():
+    """
+    Get the tweet source for polling (sample generator when offline)
+
+    Returns:
+        Callable (topic, max_tweets) -> DataFrame
+    """
+    if SCRAPER_TYPE == 'snscrape':
+        return lambda topic, max_tweets: scrape_tweets(topic, max_tweets=max_tweets)
+    return SampleStreamSource()
+
+
+class TopicAggregate:
+    """
+    Rolling-window and exponentially decayed sentiment aggregates for one topic
+
+    The window keeps at most max_events scores; running sums are updated on
+    append and eviction, so every update is O(new events).
+    """
+
+    def __init__(self, window_seconds=WINDOW_SECONDS, half_life=HALF_LIFE_SECONDS,
+                 max_events=MAX_WINDOW_EVENTS):
+        self.window_seconds = window_seconds
+        self.half_life = half_life
+        self.events = deque(maxlen=max_events)
+
+        self.window_sum = 0.0
+        self.window_counts = dict.fromkeys(SENTIMENTS, 0)
+
+        self.decayed_weight = 0.0
+        self.decayed_sum = 0.0
+        self.decayed_counts = dict.fromkeys(SENTIMENTS, 0.0)
+        self.last_decay = None
+
+        self.total_scored = 0
+
+    def _evict(self, event):
+        self.window_sum -= event[1]
+        self.window_counts[event[2]] -= 1
+
+    def _decay(self, now):
+        if self.last_decay is not None:
+            factor = 0.5 ** ((now - self.last_decay) / self.half_life)
+            self.decayed_weight *= factor
+            self.decayed_sum *= factor
+            for sentiment in SENTIMENTS:
+                self.decayed_counts[sentiment] *= factor
+        self.last_decay = now
+
+    def add(self, scores, now=None):
+        """
+        Add a batch of scored tweets
+
+        Args:
+            scores: Iterable of (compound, sentiment) pairs
+            now: Event time in seconds (default: time.time())
+        """
+        now = time.time() if now is None else now
+        self._decay(now)
+
+        for compound, sentiment in scores:
+            if len(self.events) == self.events.maxlen:
+                self._evict(self.events[0])
+            self.events.append((now, compound, sentiment))
+            self.window_sum += compound
+            self.window_counts[sentiment] += 1
+
+            self.decayed_weight += 1.0
+            self.decayed_sum += compound
+            self.decayed_counts[sentiment] += 1.0
+            self.total_scored += 1
+
+        self.expire(now)
+
+    def expire(self, now=None):
+        """Drop events that have left the rolling window"""
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+        while self.events and self.events[0][0] < cutoff:
+            self._evict(self.events.popleft())
+
+    def snapshot(self, now=None):
+        """
+        Summarize the current aggregates
+
+        Returns:
+            Dictionary with window and decayed statistics
+        """
+        now = time.time() if now is None else now
+        self.expire(now)
+        self._decay(now)
+
+        window_total = len(self.events)
+        return {
+            'window': {
+                'seconds': self.window_seconds,
+                'total_tweets': window_total,
+                'average_score': self.window_sum / window_total if window_total else 0.0,
+                'distribution': dict(self.window_counts),
+            },
+            'decayed': {
+                'half_life_seconds': self.half_life,
+                'weight': round(self.decayed_weight, 4),
+                'average_score': self.decayed_sum / self.decayed_weight if self.decayed_weight else 0.0,
+                'distribution': {k: round(v, 4) for k, v in self.decayed_counts.items()},
+            },
+            'total_scored': self.total_scored,
+        }
+
+
+class TopicStream:
+    """
+    Background polling loop for one topic
+
+    Each update is serialized once into an SSE payload; subscribers only
+    wait for the version counter to change and send the shared payload.
+    """
+
+    def __init__(self, topic, source, engine=DEFAULT_ENGINE, poll_interval=POLL_INTERVAL,
+                 batch_size=POLL_BATCH_SIZE, idle_timeout=IDLE_TIMEOUT):
+        self.topic = topic
+        self.source = source
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+
+        self.aggregate = TopicAggregate()
+        self.seen_ids = set()
+        self.seen_order = deque()
+
+        self.version = 0
+        self.payload = None
+        self.subscribers = 0
+        self.idle_since = time.time()
+        self.running = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"stream-{self.topic}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the polling loop after its current poll"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def _remember(self, tweet_id):
+        self.seen_ids.add(tweet_id)
+        self.seen_order.append(tweet_id)
+        if len(self.seen_order) > MAX_SEEN_IDS:
+            self.seen_ids.discard(self.seen_order.popleft())
+
+    def poll_once(self):
+        """
+        Fetch, deduplicate and score one batch of tweets
+
+        Returns:
+            Number of new tweets scored
+        """
+        df = self.source(self.topic, self.batch_size)
+        if df is None or df.empty:
+            return 0
+
+        df = df[~df['id'].isin(self.seen_ids)]
+        for tweet_id in df['id']:
+            self._remember(tweet_id)
+
+        cleaned = clean_series(df['content'])
+        cleaned = cleaned[cleaned.str.strip() != '']
+        results = get_engine(self.engine).score_batch(cleaned)
+        self.aggregate.add((r['compound'], r['sentiment']) for r in results)
+        TWEETS_SCORED.inc(len(results), engine=self.engine)
+        return len(results)
+
+    def publish(self, new_tweets):
+        """Serialize the current snapshot once and wake all subscribers"""
+        snapshot = self.aggregate.snapshot()
+        snapshot.update({
+            'topic': self.topic,
+            'engine': self.engine,
+            'new_tweets': new_tweets,
+            'timestamp': datetime.now().isoformat()
+        })
+        with self.condition:
+            self.version += 1
+            self.payload = f"id: {self.version}\nevent: sentiment\ndata: {json.dumps(snapshot)}\n\n"
+            self.condition.notify_all()
+
+    def _run(self):
+        while self.running:
+            try:
+                self.publish(self.poll_once())
+            except Exception as e:
+                print(f"⚠ Warning: Stream poll failed for '{self.topic}': {e}")
+
+            with self.condition:
+                if self.subscribers == 0 and time.time() - self.idle_since > self.idle_timeout:
+                    self.running = False
+                    break
+                self.condition.wait(self.poll_interval)
+
+    def wait_for_update(self, last_version, timeout):
+        """
+        Block until a newer payload than last_version is available
+
+        Returns:
+            Tuple (version, payload); payload is None on timeout
+        """
+        with self.condition:
+            if self.version == last_version:
+                self.condition.wait(timeout)
+            if self.version == last_version:
+                return last_version, None
+            return self.version, self.payload
+
+
+class StreamMonitor:
+    """
+    Registry of running topic streams for this process
+
+    Args:
+        max_topics: Most topics polled at once
+        max_subscribers: Most clients connected at once, across all topics
+    """
+
+    def __init__(self, source=None, engine=DEFAULT_ENGINE, max_topics=MAX_TOPICS,
+                 max_subscribers=MAX_SUBSCRIBERS):
+        self.source = source or default_source()
+        self.engine = engine
+        self.max_topics = max_topics
+        self.max_subscribers = max_subscribers
+        self.streams = {}
+        self.subscribers = 0
+        self.lock = threading.Lock()
+
+    def _make_room(self, key):
+        """
+        Check the limits for one more subscriber to a topic (lock held)
+
+        Streams whose loops have stopped are dropped, and if a new topic
+        needs a place, the longest idle one (no subscribers, waiting out its
+        idle timeout) is stopped.
+
+        Raises:
+            StreamLimitReached: If either limit is reached
+        """
+        for name in [name for name, s in self.streams.items() if not s.running]:
+            del self.streams[name]
+
+        if self.subscribers >= self.max_subscribers:
+            raise StreamLimitReached(f"Too many open streams (limit {self.max_subscribers}); try again later")
+        if key in self.streams or len(self.streams) < self.max_topics:
+            return
+
+        idle = [name for name, s in self.streams.items() if s.subscribers == 0]
+        if idle:
+            self.streams.pop(min(idle, key=lambda name: self.streams[name].idle_since)).stop()
+        else:
+            raise StreamLimitReached(f"Too many monitored topics (limit {self.max_topics}); try again later")
+
+    def check_capacity(self, topic):
+        """
+        Check that a client could subscribe to a topic now
+
+        Lets a route answer 429 before its event stream starts.
+
+        Raises:
+            StreamLimitReached: If either limit is reached
+        """
+        with self.lock:
+            self._make_room(topic.strip().lower())
+
+    def subscribe(self, topic):
+        """
+        Register a subscriber, starting the topic's polling loop if needed
+
+        Returns:
+            TopicStream for the topic
+
+        Raises:
+            StreamLimitReached: If either limit is reached
+        """
+        key = topic.strip().lower()
+        with self.lock:
+            self._make_room(key)
+            self.subscribers += 1
+
+            stream = self.streams.get(key)
+            if stream is not None:
+                with stream.condition:
+                    if stream.running:
+                        stream.subscribers += 1
+                        return stream
+
+            stream = TopicStream(topic, self.source, engine=self.engine)
+            stream.subscribers = 1
+            self.streams[key] = stream
+            stream.start()
+        return stream
+
+    def unsubscribe(self, stream):
+        """Unregister a subscriber; idle streams stop after their idle timeout"""
+        with self.lock:
+            self.subscribers -= 1
+            with stream.condition:
+                stream.subscribers -= 1
+                if stream.subscribers == 0:
+                    stream.idle_since = time.time()
+
+    def events(self, topic, heartbeat=15):
+        """
+        Generate Server-Sent Events for a topic
+
+        Args:
+            topic: Topic to monitor
+            heartbeat: Seconds between keep-alive comments
+
+        Yields:
+            SSE-formatted strings
+        """
+        try:
+            stream = self.subscribe(topic)
+        except StreamLimitReached as e:
+            # Routes call check_capacity first; a client that lost a race
+            # for the last place gets an error event instead
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        version = 0
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                version, payload = stream.wait_for_update(version, heartbeat)
+                yield payload if payload is not None else ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(stream)
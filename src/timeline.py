@@ -0,0 +1,231 @@
+"""
+Sentiment Timeline
+Buckets tweet timestamps at minute/hour/day/week granularity, fills gaps and
+downsamples long series with Largest-Triangle-Three-Buckets (LTTB), so
+timeline payloads and charts stay small however much history they cover
+"""
+
+import numpy as np
+import pandas as pd
+
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+MINUTE_NS = 60 * 10**9
+GRANULARITIES = {
+    'minute': MINUTE_NS,
+    'hour': 60 * MINUTE_NS,
+    'day': 24 * 60 * MINUTE_NS,
+    'week': 7 * 24 * 60 * MINUTE_NS,
+}
+LABEL_FORMATS = {
+    'minute': '%Y-%m-%d %H:%M',
+    'hour': '%Y-%m-%d %H:00',
+    'day': '%Y-%m-%d',
+    'week': '%Y-%m-%d',
+}
+# The epoch was a Thursday; shifting by 3 days makes weeks start on Monday
+WEEK_OFFSET_NS = 3 * GRANULARITIES['day']
+
+DEFAULT_MAX_POINTS = 200
+# Refuse explicit granularities that would expand into absurd series
+MAX_BUCKETS = 2000000
+
+
+def parse_dates(dates):
+    """
+    Parse a date column into naive UTC datetimes (unparseable values become NaT)
+
+    Already-parsed columns are returned as they are (converted to UTC if
+    timezone-aware), so callers can parse once and reuse the result.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.tz_convert(None) if dates.dt.tz is not None else dates
+    return pd.to_datetime(dates, errors='coerce', utc=True, format='mixed').dt.tz_localize(None)
+
+
+def parse_timestamps(dates):
+    """
+    Parse a date column into int64 nanoseconds (UTC, naive)
+
+    Args:
+        dates: Series of dates (strings, datetimes or already parsed)
+
+    Returns:
+        Tuple (int64 array of nanoseconds, boolean mask of valid rows)
+    """
+    parsed = parse_dates(dates)
+    valid = parsed.notna().to_numpy()
+    return parsed.to_numpy(dtype='datetime64[ns]').view('i8'), valid
+
+
+def floor_to(ns, granularity):
+    """Floor nanosecond timestamps to the start of their bucket"""
+    width = GRANULARITIES[granularity]
+    if granularity == 'week':
+        return (ns + WEEK_OFFSET_NS) // width * width - WEEK_OFFSET_NS
+    return ns // width * width
+
+
+def choose_granularity(start_ns, end_ns, max_points=DEFAULT_MAX_POINTS):
+    """
+    Finest granularity whose bucket count over the span fits max_points
+
+    Returns:
+        'minute', 'hour', 'day' or 'week'
+    """
+    span = end_ns - start_ns
+    for name, width in GRANULARITIES.items():
+        if span // width + 1 <= max_points:
+            return name
+    return 'week'
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, from each of n_out - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket.
+
+    Args:
+        x: Increasing x values
+        y: y values
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted array of kept indices
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+
+    return kept
+
+
+class TimelineCounts:
+    """
+    Per-minute sentiment counts, accumulated chunk by chunk
+
+    Minute counts are the finest resolution kept; any coarser timeline is
+    derived from them on demand, so the span (and therefore the automatic
+    granularity) only needs to be known when the timeline is requested.
+    """
+
+    def __init__(self):
+        self.counts = None
+
+    def update(self, dates, sentiments):
+        """
+        Add a chunk of tweets
+
+        Args:
+            dates: Series of dates (parsed here, once)
+            sentiments: Series of sentiment labels aligned with dates
+        """
+        ns, valid = parse_timestamps(dates)
+        if not valid.any():
+            return self
+
+        codes = pd.Categorical(np.asarray(sentiments)[valid], categories=SENTIMENTS).codes
+        known = codes >= 0
+        minutes, inverse = np.unique(floor_to(ns[valid][known], 'minute'), return_inverse=True)
+        flat = np.bincount(inverse * len(SENTIMENTS) + codes[known], minlength=len(minutes) * len(SENTIMENTS))
+        chunk = pd.DataFrame(flat.reshape(-1, len(SENTIMENTS)), index=minutes, columns=SENTIMENTS)
+
+        self.counts = chunk if self.counts is None else self.counts.add(chunk, fill_value=0)
+        return self
+
+    def merge(self, other):
+        """Combine counts from another TimelineCounts"""
+        if other.counts is not None:
+            self.counts = other.counts.copy() if self.counts is None else self.counts.add(other.counts, fill_value=0)
+        return self
+
+    def series(self, granularity='auto', max_points=DEFAULT_MAX_POINTS, fill_gaps=True):
+        """
+        Build the timeline
+
+        Args:
+            granularity: 'minute', 'hour', 'day', 'week' or 'auto' (from the span)
+            max_points: Downsample with LTTB beyond this many points (None: never)
+            fill_gaps: Include empty buckets as zeros
+
+        Returns:
+            Dictionary with 'granularity', 'downsampled' and 'points' (list of
+            {'date', 'positive', 'negative', 'neutral'} dictionaries)
+        """
+        if granularity != 'auto' and granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}. "
+                             f"Choose from: auto, {', '.join(GRANULARITIES)}")
+
+        if self.counts is None or self.counts.empty:
+            return {'granularity': None if granularity == 'auto' else granularity,
+                    'downsampled': False, 'points': []}
+
+        minutes = self.counts.index.to_numpy(dtype='i8')
+        if granularity == 'auto':
+            granularity = choose_granularity(minutes.min(), minutes.max(), max_points or DEFAULT_MAX_POINTS)
+
+        width = GRANULARITIES[granularity]
+        buckets = floor_to(minutes, granularity)
+        first = buckets.min()
+        positions = (buckets - first) // width
+        size = int(positions.max()) + 1
+        if size > MAX_BUCKETS:
+            raise ValueError(f"{granularity} granularity would produce {size} points; choose a coarser one")
+
+        values = self.counts.to_numpy(dtype='i8')
+        totals = np.stack([np.bincount(positions, weights=values[:, i], minlength=size)
+                           for i in range(len(SENTIMENTS))], axis=1).astype('i8')
+
+        index = np.arange(size)
+        if not fill_gaps:
+            index = index[totals.sum(axis=1) > 0]
+
+        downsampled = bool(max_points) and len(index) > max_points
+        if downsampled:
+            index = index[lttb_indices(index, totals[index].sum(axis=1), max_points)]
+
+        starts = pd.to_datetime(first + index * width)
+        labels = starts.strftime(LABEL_FORMATS[granularity])
+        rows = totals[index]
+        return {
+            'granularity': granularity,
+            'downsampled': downsampled,
+            'points': [
+                {'date': label, 'positive': int(p), 'negative': int(n), 'neutral': int(u)}
+                for label, (p, n, u) in zip(labels, rows)
+            ],
+        }
+
+
+def build_timeline(dates, sentiments, granularity='auto', max_points=DEFAULT_MAX_POINTS, fill_gaps=True):
+    """
+    Timeline for one DataFrame's date and sentiment columns
+
+    Returns:
+        Same dictionary as TimelineCounts.series
+    """
+    return TimelineCounts().update(dates, sentiments).series(granularity, max_points, fill_gaps)
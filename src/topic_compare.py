@@ -0,0 +1,256 @@
+"""
+Multi-Topic Comparison
+Scrapes and scores several topics concurrently on a bounded thread pool,
+reusing fresh cached per-topic results, and lines the results up side by side
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrape_tweets import scrape_tweets
+from clean_and_analyze import analyze_dataframe
+from aggregates import AnalysisAggregator, SENTIMENTS
+from analytics_store import normalize_topic
+from sentiment_engines import DEFAULT_ENGINE
+from metrics import CACHE_REQUESTS
+
+
+# Defaults (overridable through environment variables)
+MAX_WORKERS = int(os.environ.get('COMPARE_MAX_WORKERS', 4))
+CACHE_TTL_SECONDS = float(os.environ.get('COMPARE_CACHE_TTL', 300))
+MAX_TOPICS = int(os.environ.get('COMPARE_MAX_TOPICS', 10))
+# Every topic uses the same bucket size and no downsampling, so the
+# timelines share one date axis
+TIMELINE_GRANULARITY = os.environ.get('COMPARE_GRANULARITY', 'day')
+
+
+class TopicResultCache:
+    """
+    Per-topic analysis results with a freshness TTL
+
+    Concurrent requests for the same key share one computation instead of
+    scraping the topic twice.
+    """
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._results = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
+
+    @staticmethod
+    def key(topic, max_tweets, engine):
+        return normalize_topic(topic), int(max_tweets), engine
+
+    def get(self, key):
+        """Fresh cached result for a key, or None"""
+        with self._lock:
+            entry = self._results.get(key)
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = (time.time(), result)
+            # Drop stale entries so the cache stays bounded by recent topics
+            now = time.time()
+            for stale in [k for k, (stamp, _) in self._results.items() if now - stamp >= self.ttl]:
+                del self._results[stale]
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached result for a key, computing it (once) if missing or stale
+
+        Returns:
+            (result, cached) tuple
+        """
+        result = self.get(key)
+        if result is not None:
+            return result, True
+
+        with self._lock:
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            result = self.get(key)
+            if result is not None:
+                return result, True
+            return compute(), False
+
+        try:
+            result = compute()
+            self.put(key, result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+
+
+def analyze_topic_response(topic, max_tweets=500, engine=DEFAULT_ENGINE, on_scored=None):
+    """
+    Scrape, clean, score and aggregate one topic
+
+    Args:
+        topic: Topic to analyze
+        max_tweets: Maximum number of tweets to scrape
+        engine: Sentiment engine name
+        on_scored: Callback receiving the scored DataFrame (optional, e.g. to persist it)
+
+    Returns:
+        Dictionary in the /api/analyze response shape (None if no tweets found)
+    """
+    df = scrape_tweets(topic, max_tweets=max_tweets)
+    if df.empty:
+        return None
+
+    df = analyze_dataframe(df, engine=engine)
+    if on_scored:
+        on_scored(topic, df)
+    return AnalysisAggregator().update(df).response(topic, engine, TIMELINE_GRANULARITY, max_points=None)
+
+
+def align_timelines(results):
+    """
+    Put per-topic timelines on one shared date axis
+
+    Args:
+        results: Dictionary of topic -> /api/analyze-shaped response
+
+    Returns:
+        {'dates': [...], 'series': {topic: {'positive': [...], 'negative': [...], 'neutral': [...]}}}
+        with zeros where a topic has no tweets
+    """
+    by_topic = {
+        topic: {point['date']: point for point in result.get('timeline_data', [])}
+        for topic, result in results.items()
+    }
+    dates = sorted(set().union(*by_topic.values())) if by_topic else []
+
+    return {
+        'dates': dates,
+        'series': {
+            topic: {
+                label: [points[date][label] if date in points else 0 for date in dates]
+                for label in SENTIMENTS
+            }
+            for topic, points in by_topic.items()
+        }
+    }
+
+
+def compare_response(topics, engine, outcomes, elapsed):
+    """
+    Assemble the /api/compare response
+
+    Args:
+        topics: Topic names in request order
+        engine: Sentiment engine name
+        outcomes: {topic: (result, cached, elapsed seconds) or the exception raised}
+        elapsed: Wall time of the whole comparison in seconds
+
+    Returns:
+        Dictionary with per-topic summaries, an aligned timeline and
+        per-topic errors
+    """
+    results, summaries, errors = {}, {}, {}
+    for topic in topics:
+        outcome = outcomes[topic]
+        if isinstance(outcome, Exception):
+            errors[topic] = str(outcome)
+            continue
+        result, cached, topic_elapsed = outcome
+        if result is None:
+            errors[topic] = 'No tweets found for this topic'
+            continue
+
+        results[topic] = result
+        summaries[topic] = {
+            'total_tweets': result['total_tweets'],
+            'sentiment_summary': result['sentiment_summary'],
+            'distribution': result['distribution'],
+            'percentages': result['percentages'],
+            'cached': cached,
+            'elapsed_seconds': round(topic_elapsed, 3),
+        }
+
+    return {
+        'topics': topics,
+        'engine': engine,
+        'results': summaries,
+        'timeline': align_timelines(results),
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+    }
+
+
+class TopicComparator:
+    """
+    Runs per-topic analyses on a shared bounded pool with a result cache
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, cache=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='compare')
+        self.cache = cache or TopicResultCache()
+
+    def analyze(self, topic, max_tweets=500, engine=DEFAULT_ENGINE, on_scored=None):
+        """
+        One topic's result, from the cache when fresh
+
+        Returns:
+            (result, cached) tuple
+        """
+        key = self.cache.key(topic, max_tweets, engine)
+        result, cached = self.cache.get_or_compute(
+            key, lambda: analyze_topic_response(topic, max_tweets, engine, on_scored)
+        )
+        CACHE_REQUESTS.inc(cache='compare', result='hit' if cached else 'miss')
+        return result, cached
+
+    def compare(self, topics, max_tweets=500, engine=DEFAULT_ENGINE, on_scored=None):
+        """
+        Analyze several topics concurrently and line the results up
+
+        Wall time approaches the slowest topic rather than the sum, up to the
+        pool size.
+
+        Args:
+            topics: List of topic names
+            max_tweets: Maximum tweets per topic
+            engine: Sentiment engine name
+            on_scored: Callback receiving (topic, scored DataFrame) for fresh results
+
+        Returns:
+            Dictionary with per-topic summaries, an aligned timeline and
+            per-topic errors
+        """
+        topics = list(dict.fromkeys(topics))
+        started = time.time()
+        futures = {
+            topic: self.executor.submit(self._timed_analyze, topic, max_tweets, engine, on_scored)
+            for topic in topics
+        }
+
+        outcomes = {}
+        for topic, future in futures.items():
+            try:
+                outcomes[topic] = future.result()
+            except Exception as e:
+                outcomes[topic] = e
+        return compare_response(topics, engine, outcomes, time.time() - started)
+
+    def _timed_analyze(self, topic, max_tweets, engine, on_scored):
+        started = time.time()
+        result, cached = self.analyze(topic, max_tweets, engine, on_scored)
+        return result, cached, time.time() - started
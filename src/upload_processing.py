@@ -0,0 +1,255 @@
+"""
+Dataset Upload Processing
+Stream-parses uploaded CSV / Parquet files in chunks straight off the request
+body, runs the clean/score/aggregate pipeline per chunk and stores the result
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from functools import partial
+
+import pandas as pd
+from werkzeug.sansio.multipart import MultipartDecoder, Data, Field, File, Epilogue, NeedData
+
+from clean_and_analyze import analyze_dataframe
+from aggregates import AnalysisAggregator
+from timeline import DEFAULT_MAX_POINTS
+from sentiment_engines import DEFAULT_ENGINE
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+DEFAULT_CHUNK_SIZE = 20000
+READ_SIZE = 64 * 1024
+UPLOAD_DIR = os.environ.get(
+    'UPLOAD_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'uploads')
+)
+
+
+class UploadError(ValueError):
+    """Raised when an uploaded dataset cannot be processed"""
+
+
+class MultipartFileReader(io.RawIOBase):
+    """
+    File-like reader over the first file part of a multipart/form-data body
+
+    The body is decoded incrementally as it is read, so the upload is never
+    buffered in memory. Form fields that come before the file are collected
+    in `fields`; anything after the file part is ignored.
+    """
+
+    def __init__(self, stream, boundary, read_size=READ_SIZE):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = MultipartDecoder(boundary.encode('latin-1'))
+        self.fields = {}
+        self.filename = None
+        self._pending = b''
+        self._file_done = False
+        self._eof = False
+        self._advance_to_file()
+
+    def _next_event(self):
+        while True:
+            event = self.decoder.next_event()
+            if not isinstance(event, NeedData):
+                return event
+            if self._eof:
+                raise UploadError("Upload ended before the file part was complete")
+            data = self.stream.read(self.read_size)
+            self._eof = not data
+            self.decoder.receive_data(data or None)
+
+    def _advance_to_file(self):
+        field_name, field_value = None, b''
+        while True:
+            event = self._next_event()
+            if isinstance(event, Field):
+                field_name, field_value = event.name, b''
+            elif isinstance(event, File):
+                self.filename = event.filename
+                return
+            elif isinstance(event, Data) and field_name is not None:
+                field_value += event.data
+                if not event.more_data:
+                    self.fields[field_name] = field_value.decode('utf-8', 'replace')
+                    field_name = None
+            elif isinstance(event, Epilogue):
+                raise UploadError("No file found in the upload (use a multipart 'file' field)")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._file_done:
+            event = self._next_event()
+            if isinstance(event, Data):
+                self._pending = bytes(event.data)
+                self._file_done = not event.more_data
+            else:
+                self._file_done = True
+
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def detect_format(filename, requested=None):
+    """
+    Decide between 'csv' and 'parquet'
+
+    Args:
+        filename: Uploaded file name (may be None)
+        requested: Explicit format from the client (optional)
+
+    Returns:
+        'csv' or 'parquet'
+    """
+    if requested:
+        fmt = requested.lower()
+    elif filename and filename.lower().endswith(('.parquet', '.pq')):
+        fmt = 'parquet'
+    else:
+        fmt = 'csv'
+
+    if fmt not in ('csv', 'parquet'):
+        raise UploadError(f"Unsupported format: {fmt}. Use csv or parquet")
+    return fmt
+
+
+def iter_csv_chunks(fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parse a CSV stream into DataFrame chunks"""
+    reader = io.BufferedReader(fileobj, buffer_size=READ_SIZE) if isinstance(fileobj, io.RawIOBase) else fileobj
+    try:
+        yield from pd.read_csv(reader, chunksize=chunk_size)
+    except pd.errors.EmptyDataError:
+        raise UploadError("Uploaded CSV is empty")
+    except pd.errors.ParserError as e:
+        raise UploadError(f"Could not parse CSV: {e}")
+
+
+def iter_parquet_chunks(fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parse a Parquet upload into DataFrame chunks
+
+    Parquet keeps its schema in a footer, so the body is first spooled to a
+    temporary file (disk, not memory) and then read one batch at a time.
+    """
+    if pq is None:
+        raise UploadError("Parquet uploads require pyarrow (pip install pyarrow)")
+
+    with tempfile.TemporaryFile() as spool:
+        shutil.copyfileobj(fileobj, spool, READ_SIZE)
+        spool.seek(0)
+        try:
+            parquet_file = pq.ParquetFile(spool)
+        except Exception as e:
+            raise UploadError(f"Could not read Parquet file: {e}")
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+def analyze_upload(fileobj, fmt='csv', name=None, engine=DEFAULT_ENGINE,
+                   chunk_size=DEFAULT_CHUNK_SIZE, upload_dir=UPLOAD_DIR, store=None,
+                   timeline_granularity='auto', timeline_points=DEFAULT_MAX_POINTS, score_chunk=None):
+    """
+    Run the clean/score/aggregate pipeline over an uploaded dataset
+
+    Scored rows are appended to <upload_dir>/<id>/scored.csv chunk by chunk
+    and the /api/analyze-shaped response is saved next to them.
+
+    Args:
+        fileobj: Binary file-like object with the dataset
+        fmt: 'csv' or 'parquet'
+        name: Dataset name reported as the topic
+        engine: Sentiment engine name
+        chunk_size: Rows per chunk
+        upload_dir: Directory for stored results
+        store: AnalyticsStore to persist scored rows into (optional)
+        timeline_granularity, timeline_points: Timeline options (see AnalysisAggregator.timeline)
+        score_chunk: Function cleaning and scoring one raw chunk (default:
+            analyze_dataframe in this process)
+
+    Returns:
+        Response dictionary (same shape as /api/analyze plus upload_id)
+
+    Raises:
+        UploadError: If the file has no content column or no rows
+    """
+    upload_id = uuid.uuid4().hex
+    result_dir = os.path.join(upload_dir, upload_id)
+    os.makedirs(result_dir, exist_ok=True)
+    scored_path = os.path.join(result_dir, 'scored.csv')
+
+    chunks = iter_parquet_chunks(fileobj, chunk_size) if fmt == 'parquet' else iter_csv_chunks(fileobj, chunk_size)
+    aggregator = AnalysisAggregator()
+    rows_read = 0
+    run_id = None
+    score_chunk = score_chunk or partial(analyze_dataframe, engine=engine)
+
+    try:
+        for i, chunk in enumerate(chunks):
+            if 'content' not in chunk.columns:
+                raise UploadError("'content' column not found in the uploaded file")
+            if store and run_id is None:
+                run_id = store.start_run(name or 'upload', source='upload', engine=engine)
+
+            rows_read += len(chunk)
+            chunk = score_chunk(chunk)
+            aggregator.update(chunk)
+            if store:
+                store.add_tweets(run_id, name or 'upload', chunk)
+            chunk.to_csv(scored_path, mode='w' if i == 0 else 'a', header=(i == 0),
+                         index=False, encoding='utf-8')
+        # An empty summary has no median or percentiles to report
+        if not aggregator.summary.total:
+            raise UploadError("The uploaded file has no rows to analyze")
+    except Exception:
+        # Nothing of a failed upload is kept: neither its files nor the
+        # tweets earlier chunks wrote to the store. The reader is closed
+        # now, while the caller's body is still open.
+        chunks.close()
+        shutil.rmtree(result_dir, ignore_errors=True)
+        if run_id:
+            store.delete_run(run_id)
+        raise
+
+    response = aggregator.response(name or 'upload', engine, timeline_granularity, timeline_points)
+    response['upload_id'] = upload_id
+    response['rows_read'] = rows_read
+    if run_id:
+        response['run_id'] = run_id
+
+    with open(os.path.join(result_dir, 'response.json'), 'w', encoding='utf-8') as f:
+        json.dump(response, f)
+
+    return response
+
+
+def load_upload(upload_id, upload_dir=UPLOAD_DIR):
+    """
+    Load a stored upload result
+
+    Args:
+        upload_id: Id returned by analyze_upload
+
+    Returns:
+        Response dictionary, or None if unknown
+    """
+    if not upload_id.isalnum():
+        return None
+    path = os.path.join(upload_dir, upload_id, 'response.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -1,6 +1,7 @@
 """
 Visualization of Sentiment Analysis Results
-Creates various charts and visualizations for tweet sentiment data
+Creates various charts and visualizations for tweet sentiment data, with an
+incremental batch mode that only redraws charts whose inputs changed
 """
 
 import pandas as pd
@@ -8,14 +9,44 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from wordcloud import WordCloud
 import argparse
+import glob
+import hashlib
+import json
 import os
+from contextlib import nullcontext
 from datetime import datetime
 
+from timeline import TimelineCounts, GRANULARITIES, parse_dates
+from instrumentation import stage, instrumented_run, PROFILE_DIR
+
 
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 8)
 
+DPI = 300
+# Bump when chart code changes, so manifests written by older code are redrawn
+RENDER_VERSION = 1
+MANIFEST_FILE = 'report_manifest.json'
+
+
+def get_figure(name, figsize):
+    """
+    Get the figure for a chart type, cleared
+
+    One figure per chart type is kept open and reused, so batch runs over
+    many datasets don't pay for figure setup on every chart.
+    """
+    return plt.figure(num=name, figsize=figsize, clear=True)
+
+
+def save_figure(output_dir, filename):
+    """Save the current figure into output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, filename)
+    plt.savefig(filepath, dpi=DPI, bbox_inches='tight')
+    print(f"✓ Saved: {filepath}")
+
 
 def create_sentiment_distribution(df, output_dir='plots'):
     """
@@ -25,7 +56,7 @@ def create_sentiment_distribution(df, output_dir='plots'):
         df: DataFrame with sentiment analysis results
         output_dir: Directory to save plots
     """
-    plt.figure(figsize=(10, 6))
+    get_figure('sentiment_distribution', (10, 6))
     
     # Count sentiments
     sentiment_counts = df['sentiment'].value_counts()
@@ -47,11 +78,7 @@ def create_sentiment_distribution(df, output_dir='plots'):
     plt.tight_layout()
     
     # Save plot
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, 'sentiment_distribution.png')
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {filepath}")
-    plt.close()
+    save_figure(output_dir, 'sentiment_distribution.png')
 
 
 def create_sentiment_pie_chart(df, output_dir='plots'):
@@ -62,7 +89,7 @@ def create_sentiment_pie_chart(df, output_dir='plots'):
         df: DataFrame with sentiment analysis results
         output_dir: Directory to save plots
     """
-    plt.figure(figsize=(10, 8))
+    get_figure('sentiment_pie_chart', (10, 8))
     
     sentiment_counts = df['sentiment'].value_counts()
     colors = ['#2ecc71', '#95a5a6', '#e74c3c']
@@ -78,11 +105,7 @@ def create_sentiment_pie_chart(df, output_dir='plots'):
     plt.tight_layout()
     
     # Save plot
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, 'sentiment_pie_chart.png')
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {filepath}")
-    plt.close()
+    save_figure(output_dir, 'sentiment_pie_chart.png')
 
 
 def create_compound_score_distribution(df, output_dir='plots'):
@@ -93,7 +116,7 @@ def create_compound_score_distribution(df, output_dir='plots'):
         df: DataFrame with sentiment analysis results
         output_dir: Directory to save plots
     """
-    plt.figure(figsize=(12, 6))
+    get_figure('compound_score_distribution', (12, 6))
     
     # Create histogram
     plt.hist(df['sentiment_compound'], bins=30, color='#3498db', 
@@ -114,42 +137,43 @@ def create_compound_score_distribution(df, output_dir='plots'):
     plt.tight_layout()
     
     # Save plot
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, 'compound_score_distribution.png')
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {filepath}")
-    plt.close()
+    save_figure(output_dir, 'compound_score_distribution.png')
 
 
-def create_sentiment_timeline(df, output_dir='plots'):
+def create_sentiment_timeline(df, output_dir='plots', granularity='auto', max_points=500):
     """
     Create timeline showing sentiment over time
     
     Args:
         df: DataFrame with sentiment analysis results
         output_dir: Directory to save plots
+        granularity: 'minute', 'hour', 'day', 'week' or 'auto' (from the data span)
+        max_points: Downsample longer series to this many points (LTTB)
     """
     if 'date' not in df.columns:
         print("⚠ Warning: 'date' column not found. Skipping timeline visualization.")
         return
     
     try:
-        # Convert date column to datetime
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
+        timeline = TimelineCounts().update(df['date'], df['sentiment']).series(granularity, max_points)
+        if not timeline['points']:
+            print("⚠ Warning: No valid dates found. Skipping timeline visualization.")
+            return
         
-        # Group by date and sentiment
-        daily_sentiment = df.groupby([df['date'].dt.date, 'sentiment']).size().unstack(fill_value=0)
+        counts = pd.DataFrame(timeline['points']).set_index('date')
+        counts = counts[[col for col in ('positive', 'neutral', 'negative') if counts[col].any()]]
         
-        plt.figure(figsize=(14, 6))
+        get_figure('sentiment_timeline', (14, 6))
         
         # Plot stacked area chart
         colors = {'positive': '#2ecc71', 'neutral': '#95a5a6', 'negative': '#e74c3c'}
-        daily_sentiment.plot(kind='area', stacked=True, 
-                            color=[colors.get(col, '#3498db') for col in daily_sentiment.columns],
-                            alpha=0.7)
+        counts.plot(kind='area', stacked=True, ax=plt.gca(),
+                    color=[colors.get(col, '#3498db') for col in counts.columns],
+                    alpha=0.7)
         
-        plt.title('Sentiment Timeline', fontsize=16, fontweight='bold', pad=20)
+        title = f"Sentiment Timeline (per {timeline['granularity']}"
+        title += ', downsampled)' if timeline['downsampled'] else ')'
+        plt.title(title, fontsize=16, fontweight='bold', pad=20)
         plt.xlabel('Date', fontsize=12, fontweight='bold')
         plt.ylabel('Number of Tweets', fontsize=12, fontweight='bold')
         plt.legend(title='Sentiment', fontsize=10)
@@ -159,11 +183,7 @@ def create_sentiment_timeline(df, output_dir='plots'):
         plt.tight_layout()
         
         # Save plot
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, 'sentiment_timeline.png')
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        print(f"✓ Saved: {filepath}")
-        plt.close()
+        save_figure(output_dir, 'sentiment_timeline.png')
     
     except Exception as e:
         print(f"⚠ Warning: Could not create timeline visualization. Error: {e}")
@@ -204,7 +224,7 @@ def create_wordcloud(df, sentiment=None, output_dir='plots'):
         return
     
     # Create word cloud
-    plt.figure(figsize=(14, 8))
+    get_figure('wordcloud', (14, 8))
     
     wordcloud = WordCloud(width=1200, height=600, 
                          background_color='white',
@@ -220,11 +240,7 @@ def create_wordcloud(df, sentiment=None, output_dir='plots'):
     plt.tight_layout()
     
     # Save plot
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, filename)
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {filepath}")
-    plt.close()
+    save_figure(output_dir, filename)
 
 
 def create_sentiment_score_boxplot(df, output_dir='plots'):
@@ -235,7 +251,7 @@ def create_sentiment_score_boxplot(df, output_dir='plots'):
         df: DataFrame with sentiment analysis results
         output_dir: Directory to save plots
     """
-    plt.figure(figsize=(12, 6))
+    get_figure('sentiment_boxplot', (12, 6))
     
     # Prepare data for boxplot
     data_to_plot = [
@@ -244,8 +260,9 @@ def create_sentiment_score_boxplot(df, output_dir='plots'):
         df[df['sentiment'] == 'negative']['sentiment_compound']
     ]
     
-    box = plt.boxplot(data_to_plot, labels=['Positive', 'Neutral', 'Negative'],
-                      patch_artist=True, showmeans=True)
+    box = plt.boxplot(data_to_plot, patch_artist=True, showmeans=True)
+    # Set tick labels separately: boxplot's labels= keyword was removed in matplotlib 3.11
+    plt.xticks([1, 2, 3], ['Positive', 'Neutral', 'Negative'])
     
     # Color the boxes
     colors = ['#2ecc71', '#95a5a6', '#e74c3c']
@@ -261,56 +278,292 @@ def create_sentiment_score_boxplot(df, output_dir='plots'):
     plt.tight_layout()
     
     # Save plot
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, 'sentiment_boxplot.png')
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {filepath}")
-    plt.close()
+    save_figure(output_dir, 'sentiment_boxplot.png')
+
+
+# Chart name (also the PNG file name) -> (columns it reads, sentiment filter,
+# parameters it depends on, render function)
+CHARTS = {
+    'sentiment_distribution': (['sentiment'], None, (),
+                               lambda df, out, params: create_sentiment_distribution(df, out)),
+    'sentiment_pie_chart': (['sentiment'], None, (),
+                            lambda df, out, params: create_sentiment_pie_chart(df, out)),
+    'compound_score_distribution': (['sentiment_compound'], None, (),
+                                    lambda df, out, params: create_compound_score_distribution(df, out)),
+    'sentiment_timeline': (['date', 'sentiment'], None, ('granularity',),
+                           lambda df, out, params: create_sentiment_timeline(df, out, params['granularity'])),
+    'sentiment_boxplot': (['sentiment', 'sentiment_compound'], None, (),
+                          lambda df, out, params: create_sentiment_score_boxplot(df, out)),
+    'wordcloud_all': (['cleaned_text'], None, (),
+                      lambda df, out, params: create_wordcloud(df, None, out)),
+    'wordcloud_positive': (['cleaned_text'], 'positive', (),
+                           lambda df, out, params: create_wordcloud(df, 'positive', out)),
+    'wordcloud_negative': (['cleaned_text'], 'negative', (),
+                           lambda df, out, params: create_wordcloud(df, 'negative', out)),
+}
+
+
+def read_analyzed(input_file):
+    """Read an analyzed tweets CSV, parsing dates once"""
+    with stage('read'):
+        df = pd.read_csv(input_file)
+        if 'date' in df.columns:
+            # Parse once; the timeline reuses the parsed column
+            df['date'] = parse_dates(df['date'])
+    return df
 
 
-def visualize_all(input_file, output_dir='plots'):
+def file_sha256(path, block_size=1024 * 1024):
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chart_key(df, name, params):
     """
-    Create all visualizations
+    Content address of one chart: a hash of exactly the data and parameters
+    it is drawn from, so appending rows that a chart ignores keeps its key
+
+    Args:
+        df: Analyzed tweets DataFrame
+        name: Chart name (key of CHARTS)
+        params: Report parameters (only those the chart depends on are used)
+
+    Returns:
+        Hex digest
+    """
+    columns, sentiment, param_names, _ = CHARTS[name]
+    data = df[[column for column in columns if column in df.columns]]
+    if sentiment and 'sentiment' in df.columns:
+        data = data[df['sentiment'] == sentiment]
+
+    header = {'chart': name, 'version': RENDER_VERSION, 'dpi': DPI, 'columns': list(data.columns),
+              **{param: params[param] for param in param_names}}
+    digest = hashlib.sha256(json.dumps(header, sort_keys=True).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def render_charts(df, output_dir, params, charts=None):
+    """
+    Draw charts for one dataset
+
+    Args:
+        df: Analyzed tweets DataFrame
+        output_dir: Directory to save plots
+        params: Report parameters ({'granularity': ...})
+        charts: Chart names to draw (default: all)
+    """
+    for name in charts or CHARTS:
+        try:
+            with stage(name):
+                CHARTS[name][3](df, output_dir, params)
+        except Exception as e:
+            print(f"⚠ Warning: Could not create {name}. Error: {e}")
+
+
+def visualize_all(input_file, output_dir='plots', granularity='auto', force=False):
+    """
+    Create all visualizations for one analyzed dataset
+    
+    Same as visualize_batch([input_file], ...): charts whose inputs are
+    unchanged since the last run into output_dir are skipped.
     
     Args:
         input_file: Path to analyzed tweets CSV
         output_dir: Directory to save plots
-    """
-    print(f"Reading analyzed tweets from: {input_file}")
-    df = pd.read_csv(input_file)
-    print(f"Total tweets: {len(df)}")
+        granularity: Timeline granularity ('auto' picks one from the data span)
+        force: Redraw everything regardless of the manifest
     
-    print("\nCreating visualizations...\n")
+    Returns:
+        Dictionary of counts, as from visualize_batch
+    """
+    return visualize_batch([input_file], output_dir, granularity, force=force)
+
+
+def expand_inputs(inputs):
+    """
+    Resolve input files, directories (their *.csv files) and glob patterns
+
+    Returns:
+        List of CSV paths, in order, without duplicates
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(glob.glob(os.path.join(item, '*.csv')))
+        elif any(char in item for char in '*?['):
+            matches = sorted(glob.glob(item, recursive=True))
+        else:
+            matches = [item]
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def dataset_dirs(paths, output_dir, single):
+    """
+    Output directory per dataset: output_dir itself for a single input file,
+    otherwise one subdirectory per dataset named after the file
+    """
+    if single:
+        return {paths[0]: output_dir}
+
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    dirs = {}
+    for path, stem in zip(paths, stems):
+        if stems.count(stem) > 1:
+            stem += '-' + hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+        dirs[path] = os.path.join(output_dir, stem)
+    return dirs
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'datasets': {}}
+
+
+def save_manifest(output_dir, manifest):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def outputs_present(entry):
+    """Whether every chart an entry says was written still exists on disk"""
+    return all(os.path.exists(os.path.join(entry['output_dir'], f"{name}.png"))
+               for name, chart in entry.get('charts', {}).items() if chart['written'])
+
+
+def visualize_batch(inputs, output_dir='plots', granularity='auto', force=False):
+    """
+    Incrementally render reports for many datasets in one process
     
-    # Create all visualizations
-    create_sentiment_distribution(df, output_dir)
-    create_sentiment_pie_chart(df, output_dir)
-    create_compound_score_distribution(df, output_dir)
-    create_sentiment_timeline(df, output_dir)
-    create_sentiment_score_boxplot(df, output_dir)
+    A manifest in output_dir records each input's content hash and the
+    content address of every chart. A dataset whose file is unchanged is
+    skipped without being read (its size and mtime are checked first, so the
+    file isn't even hashed); for a changed file only the charts whose own
+    inputs changed are redrawn.
     
-    # Create word clouds
-    create_wordcloud(df, sentiment=None, output_dir=output_dir)
-    create_wordcloud(df, sentiment='positive', output_dir=output_dir)
-    create_wordcloud(df, sentiment='negative', output_dir=output_dir)
+    Args:
+        inputs: Input CSV files, directories or glob patterns
+        output_dir: Directory to save plots (and the manifest)
+        granularity: Timeline granularity ('auto' picks one from the data span)
+        force: Redraw everything regardless of the manifest
     
-    print(f"\n{'='*50}")
-    print("✓ All visualizations created successfully!")
-    print(f"{'='*50}")
-    print(f"Output directory: {os.path.abspath(output_dir)}")
+    Returns:
+        Dictionary with counts of datasets/charts rendered and skipped
+    """
+    paths = expand_inputs(inputs)
+    single = len(inputs) == 1 and os.path.isfile(inputs[0])
+    dirs = dataset_dirs(paths, output_dir, single) if paths else {}
+    params = {'granularity': granularity}
+    manifest = load_manifest(output_dir)
+    stats = {'datasets': len(paths), 'datasets_skipped': 0, 'charts_rendered': 0, 'charts_skipped': 0}
+
+    for path in paths:
+        key = os.path.abspath(path)
+        entry = manifest['datasets'].get(key, {})
+        stat = os.stat(path)
+        if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            sha256 = entry['sha256']
+        else:
+            with stage('hash'):
+                sha256 = file_sha256(path)
+
+        unchanged = (entry.get('sha256') == sha256 and entry.get('params') == params
+                     and entry.get('output_dir') == dirs[path] and entry.get('version') == RENDER_VERSION
+                     and outputs_present(entry))
+        if unchanged and not force:
+            print(f"⏭ Unchanged: {path}")
+            stats['datasets_skipped'] += 1
+            stats['charts_skipped'] += len(entry['charts'])
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            continue
+
+        print(f"\nReading analyzed tweets from: {path}")
+        df = read_analyzed(path)
+        print(f"Total tweets: {len(df)}")
+
+        charts = {}
+        previous = entry.get('charts', {}) if entry.get('output_dir') == dirs[path] else {}
+        for name in CHARTS:
+            with stage('chart_keys'):
+                chart = {'key': chart_key(df, name, params)}
+            filepath = os.path.join(dirs[path], f"{name}.png")
+            old = previous.get(name)
+            if (not force and old and old['key'] == chart['key']
+                    and (os.path.exists(filepath) or not old['written'])):
+                charts[name] = old
+                stats['charts_skipped'] += 1
+                continue
+
+            if os.path.exists(filepath):
+                os.remove(filepath)  # don't leave a stale chart if this one is now skipped
+            render_charts(df, dirs[path], params, [name])
+            chart['written'] = os.path.exists(filepath)
+            charts[name] = chart
+            stats['charts_rendered'] += 1
+
+        manifest['datasets'][key] = {
+            'output_dir': dirs[path],
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'params': params,
+            'version': RENDER_VERSION,
+            'charts': charts,
+            'rendered_at': datetime.now().isoformat(),
+        }
+        save_manifest(output_dir, manifest)
+
+    if paths:
+        save_manifest(output_dir, manifest)
+    plt.close('all')
+    return stats
 
 
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Visualize sentiment analysis results')
-    parser.add_argument('--input', type=str, required=True,
-                        help='Input CSV file with analyzed tweets')
+    parser.add_argument('--input', type=str, nargs='+', required=True,
+                        help='Input CSV file(s) with analyzed tweets, directories of CSVs or glob patterns')
     parser.add_argument('--output-dir', type=str, default='plots',
                         help='Output directory for plots (default: plots)')
+    parser.add_argument('--granularity', type=str, default='auto',
+                        choices=['auto', *GRANULARITIES],
+                        help='Timeline bucket size (default: auto, chosen from the data span)')
+    parser.add_argument('--force', action='store_true',
+                        help='Redraw every chart even if its inputs are unchanged')
+    parser.add_argument('--timings', action='store_true',
+                        help='Print per-stage timings (read, hashing, each chart)')
+    parser.add_argument('--profile', type=str, nargs='?', const=PROFILE_DIR, default=None,
+                        help=f'Write a cProfile profile of the run to this directory (default: {PROFILE_DIR})')
     
     args = parser.parse_args()
     
-    visualize_all(args.input, args.output_dir)
+    instrumentation = (instrumented_run('visualize', args.profile, print_timings=True)
+                       if args.timings or args.profile else nullcontext())
+    with instrumentation:
+        stats = visualize_batch(args.input, args.output_dir, args.granularity, force=args.force)
+    
+    print(f"\n{'='*50}")
+    if not stats['datasets']:
+        print("❌ No input datasets found")
+        print(f"{'='*50}")
+        return
+    print(f"✓ Reports up to date for {stats['datasets']} dataset(s)")
+    print(f"Charts rendered: {stats['charts_rendered']}, unchanged: {stats['charts_skipped']} "
+          f"({stats['datasets_skipped']} dataset(s) skipped without reading)")
+    print(f"{'='*50}")
+    print(f"Output directory: {os.path.abspath(args.output_dir)}")
 
 
 if __name__ == "__main__":